@@ -2,16 +2,24 @@
 Authentication cog for managing student and professional authentication.
 Provides admin commands to register professionals and manage access.
 """
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands, Interaction, Embed, Color, TextChannel, ui, ButtonStyle
 from sqlalchemy import select
 from typing import Optional
 
 from db import AsyncSessionLocal, init_db
 from db.models import AuthenticatedUser, Professional, ProfessionalCourseChannel, PendingAuth
-from utils import ROLE_MANAGER, ROLE_M1, ROLE_M2, ROLE_FI, ROLE_FA, ROLE_NOTABLE
-from utils.csv_parser import get_all_students
-from ui.authentication import AuthenticationAdminPanel
+from utils import ROLE_MANAGER, ROLE_M1, ROLE_M2, ROLE_FI, ROLE_FA, ROLE_NOTABLE, LOG_CHANNEL, CYBER
+from utils.email_outbox import email_outbox
+from utils.roster_store import seed_from_files
+from utils.pending_auths import purge_expired_pending_auths
+from utils.rate_limiter import auth_email_limiter, AUTH_EMAIL_POLICIES
+from utils.stats import stats_service
+from utils.role_jobs import role_jobs, build_progress_embed, RoleJobProgress
+from utils.role_sync import (
+    reconcile_roles, record_role_reset, plan_reconciliation, count_removals, STARTUP_MAX_REMOVALS
+)
+from ui.authentication import AuthenticationAdminPanel, ProfessionalListView
 
 
 class Authentication(commands.Cog):
@@ -19,10 +27,77 @@ class Authentication(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.reconciled = False
     
     async def cog_load(self):
-        """Initialize database when cog loads."""
+        """Initialize database, seed the student roster and start the background jobs when cog loads."""
         await init_db()
+        await seed_from_files()
+        await auth_email_limiter.load()
+        await email_outbox.start()
+        self.purge_pending_auths.start()
+    
+    async def cog_unload(self):
+        """Stop the background jobs when cog unloads."""
+        self.purge_pending_auths.cancel()
+        await email_outbox.stop()
+        await role_jobs.stop()
+    
+    def log_channel_progress(self, header: str):
+        """Progress callback posting a role job's embed in the log channel, then editing it."""
+        channel = self.bot.get_channel(LOG_CHANNEL.id)
+        if not channel:
+            return None
+        message = None
+        
+        async def show_progress(progress: RoleJobProgress):
+            nonlocal message
+            embed = build_progress_embed(progress)
+            if message is None:
+                message = await channel.send(content=header, embed=embed)
+            else:
+                await message.edit(embed=embed)
+        
+        return show_progress
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Resume the role jobs interrupted by a restart, then reconcile the roles with the database once."""
+        await role_jobs.resume(self.bot, lambda job: self.log_channel_progress("🔁 Resumed after a restart"))
+        
+        if self.reconciled:
+            return
+        guild = self.bot.get_guild(CYBER.id)
+        if not guild:
+            return
+        self.reconciled = True
+        
+        changes = await plan_reconciliation(guild)
+        removals = count_removals(changes)
+        if removals > STARTUP_MAX_REMOVALS:
+            # Too much drift to be applied unattended (empty or unmigrated database, hand-granted roles...)
+            print(f"Startup role reconciliation skipped: {removals} member(s) would lose a role")
+            channel = self.bot.get_channel(LOG_CHANNEL.id)
+            if channel:
+                embed = Embed(
+                    title="⚠️ Startup Role Reconciliation Skipped",
+                    description=f"**{removals}** member(s) would lose an M1/M2/FI/FA role "
+                               f"(limit: {STARTUP_MAX_REMOVALS}) and {len(changes) - removals} would gain one.\n\n"
+                               "Check the authentication records, then run `/reconcile_roles` to apply the changes.",
+                    color=Color.orange()
+                )
+                await channel.send(embed=embed)
+            return
+        await reconcile_roles(
+            self.bot, guild, on_progress=self.log_channel_progress("🔄 Startup role reconciliation"), changes=changes
+        )
+    
+    @tasks.loop(minutes=10)
+    async def purge_pending_auths(self):
+        """Delete expired pending authentications and old outbox emails, forget refilled rate limit buckets."""
+        await purge_expired_pending_auths()
+        await auth_email_limiter.prune(AUTH_EMAIL_POLICIES)
+        await email_outbox.purge()
     
     @app_commands.command(
         name="manage_authentication",
@@ -42,7 +117,8 @@ class Authentication(commands.Cog):
                        "• Grant/revoke course access\n"
                        "• Deauthenticate users\n"
                        "• Clear expired tokens\n"
-                       "• Reset roles for entire groups",
+                       "• Reset roles for entire groups\n"
+                       "• Upload student rosters (CSV)",
             color=Color.blue()
         )
         embed.add_field(
@@ -272,33 +348,17 @@ class Authentication(commands.Cog):
     )
     @app_commands.checks.has_any_role(ROLE_MANAGER.id)
     async def list_professionals(self, interaction: Interaction):
-        """List all registered professionals."""
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(select(Professional))
-            professionals = result.scalars().all()
-            
-            if not professionals:
-                await interaction.response.send_message(
-                    "No professionals registered yet.",
-                    ephemeral=True
-                )
-                return
-            
-            embed = Embed(
-                title="👔 Registered Professionals",
-                color=Color.blue()
+        """List all registered professionals, one page at a time."""
+        view = ProfessionalListView()
+        if not await view.load():
+            await interaction.response.send_message(
+                "No professionals registered yet.",
+                ephemeral=True
             )
-            
-            for pro in professionals:
-                name = f"{pro.first_name or ''} {pro.last_name or ''}".strip() or "No name"
-                channel_count = len(pro.course_channels)
-                embed.add_field(
-                    name=name,
-                    value=f"📧 {pro.email}\n📚 {channel_count} course(s)",
-                    inline=False
-                )
-            
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        embed = view.create_embed((await stats_service.auth()).registered_professionals)
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
     
     @app_commands.command(
         name="view_professional",
@@ -447,82 +507,56 @@ class Authentication(commands.Cog):
     @app_commands.checks.has_any_role(ROLE_MANAGER.id, ROLE_NOTABLE.id)
     async def auth_stats(self, interaction: Interaction):
         """View authentication statistics."""
-        async with AsyncSessionLocal() as session:
-            # Get all authenticated users
-            result = await session.execute(select(AuthenticatedUser))
-            users = result.scalars().all()
-            
-            # Get pending authentications
-            result = await session.execute(select(PendingAuth))
-            pending = result.scalars().all()
-            
-            # Count by type
-            students = [u for u in users if u.user_type == 'student']
-            professionals = [u for u in users if u.user_type == 'professional']
-            
-            # Count by grade level
-            m1_students = [u for u in students if u.grade_level == 'M1']
-            m2_students = [u for u in students if u.grade_level == 'M2']
-            
-            # Count by formation
-            fi_students = [u for u in students if u.formation_type == 'FI']
-            fa_students = [u for u in students if u.formation_type == 'FA']
-            
-            # Get total from CSV files
-            all_students_csv = get_all_students()
-            
-            embed = Embed(
-                title="📊 Authentication Statistics",
-                color=Color.blue()
-            )
-            
-            embed.add_field(
-                name="Authenticated Users",
-                value=f"**Total:** {len(users)}\n"
-                      f"**Students:** {len(students)}\n"
-                      f"**Professionals:** {len(professionals)}",
-                inline=True
-            )
-            
-            embed.add_field(
-                name="Students by Grade",
-                value=f"**M1:** {len(m1_students)}\n"
-                      f"**M2:** {len(m2_students)}",
-                inline=True
-            )
-            
-            embed.add_field(
-                name="Students by Formation",
-                value=f"**FI:** {len(fi_students)}\n"
-                      f"**FA:** {len(fa_students)}",
-                inline=True
-            )
-            
-            embed.add_field(
-                name="CSV Data",
-                value=f"**Total in CSV:** {len(all_students_csv)}\n"
-                      f"**Authenticated:** {len(students)} ({len(students)*100//max(len(all_students_csv),1)}%)",
-                inline=False
-            )
-            
-            embed.add_field(
-                name="Pending Authentications",
-                value=str(len(pending)),
-                inline=True
-            )
-            
-            # Profile links
-            with_rootme = len([u for u in users if u.rootme_id])
-            with_linkedin = len([u for u in users if u.linkedin_url])
-            
-            embed.add_field(
-                name="Profile Links",
-                value=f"**Root-Me:** {with_rootme}\n"
-                      f"**LinkedIn:** {with_linkedin}",
-                inline=True
-            )
-            
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+        stats = await stats_service.auth()
+        
+        embed = Embed(
+            title="📊 Authentication Statistics",
+            color=Color.blue()
+        )
+        
+        embed.add_field(
+            name="Authenticated Users",
+            value=f"**Total:** {stats.total}\n"
+                  f"**Students:** {stats.students}\n"
+                  f"**Professionals:** {stats.professionals}",
+            inline=True
+        )
+        
+        embed.add_field(
+            name="Students by Grade",
+            value=f"**M1:** {stats.by_grade.get('M1', 0)}\n"
+                  f"**M2:** {stats.by_grade.get('M2', 0)}",
+            inline=True
+        )
+        
+        embed.add_field(
+            name="Students by Formation",
+            value=f"**FI:** {stats.by_formation.get('FI', 0)}\n"
+                  f"**FA:** {stats.by_formation.get('FA', 0)}",
+            inline=True
+        )
+        
+        embed.add_field(
+            name="Student Roster",
+            value=f"**Total in roster:** {stats.roster}\n"
+                  f"**Authenticated:** {stats.students} ({stats.students*100//max(stats.roster,1)}%)",
+            inline=False
+        )
+        
+        embed.add_field(
+            name="Pending Authentications",
+            value=str(stats.pending),
+            inline=True
+        )
+        
+        embed.add_field(
+            name="Profile Links",
+            value=f"**Root-Me:** {stats.with_rootme}\n"
+                  f"**LinkedIn:** {stats.with_linkedin}",
+            inline=True
+        )
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
     
     @app_commands.command(
         name="reset_roles",
@@ -586,51 +620,28 @@ class Authentication(commands.Cog):
         cancel_button = ui.Button(label="Cancel", style=ButtonStyle.secondary)
         
         async def confirm_callback(confirm_interaction: Interaction):
-            await confirm_interaction.response.defer()
-            
-            # Remove role from all members
-            success_count = 0
-            failed_count = 0
-            
-            for member in members_with_role:
-                try:
-                    await member.remove_roles(role, reason=f"Role reset by {interaction.user}")
-                    success_count += 1
-                except Exception as e:
-                    print(f"Failed to remove role from {member}: {e}")
-                    failed_count += 1
-            
-            # Create result embed
-            result_embed = Embed(
-                title="✅ Role Reset Complete",
-                color=Color.green()
-            )
-            result_embed.add_field(
-                name="Role",
-                value=role.mention,
-                inline=False
-            )
-            result_embed.add_field(
-                name="Successfully Removed",
-                value=str(success_count),
-                inline=True
-            )
-            if failed_count > 0:
-                result_embed.add_field(
-                    name="Failed",
-                    value=str(failed_count),
-                    inline=True
-                )
-            result_embed.add_field(
-                name="Executed By",
-                value=interaction.user.mention,
-                inline=False
+            await confirm_interaction.response.edit_message(
+                content=f"⏳ Removing {role.mention} from {member_count} member(s)...",
+                embed=None,
+                view=None
             )
             
-            await confirm_interaction.edit_original_response(
-                content=None,
-                embed=result_embed,
-                view=None
+            async def show_progress(progress: RoleJobProgress):
+                embed = build_progress_embed(progress)
+                embed.add_field(name="Executed By", value=interaction.user.mention, inline=False)
+                await confirm_interaction.edit_original_response(content=None, embed=embed)
+            
+            # Reconciliation must not give the role back
+            await record_role_reset(role.id, interaction.user.id)
+            
+            # Runs in the background and resumes after a restart
+            await role_jobs.run(
+                self.bot,
+                interaction.guild.id,
+                f"Remove {role.mention} (reset by {interaction.user})",
+                {member.id: ((), (role.id,)) for member in members_with_role},
+                created_by=interaction.user.id,
+                on_progress=show_progress
             )
         
         async def cancel_callback(cancel_interaction: Interaction):
@@ -665,6 +676,27 @@ class Authentication(commands.Cog):
             view=view,
             ephemeral=True
         )
+    
+    @app_commands.command(
+        name="reconcile_roles",
+        description="Sync the M1/M2/FI/FA roles with the authenticated users (Admin only)."
+    )
+    @app_commands.checks.has_any_role(ROLE_MANAGER.id)
+    async def reconcile_roles_command(self, interaction: Interaction):
+        """Apply the role changes needed to match the authentication records."""
+        await interaction.response.defer(ephemeral=True)
+        
+        async def show_progress(progress: RoleJobProgress):
+            await interaction.edit_original_response(embed=build_progress_embed(progress))
+        
+        job_id = await reconcile_roles(
+            self.bot,
+            interaction.guild,
+            created_by=interaction.user.id,
+            on_progress=show_progress
+        )
+        if job_id is None:
+            await interaction.followup.send("✅ Roles are already in sync.", ephemeral=True)
 
 
 async def setup(bot: commands.Bot):
@@ -0,0 +1,89 @@
+"""
+Calendar export cog.
+Serves per-grade ICS files combining the schedule and the active assignments.
+"""
+import io
+from typing import Optional
+
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands, Interaction
+from sqlalchemy import select
+
+from db import AsyncSessionLocal, init_db
+from db.constants import GradeLevel
+from db.models import AuthenticatedUser
+from utils.calendar_export import calendar_exporter
+
+
+class Calendar(commands.Cog):
+    """Cog exporting schedules and assignments as ICS calendars."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.refresh_calendars.start()
+
+    async def cog_load(self):
+        """Initialize database when cog loads."""
+        await init_db()
+
+    def cog_unload(self):
+        """Stop the refresh task when cog unloads."""
+        self.refresh_calendars.cancel()
+
+    calendar_group = app_commands.Group(name="calendar", description="Calendrier des cours et devoirs")
+
+    @calendar_group.command(name="export", description="Exporter l'emploi du temps et les devoirs au format ICS")
+    @app_commands.describe(grade="Niveau à exporter (par défaut : le vôtre)")
+    @app_commands.choices(grade=[
+        app_commands.Choice(name=level.value, value=level.value) for level in GradeLevel
+    ])
+    async def export(self, interaction: Interaction, grade: Optional[app_commands.Choice[str]] = None):
+        """Send the ICS calendar of a grade as an attachment."""
+        if grade:
+            grade_level = GradeLevel(grade.value)
+        else:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(AuthenticatedUser.grade_level).where(AuthenticatedUser.user_id == interaction.user.id)
+                )
+                grade_level = result.scalar_one_or_none()
+
+            if not grade_level:
+                await interaction.response.send_message(
+                    "❌ Impossible de déterminer votre niveau. Précisez l'option `grade`.",
+                    ephemeral=True
+                )
+                return
+
+        await interaction.response.defer(ephemeral=True)
+
+        try:
+            data = await calendar_exporter.get_calendar(grade_level)
+        except Exception as e:
+            await interaction.followup.send(f"❌ Erreur lors de l'export du calendrier : {str(e)}", ephemeral=True)
+            return
+
+        await interaction.followup.send(
+            f"📅 Calendrier **{grade_level.value}** (cours et devoirs). Importez ce fichier dans votre agenda.",
+            file=discord.File(io.BytesIO(data), filename=f"deadbeef-{grade_level.value}.ics"),
+            ephemeral=True
+        )
+
+    @tasks.loop(minutes=15)
+    async def refresh_calendars(self):
+        """Keep the calendar files in sync with the schedule and assignment hashes."""
+        for grade_level in GradeLevel:
+            try:
+                await calendar_exporter.get_calendar(grade_level)
+            except Exception as e:
+                print(f"Error refreshing {grade_level.value} calendar: {e}")
+
+    @refresh_calendars.before_loop
+    async def before_refresh_calendars(self):
+        """Wait until the bot is ready before starting the refresh task."""
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Calendar(bot))
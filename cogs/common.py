@@ -11,6 +11,7 @@ from ui.auth import Authentication
 from ui.announce import Announcement
 from db import AsyncSessionLocal
 from db.models import AuthenticatedUser, Professional
+from utils.message_registry import message_registry
 
 from api import RootMe
 
@@ -36,10 +37,15 @@ class Common(commands.Cog):
                 logger.error(f"Welcome channel {WELCOME_CHANNEL.id} not found")
                 return
             
-            welcome_message = await welcome.fetch_message(WELCOME_MESSAGE.id)
-            await welcome_message.edit(
+            # The view is persistent: register it so buttons work even when the message is left untouched
+            view = Authentication()
+            self.bot.add_view(view)
+            await message_registry.publish(
+                welcome,
+                "welcome",
                 content=ConfigManager.get('welcome_message'),
-                view=Authentication()
+                view=view,
+                message_id=WELCOME_MESSAGE.id
             )
             logger.info("Welcome message initialized successfully")
         except Exception as e:
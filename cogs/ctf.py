@@ -5,12 +5,17 @@ Provides comprehensive tools for creating, managing, and competing in CTF teams.
 from discord.ext import commands
 from discord import app_commands, Interaction, Embed, Color
 from sqlalchemy import select
+from typing import List
 
 from db import AsyncSessionLocal, init_db
 from db.models import PlayerProfile, Team, AuthenticatedUser
 from ui.ctf import (
     CreateTeamModal, TeamManagementPanel, TeamListView,
-    SetStatusView, ProfileView
+    SetStatusView, ProfileView, send_team_invite
+)
+from utils.player_index import player_index
+from utils.team_scores import (
+    refresh_teams, rebuild_team_scores, top_teams, build_leaderboard_embed, leaderboard_publisher
 )
 
 
@@ -21,8 +26,15 @@ class CTF(commands.Cog):
         self.bot = bot
     
     async def cog_load(self):
-        """Initialize database when cog loads."""
+        """Initialize database and the team scores when cog loads."""
         await init_db()
+        await rebuild_team_scores()
+        leaderboard_publisher.start(self.bot)
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Bring the pinned leaderboard up to date."""
+        leaderboard_publisher.schedule()
     
     async def ensure_profile(self, user_id: int) -> PlayerProfile:
         """Ensure a player profile exists for the authenticated user."""
@@ -168,6 +180,7 @@ class CTF(commands.Cog):
             # Remove from team
             team_name = team.name
             profile.team_id = None
+            await refresh_teams(session, [team.id])
             await session.commit()
             
             # Remove team role
@@ -362,6 +375,12 @@ class CTF(commands.Cog):
                 ephemeral=True
             )
     
+    @profile_group.command(name="leaderboard", description="View the CTF team leaderboard")
+    async def leaderboard(self, interaction: Interaction):
+        """Show the best teams by total Root-Me score."""
+        rows = await top_teams()
+        await interaction.response.send_message(embed=build_leaderboard_embed(rows))
+    
     @profile_group.command(name="teams", description="Browse available CTF teams")
     async def teams_list(self, interaction: Interaction):
         """List all recruiting teams."""
@@ -435,6 +454,38 @@ class CTF(commands.Cog):
                 f"❌ {str(e)}\n\nYou must be authenticated first. Use the authentication system to get started.",
                 ephemeral=True
             )
+    
+    @profile_group.command(name="invite", description="Invite a player looking for a team (Owner only)")
+    @app_commands.describe(player="Start typing a name or Root-Me pseudo")
+    async def invite(self, interaction: Interaction, player: str):
+        """Invite a player picked from the autocomplete suggestions."""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Team).where(Team.owner_id == interaction.user.id)
+            )
+            team = result.scalar_one_or_none()
+        
+        if not team:
+            await interaction.response.send_message(
+                "❌ Only a team owner can invite players.",
+                ephemeral=True
+            )
+            return
+        
+        if not player.isdigit():
+            await interaction.response.send_message(
+                "❌ Pick a player from the suggestions.",
+                ephemeral=True
+            )
+            return
+        
+        await send_team_invite(interaction, int(player), team.id)
+    
+    @invite.autocomplete('player')
+    async def invite_player_autocomplete(self, interaction: Interaction, current: str) -> List[app_commands.Choice[str]]:
+        """Players looking for a team whose name or pseudo starts with the input."""
+        players = await player_index.complete(interaction.guild, current)
+        return [app_commands.Choice(name=player.label[:100], value=str(player.user_id)) for player in players]
 
 
 async def setup(bot: commands.Bot):
@@ -11,6 +11,8 @@ from db import AsyncSessionLocal, init_db
 from db.models import MyTasksHubConfig, GradeChannelConfig, AssignmentStatus
 from db.constants import GradeLevel
 from ui.mytasks import MyTasksHubView
+from utils.message_registry import message_registry
+from utils.progress_writer import progress_writer
 
 
 class MyTasks(commands.Cog):
@@ -26,6 +28,10 @@ class MyTasks(commands.Cog):
         # Add persistent view to bot
         self.bot.add_view(MyTasksHubView(self.bot))
     
+    async def cog_unload(self):
+        """Write buffered progress toggles before the cog unloads."""
+        await progress_writer.flush()
+    
     @app_commands.command(
         name="setup_mytasks",
         description="Setup a My Tasks hub for a grade level (Admin only)."
@@ -96,11 +102,16 @@ class MyTasks(commands.Cog):
             )
             embed.set_footer(text="Your progress is private and only visible to you")
             
+            # Reuse the existing hub message (a hub moved to another channel is reposted)
             view = MyTasksHubView(self.bot)
-            message = await channel.send(embed=embed, view=view)
-            
-            # Save message ID
-            config.message_id = message.id
+            config.message_id = await message_registry.publish(
+                channel,
+                f"mytasks:{grade.upper()}",
+                embeds=[embed],
+                view=view,
+                message_id=config.message_id,
+                force=True
+            )
             await session.commit()
             
             await interaction.followup.send(
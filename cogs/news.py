@@ -1,15 +1,19 @@
+import discord
 from discord import Embed, Color
 from discord.ext import commands, tasks
 from discord import app_commands, Interaction
 from datetime import datetime
-from sqlalchemy import select
+from sqlalchemy import select, update, delete
 import feedparser
 import re
 
 from db import AsyncSessionLocal, init_db
-from db.models import NewsChannel, SentNewsEntry
+from db.models import NewsChannel, SentNewsEntry, NewsStorySignature
 from ui.news import NewsManagementView
 from utils import ROLE_NOTABLE, ROLE_MANAGER
+from utils.news_dedup import NewsDeduplicator, StoryRecord, compute_signature, pack_signature, unpack_signature
+
+ALSO_REPORTED_FIELD = "Également rapporté par"
 
 
 def clean_html(raw_html: str) -> str:
@@ -105,16 +109,39 @@ def create_news_embed(entry: dict, feed_name: str, feed_color: str) -> Embed:
     return embed
 
 
+def story_text(entry: dict) -> str:
+    """Text used to fingerprint a story: title plus cleaned summary."""
+    summary = clean_html(entry.get('description', entry.get('summary', '')))
+    return f"{entry.get('title', '')} {summary}"
+
+
 class News(commands.Cog):
     """Cog for managing RSS/Atom news feeds."""
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.dedup = NewsDeduplicator()
         self.news_update.start()
     
     async def cog_load(self):
-        """Initialize database when cog loads."""
+        """Initialize database and rebuild the duplicate detection window when cog loads."""
         await init_db()
+        
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(NewsStorySignature)
+                .where(NewsStorySignature.sent_at >= self.dedup.cutoff())
+                .order_by(NewsStorySignature.sent_at)
+            )
+            for row in result.scalars().all():
+                self.dedup.add(StoryRecord(
+                    record_id=row.id,
+                    channel_id=row.channel_id,
+                    message_id=row.message_id,
+                    signature=unpack_signature(row.signature),
+                    sent_at=row.sent_at,
+                    sources=row.sources.split('\n')
+                ))
     
     def cog_unload(self):
         """Stop the update task when cog unloads."""
@@ -155,10 +182,46 @@ class News(commands.Cog):
         
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
     
+    async def fold_duplicate(self, channel, session, record: StoryRecord, feed_name: str, entry: dict):
+        """
+        Add a feed to the "also reported by" field of the first message of a story
+        (find_duplicate never returns a story the feed already reported).
+        """
+        record.sources.append(feed_name)
+        
+        link = entry.get('link', '')
+        source = f"[{feed_name}]({link})" if link else feed_name
+        
+        try:
+            message = await channel.fetch_message(record.message_id)
+            if message.embeds:
+                embed = message.embeds[0]
+                index = next((i for i, f in enumerate(embed.fields) if f.name == ALSO_REPORTED_FIELD), None)
+                if index is None:
+                    embed.add_field(name=ALSO_REPORTED_FIELD, value=f":newspaper: {source}", inline=False)
+                else:
+                    previous = embed.fields[index].value
+                    embed.set_field_at(index, name=ALSO_REPORTED_FIELD, value=f"{previous}, {source}", inline=False)
+                await message.edit(embed=embed)
+        except discord.NotFound:
+            pass
+        
+        await session.execute(
+            update(NewsStorySignature)
+            .where(NewsStorySignature.id == record.record_id)
+            .values(sources='\n'.join(record.sources))
+        )
+    
     @tasks.loop(minutes=30)
     async def news_update(self):
         """Fetch and post new entries from all configured feeds."""
         async with AsyncSessionLocal() as session:
+            # Drop signatures that left the duplicate detection window
+            await session.execute(
+                delete(NewsStorySignature).where(NewsStorySignature.sent_at < self.dedup.cutoff())
+            )
+            await session.commit()
+            
             # Get all active news channels
             result = await session.execute(
                 select(NewsChannel).where(NewsChannel.is_active == True)
@@ -206,12 +269,38 @@ class News(commands.Cog):
                         # Send new entries
                         for entry, entry_id in new_entries:
                             try:
-                                embed = create_news_embed(
-                                    entry,
-                                    feed_config.name,
-                                    feed_config.color
-                                )
-                                await channel.send(embed=embed)
+                                signature = compute_signature(story_text(entry))
+                                duplicate = self.dedup.find_duplicate(channel.id, signature, feed_config.name) if signature else None
+                                
+                                if duplicate:
+                                    # Same story already posted by another feed
+                                    await self.fold_duplicate(channel, session, duplicate, feed_config.name, entry)
+                                else:
+                                    embed = create_news_embed(
+                                        entry,
+                                        feed_config.name,
+                                        feed_config.color
+                                    )
+                                    message = await channel.send(embed=embed)
+                                    
+                                    if signature:
+                                        story = NewsStorySignature(
+                                            channel_id=channel.id,
+                                            message_id=message.id,
+                                            signature=pack_signature(signature),
+                                            sources=feed_config.name,
+                                            sent_at=datetime.now()
+                                        )
+                                        session.add(story)
+                                        await session.flush()
+                                        self.dedup.add(StoryRecord(
+                                            record_id=story.id,
+                                            channel_id=channel.id,
+                                            message_id=message.id,
+                                            signature=signature,
+                                            sent_at=story.sent_at,
+                                            sources=[feed_config.name]
+                                        ))
                                 
                                 # Record as sent
                                 sent_entry = SentNewsEntry(
@@ -1,19 +1,20 @@
-import discord
 from discord.ext import commands, tasks
 from discord import app_commands, Interaction, Embed, Color
 from sqlalchemy import select
-import aiohttp
-import csv
-import io
+import asyncio
 import locale
 import hashlib
-from datetime import datetime, timedelta
-from typing import Optional, List, Tuple
+import json
+from dataclasses import asdict
+from typing import Optional, List, Tuple, Dict, Any, Sequence
 
 from db import AsyncSessionLocal, init_db
-from db.models import ScheduleChannelConfig
+from db.models import ScheduleChannelConfig, ScheduleSnapshot
 from ui.schedule import ScheduleManagementView
 from utils import ROLE_MANAGER
+from utils.message_registry import message_registry
+from utils.schedule_model import SheetLayout, DEFAULT_LAYOUT, Week, Day
+from utils.schedule_source import schedule_source
 
 # Set French locale for date formatting
 try:
@@ -25,216 +26,161 @@ except (locale.Error, ValueError):
         pass  # Fallback to default if French locale not available
 
 
-async def get_schedule_data(spreadsheet_url: str, gid: str) -> List[List[str]]:
+async def get_schedule_data(spreadsheet_url: str, gid: str, bypass_cache: bool = False) -> List[List[str]]:
     """
-    Fetch schedule data from Google Sheets.
+    Fetch schedule data from Google Sheets through the shared schedule source.
     
     Args:
         spreadsheet_url: The full Google Sheets URL
         gid: The sheet ID (gid parameter)
+        bypass_cache: Download the sheet even if a fresh copy is cached
     
     Returns:
-        List of rows from the spreadsheet
+        All rows of the exported sheet
     """
-    # Extract spreadsheet ID from URL
-    spreadsheet_id = None
-    if '/d/' in spreadsheet_url:
-        try:
-            spreadsheet_id = spreadsheet_url.split('/d/')[1].split('/')[0]
-        except (IndexError, AttributeError):
-            raise ValueError("Could not extract spreadsheet ID from URL")
-    
-    if not spreadsheet_id:
-        raise ValueError("Invalid spreadsheet URL format")
-    
-    # Construct CSV export URL
-    export_url = f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}/export?format=csv&gid={gid}"
-    
+    return await schedule_source.get_rows(spreadsheet_url, gid, bypass_cache)
+
+
+def get_layout(config: ScheduleChannelConfig) -> SheetLayout:
+    """Get the sheet layout of a configuration, falling back to the default layout."""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(export_url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                response.raise_for_status()
-                data = await response.text()
-                reader = list(csv.reader(io.StringIO(data)))
-                
-                # Return the relevant rows (skip header rows, adjust based on sheet structure)
-                # This may need adjustment based on the actual sheet structure
-                return reader[8:92] + reader[102:] if len(reader) > 102 else reader
-    
-    except aiohttp.ClientError as e:
-        raise Exception(f"Failed to fetch schedule: {str(e)}")
-    except Exception as e:
-        raise Exception(f"Failed to fetch schedule: {str(e)}")
+        return SheetLayout.from_json(getattr(config, 'sheet_layout', None))
+    except (ValueError, TypeError, KeyError):
+        print(f"Invalid sheet layout for {config.grade_level}, using default layout")
+        return DEFAULT_LAYOUT
 
 
-def filter_schedule_for_week(schedule_data: List[List[str]], classes_per_day: int = 2, start_day_index: int = 0, end_day_index: int = 1) -> Tuple[List[List[str]], bool]:
+def format_schedule(days: Sequence[Day]) -> str:
     """
-    Filter schedule data to get the current or next week with selected day range.
+    Format schedule days into a nice Discord message.
     
     Args:
-        schedule_data: Raw schedule data from spreadsheet
-        classes_per_day: Number of time slots per day (2 for M1, 3 for M2)
-        start_day_index: Start day of week to show (0=Monday, 1=Tuesday, etc.)
-        end_day_index: End day of week to show (inclusive)
+        days: Days of the displayed week (already restricted to the configured range)
     
     Returns:
-        Tuple of (filtered schedule for current week, whether week was updated)
+        Formatted string for Discord message
     """
-    today = datetime.today()
-    weekday = today.weekday()  # 0 = Monday, 6 = Sunday
-    
-    # Calculate start of the week (Monday)
-    start_of_week = today - timedelta(days=weekday)
-    week_updated = False
-    
-    # If we're past Friday (day 4), show next week
-    if weekday > 4:
-        start_of_week = start_of_week + timedelta(days=7)
-        week_updated = True
-    
-    # Calculate number of rows based on classes per day
-    # Each class has 3 rows: course name, teacher, room
-    rows_per_week = 1 + (classes_per_day * 3)  # 1 row for dates + (classes * 3 rows each)
+    formatted_parts = []
     
-    # Search for the week in the schedule data
-    for i in range(0, len(schedule_data), rows_per_week):
-        try:
-            # Try to parse the date in the first column (assuming it's in DD/MM format)
-            if len(schedule_data[i]) > 1 and schedule_data[i][1]:
-                date_str = schedule_data[i][1]
-                date = datetime.strptime(date_str, "%d/%m").replace(year=today.year)
-                
-                # Check if this is the week we're looking for
-                if date.date() == start_of_week.date():
-                    # Calculate column indices for selected days
-                    # Column 0 is row labels, column 1 is Monday, column 2 is Tuesday, etc.
-                    start_col = 1 + start_day_index  # +1 because column 0 is labels
-                    end_col = 1 + end_day_index + 1  # +1 for labels, +1 for inclusive end
-                    
-                    # Format the dates with full day names for selected range
-                    for j in range(start_col, min(end_col, len(schedule_data[i]))):
-                        if schedule_data[i][j]:
-                            try:
-                                day_date = datetime.strptime(schedule_data[i][j], "%d/%m").replace(year=today.year)
-                                schedule_data[i][j] = day_date.strftime("%A %d %B %Y").capitalize()
-                            except:
-                                pass
-                    
-                    # Return the rows for this week, filtered to selected columns
-                    # Column 0 (labels) + selected day columns
-                    filtered_rows = []
-                    for row in schedule_data[i:i + rows_per_week]:
-                        # Keep column 0 (labels) + selected day range
-                        filtered_row = [row[0]] if len(row) > 0 else []
-                        filtered_row.extend(row[start_col:end_col] if len(row) >= end_col else row[start_col:])
-                        filtered_rows.append(filtered_row)
-                    
-                    return filtered_rows, week_updated
+    for day in days:
+        day_classes = []
         
-        except (ValueError, IndexError):
-            continue
+        for slot in day.slots:
+            # Skip empty classes (don't show anything if course is blank)
+            if slot.is_empty:
+                continue
+            
+            class_text = f"{slot.label}: {slot.course}"
+            if slot.teacher:
+                class_text += f" ({slot.teacher})"
+            if slot.room:
+                class_text += f" -> Salle {slot.room}"
+            
+            day_classes.append(class_text)
+        
+        # Only add this day if it has at least one class
+        if day_classes:
+            classes_text = '\n'.join(day_classes)
+            formatted_parts.append(f"**{day.title}**\n```{classes_text}```")
     
-    return [], week_updated
+    return '\n'.join(formatted_parts) if formatted_parts else "❌ Aucun emploi du temps disponible pour cette semaine."
+
 
+SLOT_FIELDS = (
+    ('course', "cours"),
+    ('teacher', "intervenant"),
+    ('room', "salle"),
+)
 
-def format_schedule(schedule_data: List[List[str]], classes_per_day: int = 2) -> str:
+
+def build_snapshot(week: Week, days: Sequence[Day]) -> Dict[str, Any]:
     """
-    Format schedule data into a nice Discord message.
+    Build a JSON-serialisable snapshot of the displayed week.
     
     Args:
-        schedule_data: Filtered schedule data for the week
-        classes_per_day: Number of time slots per day (2 for M1, 3 for M2)
+        week: Displayed week
+        days: Days of the week restricted to the configured range
     
     Returns:
-        Formatted string for Discord message
+        Dict with the week key and, for each day, its slots (label, course, teacher, room)
+    """
+    return {
+        'week': week.start.isoformat(),
+        'days': [
+            {'name': day.title, 'slots': [asdict(slot) for slot in day.slots]}
+            for day in days
+        ],
+    }
+
+
+def diff_snapshots(previous: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
     """
-    # Minimum rows: 1 (dates) + classes_per_day * 3 (course, teacher, room for each class)
-    min_rows = 1 + (classes_per_day * 3)
+    Compute cell-level changes between two snapshots of the same week.
     
-    if not schedule_data or len(schedule_data) < min_rows:
-        return "❌ Aucun emploi du temps disponible pour cette semaine."
+    Args:
+        previous: Snapshot stored at the last update
+        current: Freshly built snapshot
     
-    formatted_parts = []
+    Returns:
+        List of human-readable changes (one per modified slot field)
+    """
+    changes = []
+    previous_days = {day['name']: day for day in previous.get('days', [])}
     
-    # Process each day (columns 1+)
-    for j in range(1, len(schedule_data[0])):
-        try:
-            day_name = schedule_data[0][j]
-            day_classes = []
-            
-            # Process each class time slot
-            for class_idx in range(classes_per_day):
-                # Calculate row indices for this class (each class has 3 rows: course, teacher, room)
-                course_row = 1 + (class_idx * 3)
-                teacher_row = course_row + 1
-                room_row = course_row + 2
-                
-                # Get class info
-                course = schedule_data[course_row][j] if len(schedule_data[course_row]) > j else ""
-                teacher = schedule_data[teacher_row][j] if len(schedule_data[teacher_row]) > j else ""
-                room = schedule_data[room_row][j] if len(schedule_data[room_row]) > j else ""
-                
-                # Skip empty classes (don't show anything if course is blank)
-                if not course or not course.strip():
-                    continue
-                
-                # Get label from first column (e.g., "Matin", "Après-midi", "Soir")
-                label = schedule_data[course_row][0] if len(schedule_data[course_row]) > 0 else f"Cours {class_idx + 1}"
-                
-                # Format class text (only if course exists)
-                class_text = f"{label}: {course}"
-                if teacher:
-                    class_text += f" ({teacher})"
-                if room:
-                    class_text += f" -> Salle {room}"
-                
-                day_classes.append(class_text)
-            
-            # Only add this day if it has at least one class
-            if day_classes:
-                # Combine all classes for this day
-                classes_text = '\n'.join(day_classes)
-                formatted_parts.append(f"**{day_name}**\n```{classes_text}```")
-        
-        except IndexError:
+    for day in current.get('days', []):
+        old_day = previous_days.get(day['name'])
+        if old_day is None:
             continue
-    
-    return '\n'.join(formatted_parts) if formatted_parts else "❌ Aucun emploi du temps disponible pour cette semaine."
+        
+        for idx, slot in enumerate(day['slots']):
+            old = old_day['slots'][idx] if idx < len(old_day['slots']) else {}
+            prefix = f"**{day['name']}** – {slot['label']}"
+            
+            if not old.get('course') and slot['course']:
+                changes.append(f"➕ {prefix} : {slot['course']} ajouté")
+            elif old.get('course') and not slot['course']:
+                changes.append(f"❌ {prefix} : {old['course']} annulé")
+            else:
+                for key, label in SLOT_FIELDS:
+                    if old.get(key, "") != slot[key]:
+                        changes.append(f"✏️ {prefix} : {label} `{old.get(key) or '-'}` → `{slot[key] or '-'}`")
+    
+    return changes
 
 
-def detect_changes(current_data: List[List[str]], previous_hash: Optional[str]) -> Tuple[List[str], str]:
+def detect_changes(current: Dict[str, Any], previous: Optional[Dict[str, Any]], previous_hash: Optional[str]) -> Tuple[List[str], str]:
     """
     Detect changes in the schedule.
     
     Args:
-        current_data: Current schedule data
+        current: Snapshot of the current schedule week
+        previous: Snapshot stored at the last update (if any)
         previous_hash: Hash of the previous schedule
     
     Returns:
-        Tuple of (list of changes, current hash)
+        Tuple of (list of cell-level changes, current hash)
     """
-    # Create hash of current data
-    current_str = str(current_data)
-    current_hash = hashlib.md5(current_str.encode()).hexdigest()
+    current_hash = hashlib.md5(json.dumps(current, sort_keys=True).encode()).hexdigest()
     
-    # If no previous hash or hashes match, no changes
-    if not previous_hash or current_hash == previous_hash:
+    # If no previous state, hashes match or the displayed week moved on, nothing to report
+    if not previous_hash or current_hash == previous_hash or not previous:
+        return [], current_hash
+    if previous.get('week') != current.get('week'):
         return [], current_hash
     
-    # If hashes differ, there are changes (we'll return a generic message)
-    changes = ["📋 L'emploi du temps a été mis à jour"]
-    
-    return changes, current_hash
+    return diff_snapshots(previous, current), current_hash
 
 
-async def update_schedule_for_channel(bot: commands.Bot, session, config: ScheduleChannelConfig):
+async def update_schedule_for_channel(bot: commands.Bot, session, config: ScheduleChannelConfig, bypass_cache: bool = False):
     """
     Update the schedule for a specific channel.
+    The message is only edited when the parsed week actually changed.
     
     Args:
         bot: Discord bot instance
         session: Database session
         config: Schedule channel configuration
+        bypass_cache: Download the sheet even if a fresh copy is cached
     """
     try:
         # Get the channel
@@ -243,56 +189,68 @@ async def update_schedule_for_channel(bot: commands.Bot, session, config: Schedu
             print(f"Channel {config.channel_id} not found for {config.grade_level}")
             return
         
-        # Fetch schedule data
-        schedule_data = await get_schedule_data(config.spreadsheet_url, config.gid)
-        
-        # Get config parameters (with defaults)
-        classes_per_day = getattr(config, 'classes_per_day', 2)
-        start_day_index = getattr(config, 'start_day_index', 0)
-        end_day_index = getattr(config, 'end_day_index', 1)
-        
-        # Filter for current week with day range
-        filtered_data, week_updated = filter_schedule_for_week(schedule_data, classes_per_day, start_day_index, end_day_index)
+        # Fetch and parse the sheet into the week index
+        index = await schedule_source.get_index(
+            config.spreadsheet_url,
+            config.gid,
+            getattr(config, 'classes_per_day', 2),
+            get_layout(config),
+            bypass_cache
+        )
         
-        if not filtered_data:
+        week, _ = index.displayed_week()
+        if not week:
             print(f"No schedule data found for {config.grade_level}")
             return
         
-        # Detect changes
-        changes, current_hash = detect_changes(filtered_data, config.last_schedule_hash)
+        days = week.days_between(getattr(config, 'start_day_index', 0), getattr(config, 'end_day_index', 1))
+        
+        # Compare against the stored snapshot
+        snapshot = build_snapshot(week, days)
+        stored = await session.get(ScheduleSnapshot, config.channel_id)
+        previous = json.loads(stored.data) if stored else None
+        changes, current_hash = detect_changes(snapshot, previous, config.last_schedule_hash)
+        
+        # Nothing changed since the last update: skip all Discord calls
+        if config.message_id and current_hash == config.last_schedule_hash:
+            return
         
         # Format the schedule
-        schedule_message = format_schedule(filtered_data, classes_per_day)
+        schedule_message = format_schedule(days)
         
-        # Create or update the message
+        # Create or update the message (edited in place, recreated if deleted)
         message_updated = False
-        
-        if config.message_id:
-            try:
-                message = await channel.fetch_message(config.message_id)
-                await message.edit(content=schedule_message)
-                message_updated = True
-            except discord.NotFound:
-                # Message was deleted, create new one
-                message = await channel.send(schedule_message)
-                config.message_id = message.id
-                message_updated = True
-            except Exception as e:
-                print(f"Error editing message for {config.grade_level}: {e}")
-        else:
-            # No message ID stored, create new message
-            message = await channel.send(schedule_message)
-            config.message_id = message.id
+        try:
+            config.message_id = await message_registry.publish(
+                channel,
+                f"schedule:{config.channel_id}",
+                content=schedule_message,
+                message_id=config.message_id,
+                force=not config.last_schedule_hash
+            )
             message_updated = True
+        except Exception as e:
+            print(f"Error editing message for {config.grade_level}: {e}")
         
-        # Send notification for changes (but not on week updates)
-        if changes and not week_updated and config.last_schedule_hash is not None:
+        # Send cell-level changes (only within the same week)
+        if changes:
             notification = "📋 **Modifications de l'emploi du temps** :\n" + "\n".join(changes)
+            if len(notification) > 1900:
+                notification = notification[:1897] + "..."
             await channel.send(notification + "\n||@everyone||", delete_after=3600)
         
-        # Update the hash in database
+        # Persist the hash and snapshot
         if message_updated:
             config.last_schedule_hash = current_hash
+            if stored:
+                stored.week_key = snapshot['week']
+                stored.data = json.dumps(snapshot)
+            else:
+                session.add(ScheduleSnapshot(
+                    channel_id=config.channel_id,
+                    week_key=snapshot['week'],
+                    data=json.dumps(snapshot)
+                ))
             await session.commit()
     
     except Exception as e:
@@ -310,9 +268,10 @@ class Schedule(commands.Cog):
         """Initialize database when cog loads."""
         await init_db()
     
-    def cog_unload(self):
-        """Stop the update task when cog unloads."""
+    async def cog_unload(self):
+        """Stop the update task and close the sheet session when cog unloads."""
         self.update_all_schedules.cancel()
+        await schedule_source.close()
     
     @app_commands.command(
         name="schedule",
@@ -332,6 +291,7 @@ class Schedule(commands.Cog):
             value="• **Setup New Channel** - Configure this channel for schedule display\n"
                   "• **Edit Configuration** - Update spreadsheet URL or GID\n"
                   "• **Force Refresh** - Manually update the schedule\n"
+                  "• **Reload Sheet** - Download the spreadsheet again, bypassing the cache\n"
                   "• **View Configuration** - See current settings\n"
                   "• **Delete Configuration** - Remove schedule from this channel",
             inline=False
@@ -342,13 +302,26 @@ class Schedule(commands.Cog):
     
     @tasks.loop(minutes=15)
     async def update_all_schedules(self):
-        """Update all configured schedule channels."""
+        """Update all configured schedule channels concurrently."""
         async with AsyncSessionLocal() as session:
-            # Get all schedule configurations
-            result = await session.execute(select(ScheduleChannelConfig))
-            configs = result.scalars().all()
-            
-            for config in configs:
+            result = await session.execute(select(ScheduleChannelConfig.channel_id))
+            channel_ids = result.scalars().all()
+        
+        # Each channel gets its own session so a failure cannot affect the others;
+        # channels sharing a sheet are served by a single download from the schedule source
+        results = await asyncio.gather(
+            *(self.update_channel(channel_id) for channel_id in channel_ids),
+            return_exceptions=True
+        )
+        for channel_id, outcome in zip(channel_ids, results):
+            if isinstance(outcome, Exception):
+                print(f"Error updating schedule channel {channel_id}: {outcome}")
+    
+    async def update_channel(self, channel_id: int):
+        """Update a single schedule channel in its own database session."""
+        async with AsyncSessionLocal() as session:
+            config = await session.get(ScheduleChannelConfig, channel_id)
+            if config:
                 await update_schedule_for_channel(self.bot, session, config)
     
     @update_all_schedules.before_loop
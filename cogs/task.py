@@ -1,13 +1,52 @@
 import os
 from discord.ext import commands, tasks
 from discord import app_commands, Interaction, Embed, Color, TextChannel
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, insert, and_
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Set
+import logging
 
 from db import AsyncSessionLocal, init_db
-from db.models import GradeChannelConfig, Course, Assignment
+from db.models import (
+    GradeChannelConfig, Course, Assignment, ArchivedAssignment, AssignmentStatus,
+    AuthenticatedUser, ReminderPreference, UserAssignmentProgress, UserType
+)
 from utils import ROLE_NOTABLE, ROLE_MANAGER, ROLE_M1, ROLE_M2, ROLE_FI, ROLE_FA
+from utils.assignment_snapshot import assignment_snapshots
+from utils.completion_stats import completion_stats
+from utils.dm_queue import dm_queue
+from utils.message_registry import message_registry
+from utils.progress_writer import progress_writer
+
+logger = logging.getLogger(__name__)
+
+PAST_DUE_GRACE = timedelta(hours=3)  # Overdue assignments stay on the board this long
+ARCHIVE_AFTER = timedelta(days=int(os.getenv('ASSIGNMENT_ARCHIVE_DAYS', '30')))  # Retention of past-due assignments
+
+
+def get_formation_for_channel(channel: TextChannel) -> Optional[str]:
+    """
+    Get the only formation (FI or FA) allowed to see a channel.
+    A formation is excluded when its role is explicitly DENIED view_channel permission.
+    
+    Args:
+        channel: The Discord channel
+    
+    Returns:
+        'FI' or 'FA' if only one formation can access the channel, None otherwise
+    """
+    def is_denied(role_id: int) -> bool:
+        role = channel.guild.get_role(role_id)
+        return bool(role) and channel.overwrites_for(role).view_channel is False
+    
+    fi_denied = is_denied(ROLE_FI.id)
+    fa_denied = is_denied(ROLE_FA.id)
+    
+    if fa_denied and not fi_denied:
+        return 'FI'
+    if fi_denied and not fa_denied:
+        return 'FA'
+    return None
 
 
 def get_role_mentions_for_channel(channel: TextChannel, grade_level: str) -> str:
@@ -29,37 +68,58 @@ def get_role_mentions_for_channel(channel: TextChannel, grade_level: str) -> str
     }
     grade_role_id = grade_role_map.get(grade_level.upper())
     
-    # Check if FI role is explicitly DENIED view_channel permission
-    fi_role = channel.guild.get_role(ROLE_FI.id)
-    fi_denied = False
-    if fi_role:
-        fi_overwrite = channel.overwrites_for(fi_role)
-        if fi_overwrite.view_channel is False:
-            fi_denied = True
-    
-    # Check if FA role is explicitly DENIED view_channel permission
-    fa_role = channel.guild.get_role(ROLE_FA.id)
-    fa_denied = False
-    if fa_role:
-        fa_overwrite = channel.overwrites_for(fa_role)
-        if fa_overwrite.view_channel is False:
-            fa_denied = True
-    
     # Logic:
     # - If FA is denied → mention only @FI
     # - If FI is denied → mention only @FA
     # - If both can access → mention only @M1
-    if fa_denied and not fi_denied:
-        # Only FI can access
+    formation = get_formation_for_channel(channel)
+    if formation == 'FI':
         return f"<@&{ROLE_FI.id}>"
-    elif fi_denied and not fa_denied:
-        # Only FA can access
+    elif formation == 'FA':
         return f"<@&{ROLE_FA.id}>"
     else:
         # Both can access (or both denied which is impossible) → mention grade level
         return f"<@&{grade_role_id}>" if grade_role_id else "||@everyone||"
 
 
+async def get_dm_recipients(session, assignment_id: int, grade_level: str, formation: Optional[str] = None) -> List[int]:
+    """
+    Get the students opted in to DM reminders who have not completed an assignment.
+    Single anti-join against user_assignment_progress.
+    
+    Args:
+        session: Database session
+        assignment_id: The assignment ID
+        grade_level: Grade level of the assignment
+        formation: Restrict to a formation (FI/FA) when the course is not visible to both
+    
+    Returns:
+        List of Discord user IDs
+    """
+    query = (
+        select(AuthenticatedUser.user_id)
+        .join(ReminderPreference, ReminderPreference.user_id == AuthenticatedUser.user_id)
+        .outerjoin(
+            UserAssignmentProgress,
+            and_(
+                UserAssignmentProgress.user_id == AuthenticatedUser.user_id,
+                UserAssignmentProgress.assignment_id == assignment_id
+            )
+        )
+        .where(
+            ReminderPreference.dm_enabled.is_(True),
+            AuthenticatedUser.user_type == UserType.STUDENT,
+            AuthenticatedUser.grade_level == grade_level,
+            UserAssignmentProgress.id.is_(None)
+        )
+    )
+    if formation:
+        query = query.where(AuthenticatedUser.formation_type == formation)
+    
+    result = await session.execute(query)
+    return list(result.scalars().all())
+
+
 def strip_emojis(text: str) -> str:
     """Remove emojis from text, keeping only letters, numbers, spaces, and dashes."""
     import re
@@ -78,11 +138,11 @@ async def update_task_message(bot: commands.Bot, session, config: GradeChannelCo
     if not channel:
         return
     
-    # Fetch all courses for this channel with their assignments
-    result = await session.execute(
-        select(Course).where(Course.channel_id == config.channel_id)
-    )
-    courses = result.scalars().all()
+    # Courses and active assignments come from the shared grade snapshot
+    snapshot = await assignment_snapshots.get(config.grade_level)
+    courses = snapshot.courses
+    assignments_by_course = snapshot.by_course()
+    completion = await completion_stats.get(snapshot)
     
     # Create embeds for each course
     embeds = []
@@ -105,19 +165,13 @@ async def update_task_message(bot: commands.Bot, session, config: GradeChannelCo
         courses_with_assignments = []
         
         for course in courses:
-            # Get active assignments sorted by due date
-            active_assignments = [
-                a for a in course.assignments 
-                if a.status == 'active'
-            ]
+            # Active assignments, already sorted by due date (earliest first)
+            active_assignments = assignments_by_course.get(course.id, [])
             
             # Skip courses with no active assignments
             if not active_assignments:
                 continue
             
-            # Sort assignments by due date (earliest first for processing)
-            active_assignments.sort(key=lambda a: a.due_date)
-            
             # Get earliest assignment for color determination and sorting
             earliest_assignment = active_assignments[0]
             
@@ -178,6 +232,10 @@ async def update_task_message(bot: commands.Bot, session, config: GradeChannelCo
                 if assignment.modality:
                     field_value += f"\n\u200b\n📝 Modality: {assignment.modality}"
                 
+                done_rate = completion.rate(assignment.id)
+                if completion.students:
+                    field_value += f"\n✅ Done: {completion.count(assignment.id)}/{completion.students} ({done_rate:.0f}%)"
+                
                 # Check if overdue
                 time_until_due = assignment.due_date - now
                 if time_until_due < timedelta(0):
@@ -208,9 +266,14 @@ async def update_task_message(bot: commands.Bot, session, config: GradeChannelCo
                 # Keep description short in hash to avoid excessive size but still detect changes
                 desc_part = (assignment.description or "")[:100]
                 content_parts.append(
-                    f"{course.name}:{assignment.id}:{assignment.title}:{assignment.status}:{due_ts}:{urgency_bucket}:{modality_part}:{desc_part}"
+                    f"{course.name}:{assignment.id}:{assignment.title}:active:{due_ts}:{urgency_bucket}:{modality_part}:{desc_part}"
+                    f":{completion.count(assignment.id)}/{completion.students}"
                 )
             
+            if completion.students:
+                course_rate = completion.course_rate(a.id for a in active_assignments)
+                course_embed.set_footer(text=f"Course completion: {course_rate:.0f}% of {completion.students} students")
+            
             embeds.append(course_embed)
     
     # Only add footer if there are course embeds
@@ -247,19 +310,14 @@ async def update_task_message(bot: commands.Bot, session, config: GradeChannelCo
         
         # Update or create message (no view/buttons - display only)
         try:
-            if config.message_id:
-                try:
-                    message = await channel.fetch_message(config.message_id)
-                    await message.edit(embeds=embeds)
-                except:
-                    # Message was deleted, create new one
-                    message = await channel.send(embeds=embeds)
-                    config.message_id = message.id
-                    await session.commit()
-            else:
-                message = await channel.send(embeds=embeds)
-                config.message_id = message.id
-                await session.commit()
+            config.message_id = await message_registry.publish(
+                channel,
+                f"tasks:{config.channel_id}",
+                embeds=embeds,
+                content_hash=content_hash,
+                message_id=config.message_id,
+                force=not config.content_hash
+            )
             
             # Store the new content hash
             config.content_hash = content_hash
@@ -270,20 +328,111 @@ async def update_task_message(bot: commands.Bot, session, config: GradeChannelCo
     # If content hasn't changed, don't update the message at all
 
 
+async def mark_past_due(session, now: datetime) -> Set[int]:
+    """
+    Flip active assignments overdue by more than the grace period to past due.
+    Single UPDATE ... RETURNING on the (status, due_date) index: the cost follows the changed rows.
+    
+    Args:
+        session: Database session (the caller commits)
+        now: Current time
+    
+    Returns:
+        Set of task to-do channel IDs whose assignments changed
+    """
+    result = await session.execute(
+        update(Assignment)
+        .where(
+            Assignment.status == AssignmentStatus.ACTIVE,
+            Assignment.due_date < now - PAST_DUE_GRACE
+        )
+        .values(status=AssignmentStatus.PAST_DUE)
+        .returning(Assignment.course_id)
+        .execution_options(synchronize_session=False)
+    )
+    course_ids = set(result.scalars().all())
+    if not course_ids:
+        return set()
+    
+    result = await session.execute(
+        select(Course.channel_id).where(Course.id.in_(course_ids)).distinct()
+    )
+    return set(result.scalars().all())
+
+
+async def archive_past_due(session, before: datetime) -> int:
+    """
+    Copy past-due assignments due before a date to the archive table and delete them.
+    Their My Tasks progress rows are removed by the ON DELETE CASCADE.
+    
+    Args:
+        session: Database session (the caller commits)
+        before: Assignments due before this date are archived
+    
+    Returns:
+        Number of archived assignments
+    """
+    expired = and_(
+        Assignment.status == AssignmentStatus.PAST_DUE,
+        Assignment.due_date < before
+    )
+    await session.execute(
+        insert(ArchivedAssignment).from_select(
+            [
+                'assignment_id', 'title', 'description', 'due_date', 'modality', 'status',
+                'course_id', 'course_name', 'channel_id', 'created_at'
+            ],
+            select(
+                Assignment.id, Assignment.title, Assignment.description, Assignment.due_date,
+                Assignment.modality, Assignment.status, Assignment.course_id, Course.name,
+                Course.channel_id, Assignment.created_at
+            )
+            .join(Course, Course.id == Assignment.course_id)
+            .where(expired)
+        )
+    )
+    result = await session.execute(
+        delete(Assignment).where(expired).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def build_reminder_dm(assignment, label: str) -> str:
+    """Build the personal reminder DM for an assignment."""
+    titles = {
+        "NOW - DUE!": "🔴 **Assignment Due NOW!**",
+        "10 minutes": "⏰ **Assignment Due in 10 Minutes!**",
+        "1 hour": "⏰ **Assignment Due in 1 Hour!**",
+        "1 day": "📅 **Assignment Due Tomorrow!**",
+        "1 week": "📆 **Assignment Due in 1 Week!**",
+    }
+    content = f"{titles.get(label, '📝 **Assignment Reminder**')}\n\n"
+    content += f"📝 **{assignment.title}** for {assignment.course.name}\n"
+    content += f"📅 Due: <t:{int(assignment.due_date.timestamp())}:F> (<t:{int(assignment.due_date.timestamp())}:R>)\n"
+    if assignment.modality:
+        content += f"📝 Modality: {assignment.modality}\n"
+    content += "\n-# Mark it as complete in My Tasks to stop these reminders, or turn DM reminders off there."
+    return content
+
+
 class Task(commands.Cog):
     """Cog for managing task to-do lists."""
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.check_reminders.start()
+        self.archive_assignments.start()
     
     async def cog_load(self):
-        """Initialize database when cog loads."""
+        """Initialize database and start the DM queue when cog loads."""
         await init_db()
+        dm_queue.start(self.bot)
     
-    def cog_unload(self):
-        """Stop the reminder task when cog unloads."""
+    async def cog_unload(self):
+        """Stop the background tasks and the DM queue when cog unloads."""
         self.check_reminders.cancel()
+        self.archive_assignments.cancel()
+        await dm_queue.stop()
     
     @app_commands.command(
         name="task",
@@ -305,6 +454,7 @@ class Task(commands.Cog):
             name="Available Actions",
             value="• Setup this channel for task tracking\n"
                   "• Add/edit/delete assignments\n"
+                  "• Bulk import assignments (CSV/ICS)\n"
                   "• Add/edit/delete courses\n"
                   "• Refresh to-do list\n"
                   "• View statistics\n"
@@ -319,62 +469,53 @@ class Task(commands.Cog):
     async def check_reminders(self):
         """Check for assignments that need reminders."""
         async with AsyncSessionLocal() as session:
-            # Get all active assignments
-            result = await session.execute(
-                select(Assignment).where(Assignment.status == 'active')
-            )
-            assignments = result.scalars().all()
+            result = await session.execute(select(GradeChannelConfig))
+            configs = result.scalars().all()
             
             now = datetime.now()
+            dm_reminders = []  # (assignment, label, grade level, formation)
             
-            for assignment in assignments:
-                time_until_due = assignment.due_date - now
-                
-                # Check if overdue by more than 3 hours - delete from display
-                if time_until_due < timedelta(hours=-3):
-                    assignment.status = 'past_due'
-                    continue
-                
-                # Check reminder thresholds
-                # Remind at: 1 week, 1 day, 1 hour, 10 minutes before, and AT DUE TIME
-                # Windows are wide enough to catch the reminder (task runs every minute)
-                
-                reminder_windows = [
-                    (timedelta(days=7, seconds=-30), timedelta(days=7, seconds=30), "1 week"),
-                    (timedelta(days=1, seconds=-30), timedelta(days=1, seconds=30), "1 day"),
-                    (timedelta(hours=1, seconds=-30), timedelta(hours=1, seconds=30), "1 hour"),
-                    (timedelta(minutes=10, seconds=-30), timedelta(minutes=10, seconds=30), "10 minutes"),
-                    (timedelta(seconds=-30), timedelta(seconds=30), "NOW - DUE!"),
-                ]
+            for config in configs:
+                # Active assignments of the grade come from the shared snapshot
+                snapshot = await assignment_snapshots.get(config.grade_level)
+                grade_level = str(config.grade_level.value) if hasattr(config.grade_level, 'value') else str(config.grade_level)
                 
-                for threshold_min, threshold_max, label in reminder_windows:
-                    if threshold_min <= time_until_due <= threshold_max:
-                        # Send reminder
-                        result = await session.execute(
-                            select(Course).where(Course.id == assignment.course_id)
-                        )
-                        course = result.scalar_one_or_none()
-                        
-                        if course:
+                for assignment in snapshot.assignments:
+                    time_until_due = assignment.due_date - now
+                    
+                    # Overdue by more than 3 hours: flipped to past due below
+                    if time_until_due < -PAST_DUE_GRACE:
+                        continue
+                    
+                    # Check reminder thresholds
+                    # Remind at: 1 week, 1 day, 1 hour, 10 minutes before, and AT DUE TIME
+                    # Windows are wide enough to catch the reminder (task runs every minute)
+                    
+                    reminder_windows = [
+                        (timedelta(days=7, seconds=-30), timedelta(days=7, seconds=30), "1 week"),
+                        (timedelta(days=1, seconds=-30), timedelta(days=1, seconds=30), "1 day"),
+                        (timedelta(hours=1, seconds=-30), timedelta(hours=1, seconds=30), "1 hour"),
+                        (timedelta(minutes=10, seconds=-30), timedelta(minutes=10, seconds=30), "10 minutes"),
+                        (timedelta(seconds=-30), timedelta(seconds=30), "NOW - DUE!"),
+                    ]
+                    
+                    for threshold_min, threshold_max, label in reminder_windows:
+                        if threshold_min <= time_until_due <= threshold_max:
+                            course = assignment.course
+                            
+                            formation = None  # Formation restriction for the DM reminders
+                            
                             # Send reminder to the task to-do channel
-                            channel = self.bot.get_channel(course.channel_id)
+                            channel = self.bot.get_channel(config.channel_id)
                             if channel:
-                                # Get the grade level from the course's grade channel config
-                                result_grade = await session.execute(
-                                    select(GradeChannelConfig).where(
-                                        GradeChannelConfig.channel_id == course.channel_id
-                                    )
-                                )
-                                grade_config = result_grade.scalar_one_or_none()
-                                grade_level = str(grade_config.grade_level.value) if grade_config else "M1"
-                                
                                 # Get appropriate role mentions based on course channel permissions
                                 # Use course_channel_id if set, otherwise fall back to task channel
-                                permission_channel_id = course.course_channel_id if course.course_channel_id else course.channel_id
+                                permission_channel_id = course.course_channel_id if course.course_channel_id else config.channel_id
                                 permission_channel = self.bot.get_channel(permission_channel_id)
                                 
                                 if permission_channel:
                                     role_mentions = get_role_mentions_for_channel(permission_channel, grade_level)
+                                    formation = get_formation_for_channel(permission_channel)
                                 else:
                                     # Fall back to mentioning the grade role only
                                     grade_role_map = {'M1': ROLE_M1.id, 'M2': ROLE_M2.id}
@@ -412,17 +553,29 @@ class Task(commands.Cog):
                                 # Send plain text message (better for smartphone notifications)
                                 # Delete message after 10 minutes
                                 await channel.send(message_content, delete_after=600)
-                        
-                        # Break after sending reminder to avoid multiple notifications
-                        break
+                            
+                            dm_reminders.append((assignment, label, grade_level, formation))
+                            
+                            # Break after sending reminder to avoid multiple notifications
+                            break
             
-            # Commit status changes
-            await session.commit()
+            # Personal reminders for opted-in students who have not completed the assignment
+            if dm_reminders:
+                await progress_writer.flush()  # Take the latest My Tasks toggles into account
+                for assignment, label, grade_level, formation in dm_reminders:
+                    recipients = await get_dm_recipients(session, assignment.id, grade_level, formation)
+                    content = build_reminder_dm(assignment, label)
+                    for user_id in recipients:
+                        dm_queue.enqueue(user_id, content)
             
-            # Update all task messages
-            result = await session.execute(select(GradeChannelConfig))
-            configs = result.scalars().all()
+            # Flip overdue assignments in one statement and drop the snapshots of the affected grades
+            changed_channels = await mark_past_due(session, now)
+            if changed_channels:
+                await session.commit()
+                for channel_id in changed_channels:
+                    assignment_snapshots.invalidate(channel_id)
             
+            # Update all task messages
             for config in configs:
                 await update_task_message(self.bot, session, config)
     
@@ -430,6 +583,21 @@ class Task(commands.Cog):
     async def before_check_reminders(self):
         """Wait until the bot is ready before starting the reminder task."""
         await self.bot.wait_until_ready()
+    
+    @tasks.loop(hours=1)
+    async def archive_assignments(self):
+        """Move past-due assignments older than the retention period to the archive table."""
+        async with AsyncSessionLocal() as session:
+            archived = await archive_past_due(session, datetime.now() - ARCHIVE_AFTER)
+            await session.commit()
+        
+        if archived:
+            logger.info(f"Archived {archived} past-due assignments")
+    
+    @archive_assignments.before_loop
+    async def before_archive_assignments(self):
+        """Wait until the bot is ready before starting the archive task."""
+        await self.bot.wait_until_ready()
 
 
 async def setup(bot: commands.Bot):
@@ -1,7 +1,7 @@
 """
 Database initialization with improved configuration and error handling.
 """
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool, QueuePool
@@ -10,6 +10,7 @@ import logging
 from typing import AsyncGenerator
 
 from .models import Base
+from .events import register_table_events
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -50,6 +51,9 @@ engine = create_async_engine(
 if 'sqlite' in DATABASE_URL:
     event.listen(engine.sync_engine, "connect", configure_sqlite_connection)
 
+# Commit notifications for the caches built from the database (db.events.on_tables_committed)
+register_table_events()
+
 # Create async session maker
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -59,6 +63,42 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+def add_missing_columns(sync_conn) -> None:
+    """
+    Add nullable columns declared on models but missing from existing tables.
+    create_all only creates missing tables, so new optional columns need this step.
+    """
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            logger.info(f"Added column {table.name}.{column.name}")
+
+
+def create_missing_indexes(sync_conn) -> None:
+    """
+    Create indexes declared on models but missing from existing tables.
+    create_all only creates the indexes of the tables it creates.
+    """
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name and index.name not in existing:
+                index.create(sync_conn)
+                logger.info(f"Created index {index.name} on {table.name}")
+
+
 async def init_db() -> None:
     """
     Initialize the database by creating all tables.
@@ -72,6 +112,8 @@ async def init_db() -> None:
             # Create all tables and indexes
             # checkfirst=True is default, but we catch OperationalError for existing indexes
             await conn.run_sync(Base.metadata.create_all, checkfirst=True)
+            await conn.run_sync(add_missing_columns)
+            await conn.run_sync(create_missing_indexes)
             logger.info("Database initialized successfully")
     except Exception as e:
         # If the error is about indexes already existing, that's fine - database is already set up
@@ -36,3 +36,24 @@ class FormationType(str, Enum):
     FI = "FI"
     FA = "FA"
 
+
+class EmailStatus(str, Enum):
+    """Delivery status of an outbox email."""
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class RoleJobStatus(str, Enum):
+    """Status of a bulk role job."""
+    RUNNING = "running"
+    COMPLETED = "completed"
+
+
+class RoleTargetStatus(str, Enum):
+    """Status of a member in a bulk role job."""
+    PENDING = "pending"
+    DONE = "done"
+    SKIPPED = "skipped"  # Member gone or nothing to change
+    FAILED = "failed"
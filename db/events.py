@@ -0,0 +1,61 @@
+"""
+Commit notifications per table.
+Tables touched by flushes and bulk statements are collected per session; once the transaction
+commits, the registered callbacks receive their names (cache invalidation, index rebuilds...).
+"""
+from itertools import chain
+from typing import Callable, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+TablesCallback = Callable[[set], None]
+
+_commit_listeners: List[TablesCallback] = []
+
+
+def on_tables_committed(callback: TablesCallback) -> TablesCallback:
+    """Register a callback receiving the names of the tables written by each commit."""
+    _commit_listeners.append(callback)
+    return callback
+
+
+def _touched(session: Session) -> set:
+    return session.info.setdefault('touched_tables', set())
+
+
+def _track_flush(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, '__table__', None)
+        if table is not None:
+            _touched(session).add(table.name)
+
+
+def _track_bulk(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            _touched(orm_execute_state.session).add(table.name)
+
+
+def _notify_on_commit(session):
+    tables = session.info.pop('touched_tables', None)
+    if tables:
+        for callback in _commit_listeners:
+            callback(tables)
+
+
+def _forget_on_rollback(session):
+    session.info.pop('touched_tables', None)
+
+
+def register_table_events() -> None:
+    """Track the written tables of every session (idempotent)."""
+    for name, listener in (
+        ('after_flush', _track_flush),
+        ('do_orm_execute', _track_bulk),
+        ('after_commit', _notify_on_commit),
+        ('after_rollback', _forget_on_rollback),
+    ):
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
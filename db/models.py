@@ -3,14 +3,17 @@ Database models with improved normalization, type safety, and best practices.
 """
 from sqlalchemy import (
     Column, Integer, String, Text, ForeignKey, BigInteger,
-    DateTime, Boolean, Index, UniqueConstraint, Enum as SQLEnum
+    DateTime, Boolean, Float, Index, UniqueConstraint, LargeBinary, Enum as SQLEnum
 )
 from sqlalchemy.orm import relationship, declarative_base, Mapped
 from sqlalchemy.sql import func
 from datetime import datetime
 from typing import List, Optional
 
-from .constants import UserType, AssignmentStatus, SuggestionStatus, GradeLevel, FormationType
+from .constants import (
+    UserType, AssignmentStatus, SuggestionStatus, GradeLevel, FormationType, EmailStatus,
+    RoleJobStatus, RoleTargetStatus
+)
 
 Base = declarative_base()
 
@@ -162,6 +165,10 @@ class Assignment(Base, TimestampMixin):
         Index('ix_assignments_course_status', 'course_id', 'status'),
         Index('ix_assignments_due_date', 'due_date'),
         Index('ix_assignments_status', 'status'),
+        Index('ix_assignments_status_due_date', 'status', 'due_date'),  # Overdue/archive transitions
+        # Never reuse the ID of a deleted (archived) assignment: it is the ICS event UID.
+        # Only applies to newly created databases (SQLite cannot alter an existing table).
+        {'sqlite_autoincrement': True},
     )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -189,6 +196,32 @@ class Assignment(Base, TimestampMixin):
         return datetime.now() > self.due_date
 
 
+class ArchivedAssignment(Base):
+    """Past-due assignment moved out of the assignments table after the retention period."""
+    __tablename__ = 'archived_assignments'
+    __table_args__ = (
+        Index('ix_archived_assignments_channel_due', 'channel_id', 'due_date'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # ID of the original assignment: not unique, SQLite may reuse the ID of a deleted row
+    assignment_id = Column(Integer, nullable=False, index=True)
+    title = Column(String(300), nullable=False)
+    description = Column(Text, nullable=True)
+    due_date = Column(DateTime(timezone=True), nullable=False)
+    modality = Column(String(100), nullable=True)
+    status = Column(SQLEnum(AssignmentStatus), nullable=False)
+    # Plain columns (no foreign keys): the course may be deleted after archiving
+    course_id = Column(Integer, nullable=False)
+    course_name = Column(String(200), nullable=False)
+    channel_id = Column(BigInteger, nullable=False)  # Tasks to-do channel
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<ArchivedAssignment(id={self.id}, assignment_id={self.assignment_id}, title='{self.title}')>"
+
+
 # ============================================================================
 # Schedule System Models
 # ============================================================================
@@ -212,11 +245,40 @@ class ScheduleChannelConfig(Base, TimestampMixin):
     classes_per_day = Column(Integer, default=2, nullable=False)  # Number of time slots per day (2 for M1, 3 for M2)
     start_day_index = Column(Integer, default=0, nullable=False)  # 0=Monday, 1=Tuesday, etc.
     end_day_index = Column(Integer, default=1, nullable=False)  # Inclusive end day
+    sheet_layout = Column(Text, nullable=True)  # JSON SheetLayout descriptor (None = default layout)
     
     def __repr__(self) -> str:
         return f"<ScheduleChannelConfig(channel_id={self.channel_id}, grade_level='{self.grade_level.value}')>"
 
 
+class ScheduleSnapshot(Base, TimestampMixin):
+    """Last published schedule week for a channel, used for cell-level change detection."""
+    __tablename__ = 'schedule_snapshots'
+
+    channel_id = Column(
+        BigInteger,
+        ForeignKey('schedule_channels.channel_id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    week_key = Column(String(50), nullable=False)  # Identifies the displayed week
+    data = Column(Text, nullable=False)  # JSON snapshot of days/slots
+
+    def __repr__(self) -> str:
+        return f"<ScheduleSnapshot(channel_id={self.channel_id}, week_key='{self.week_key}')>"
+
+
+class CalendarExport(Base, TimestampMixin):
+    """Hashes of the sources an exported grade calendar was last generated from."""
+    __tablename__ = 'calendar_exports'
+
+    grade_level = Column(SQLEnum(GradeLevel), primary_key=True)
+    schedule_hash = Column(String(64), nullable=True)  # calendar_export.schedule_hash of the exported days
+    tasks_hash = Column(String, nullable=True)  # GradeChannelConfig.content_hash
+
+    def __repr__(self) -> str:
+        return f"<CalendarExport(grade_level='{self.grade_level.value}')>"
+
+
 # ============================================================================
 # News System Models
 # ============================================================================
@@ -294,6 +356,28 @@ class SentNewsEntry(Base):
         return f"<SentNewsEntry(feed_id={self.feed_id}, entry_id='{self.entry_id[:50]}...')>"
 
 
+class NewsStorySignature(Base):
+    """MinHash signature of a posted story, used for cross-feed near-duplicate detection."""
+    __tablename__ = 'news_story_signatures'
+    __table_args__ = (
+        Index('ix_story_signatures_channel_sent', 'channel_id', 'sent_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    channel_id = Column(
+        BigInteger,
+        ForeignKey('news_channels.channel_id', ondelete='CASCADE'),
+        nullable=False
+    )
+    message_id = Column(BigInteger, nullable=False)
+    signature = Column(LargeBinary, nullable=False)  # Packed MinHash signature
+    sources = Column(Text, nullable=False)  # Newline-separated feed names, first one posted the message
+    sent_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<NewsStorySignature(channel_id={self.channel_id}, message_id={self.message_id})>"
+
+
 # ============================================================================
 # Authentication System Models
 # ============================================================================
@@ -305,6 +389,7 @@ class AuthenticatedUser(Base, TimestampMixin):
         Index('ix_auth_users_email', 'email'),
         Index('ix_auth_users_type', 'user_type'),
         Index('ix_auth_users_student_id', 'student_id'),
+        Index('ix_auth_users_type_authenticated_at', 'user_type', 'authenticated_at', 'user_id'),  # Listing pages
     )
     
     user_id = Column(BigInteger, primary_key=True)
@@ -368,6 +453,36 @@ class RootMeCache(Base, TimestampMixin):
         return f"<RootMeCache(user_id={self.user_id}, rootme_id='{self.rootme_id}', score={self.score})>"
 
 
+class Student(Base, TimestampMixin):
+    """Student roster (enrolment lists) used to validate student authentication."""
+    __tablename__ = 'students'
+    __table_args__ = (
+        Index('ix_students_grade_formation', 'grade_level', 'formation_type'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    student_id = Column(String(20), unique=True, nullable=False, index=True)  # Normalized student number
+    email = Column(String(200), nullable=False, index=True)
+    first_name = Column(String(100), nullable=False)
+    last_name = Column(String(100), nullable=False)
+    grade_level = Column(SQLEnum(GradeLevel), nullable=False)
+    formation_type = Column(SQLEnum(FormationType), nullable=False)
+    
+    def to_dict(self) -> dict:
+        """Student info in the format returned by the roster lookups."""
+        return {
+            'student_id': self.student_id,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'email': self.email,
+            'formation_type': self.formation_type.value if hasattr(self.formation_type, 'value') else self.formation_type,
+            'grade_level': self.grade_level.value if hasattr(self.grade_level, 'value') else self.grade_level
+        }
+    
+    def __repr__(self) -> str:
+        return f"<Student(student_id='{self.student_id}', grade='{self.grade_level}')>"
+
+
 class Professional(Base, TimestampMixin):
     """Pre-registered professionals (teachers) with course access."""
     __tablename__ = 'professionals'
@@ -456,6 +571,41 @@ class PendingAuth(Base):
         return f"<PendingAuth(user_id={self.user_id}, type='{self.user_type.value}')>"
 
 
+class RateLimitBucket(Base):
+    """Persisted token bucket state (mirror of the in-memory rate limiters)."""
+    __tablename__ = 'rate_limit_buckets'
+    
+    key = Column(String(250), primary_key=True)  # e.g. "auth_email:user:123"
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # Unix timestamp of the last refill
+    
+    def __repr__(self) -> str:
+        return f"<RateLimitBucket(key='{self.key}', tokens={self.tokens:.2f})>"
+
+
+class EmailOutbox(Base):
+    """Outgoing email waiting to be delivered by the SMTP worker pool."""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        Index('ix_email_outbox_status_next', 'status', 'next_attempt_at'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    to_email = Column(String(200), nullable=False)
+    subject = Column(String(300), nullable=False)
+    body = Column(Text, nullable=False)  # HTML
+    user_id = Column(BigInteger, nullable=True)  # Discord user who requested the email
+    status = Column(SQLEnum(EmailStatus), default=EmailStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<EmailOutbox(id={self.id}, to='{self.to_email}', status='{self.status}')>"
+
+
 # ============================================================================
 # CTF Team Management System Models
 # ============================================================================
@@ -581,6 +731,23 @@ class TeamApplication(Base, TimestampMixin):
         return f"<TeamApplication(id={self.id}, team_id={self.team_id}, applicant_id={self.applicant_id}, status='{self.status}')>"
 
 
+class TeamScore(Base, TimestampMixin):
+    """Root-Me totals of a team, kept up to date from the members' RootMeCache rows."""
+    __tablename__ = 'team_scores'
+    __table_args__ = (
+        Index('ix_team_scores_ranking', 'total_score', 'team_id'),
+    )
+    
+    team_id = Column(Integer, ForeignKey('ctf_teams.id', ondelete='CASCADE'), primary_key=True)
+    total_score = Column(Integer, nullable=False, default=0)
+    total_challenges = Column(Integer, nullable=False, default=0)
+    linked_count = Column(Integer, nullable=False, default=0)  # Members with a Root-Me cache
+    member_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self) -> str:
+        return f"<TeamScore(team_id={self.team_id}, total_score={self.total_score})>"
+
+
 # ============================================================================
 # My Tasks System Models
 # ============================================================================
@@ -618,3 +785,90 @@ class UserAssignmentProgress(Base):
     def __repr__(self) -> str:
         return f"<UserAssignmentProgress(user_id={self.user_id}, assignment_id={self.assignment_id})>"
 
+
+class ReminderPreference(Base, TimestampMixin):
+    """Opt-in for personal DM reminders of uncompleted assignments."""
+    __tablename__ = 'reminder_preferences'
+    
+    user_id = Column(BigInteger, primary_key=True)
+    dm_enabled = Column(Boolean, default=False, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ReminderPreference(user_id={self.user_id}, dm_enabled={self.dm_enabled})>"
+
+
+# ============================================================================
+# Managed Messages
+# ============================================================================
+
+class ManagedMessage(Base, TimestampMixin):
+    """Bot-owned message kept up to date by a periodic renderer (to-do lists, schedules, hubs...)."""
+    __tablename__ = 'managed_messages'
+
+    purpose = Column(String(100), primary_key=True)  # e.g. "welcome", "tasks:<channel_id>"
+    channel_id = Column(BigInteger, nullable=False)
+    message_id = Column(BigInteger, nullable=True)
+    content_hash = Column(String(64), nullable=True)  # Hash of the last published payload
+
+    def __repr__(self) -> str:
+        return f"<ManagedMessage(purpose='{self.purpose}', message_id={self.message_id})>"
+
+
+# ============================================================================
+# Bulk Role Jobs
+# ============================================================================
+
+class RoleJob(Base, TimestampMixin):
+    """Mass role change applied in the background (resumed after a restart)."""
+    __tablename__ = 'role_jobs'
+    __table_args__ = (
+        Index('ix_role_jobs_status', 'status'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    guild_id = Column(BigInteger, nullable=False)
+    description = Column(String(200), nullable=False)
+    created_by = Column(BigInteger, nullable=True)
+    status = Column(SQLEnum(RoleJobStatus), default=RoleJobStatus.RUNNING, nullable=False)
+    
+    targets: Mapped[List["RoleJobTarget"]] = relationship(
+        'RoleJobTarget',
+        back_populates='job',
+        cascade='all, delete-orphan'
+    )
+    
+    def __repr__(self) -> str:
+        return f"<RoleJob(id={self.id}, description='{self.description}', status='{self.status}')>"
+
+
+class RoleJobTarget(Base):
+    """Roles to add/remove for one member of a role job."""
+    __tablename__ = 'role_job_targets'
+    __table_args__ = (
+        Index('ix_role_job_targets_job_status', 'job_id', 'status'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(Integer, ForeignKey('role_jobs.id', ondelete='CASCADE'), nullable=False)
+    member_id = Column(BigInteger, nullable=False)
+    add_role_ids = Column(Text, nullable=False, default='')  # Comma-separated role IDs
+    remove_role_ids = Column(Text, nullable=False, default='')
+    status = Column(SQLEnum(RoleTargetStatus), default=RoleTargetStatus.PENDING, nullable=False)
+    error = Column(String(300), nullable=True)
+    
+    job: Mapped["RoleJob"] = relationship('RoleJob', back_populates='targets')
+    
+    def __repr__(self) -> str:
+        return f"<RoleJobTarget(job_id={self.job_id}, member_id={self.member_id}, status='{self.status}')>"
+
+
+class RoleReset(Base):
+    """Last reset of a managed role: users authenticated before it do not get the role back."""
+    __tablename__ = 'role_resets'
+    
+    role_id = Column(BigInteger, primary_key=True)
+    reset_at = Column(DateTime(timezone=True), nullable=False)
+    reset_by = Column(BigInteger, nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<RoleReset(role_id={self.role_id}, reset_at={self.reset_at})>"
@@ -18,7 +18,7 @@ async def test_csv_parser():
     
     # Test finding a student
     print("\n1. Testing find_student_by_id()...")
-    student = find_student_by_id("22108121", "M1")
+    student = await find_student_by_id("22108121", "M1")
     if student:
         print(f"   ✓ Found student: {student['first_name']} {student['last_name']}")
         print(f"     Email: {student['email']}")
@@ -29,13 +29,13 @@ async def test_csv_parser():
     
     # Test getting all students
     print("\n2. Testing get_all_students()...")
-    all_students = get_all_students()
+    all_students = await get_all_students()
     print(f"   ✓ Found {len(all_students)} students total")
     
-    m1_students = get_all_students("M1")
+    m1_students = await get_all_students("M1")
     print(f"   ✓ Found {len(m1_students)} M1 students")
     
-    m2_students = get_all_students("M2")
+    m2_students = await get_all_students("M2")
     print(f"   ✓ Found {len(m2_students)} M2 students")
     
     # Count by formation
@@ -3,6 +3,7 @@ Authentication UI components.
 Handles student and professional authentication with database storage.
 """
 import re
+import math
 from discord import ui, Interaction, ButtonStyle, Forbidden
 from datetime import datetime, timedelta
 from sqlalchemy import select
@@ -10,13 +11,49 @@ from typing import Optional
 
 from db import AsyncSessionLocal
 from db.models import AuthenticatedUser, Professional, PendingAuth
-from utils import ROLE_FA, ROLE_FI, ROLE_PRO, ROLE_M1, ROLE_M2, ROLE_STUDENT, send_email, create_jwt, verify_jwt, ConfigManager
+from db.constants import EmailStatus
+from utils import ROLE_FA, ROLE_FI, ROLE_PRO, ROLE_M1, ROLE_M2, ROLE_STUDENT, create_jwt, verify_jwt, ConfigManager
 from utils.csv_parser import find_student_by_id
+from utils.email_outbox import email_outbox
+from utils.rate_limiter import acquire_auth_email
 from api import RootMe
 
 COOLDOWN_PERIOD = timedelta(hours=1)
 
 
+def rate_limit_message(retry_after: float) -> str:
+    return f"⏳ Trop de demandes d'envoi de mail. Réessayez dans {math.ceil(retry_after)} secondes."
+
+
+async def send_token_email(interaction: Interaction, email: str, token: str):
+    """Queue the token email and report its delivery status in the ephemeral message."""
+    message = await interaction.followup.send(
+        f"⏳ Envoi du mail à {email} en cours...\n\nEntrez le jeton reçu en cliquant sur le bouton ci-dessous.",
+        view=FeedbackView(),
+        ephemeral=True,
+        wait=True
+    )
+    
+    async def report(outbox):
+        if outbox.status == EmailStatus.SENT:
+            await message.edit(
+                content=f"✉️ Mail envoyé à {email}\n\nEntrez le jeton reçu en cliquant sur le bouton ci-dessous."
+            )
+        else:
+            await message.edit(
+                content=f"❌ L'envoi du mail à {email} a échoué. Réessayez plus tard ou contactez un administrateur.",
+                view=None
+            )
+    
+    await email_outbox.enqueue(
+        ConfigManager.get('email_object'),
+        ConfigManager.get('email_body').format(token),
+        email,
+        user_id=interaction.user.id,
+        on_status=report
+    )
+
+
 class Authentication(ui.View):
     """Main authentication view with buttons for students, professionals, and profile linking."""
     
@@ -134,7 +171,7 @@ class StudentModal(ui.Modal, title="Authentification Étudiant"):
             return
         
         # Find student in CSV files
-        student_info = find_student_by_id(self.student_id.value, grade)
+        student_info = await find_student_by_id(self.student_id.value, grade)
         
         if not student_info:
             await interaction.response.send_message(
@@ -143,20 +180,26 @@ class StudentModal(ui.Modal, title="Authentification Étudiant"):
             )
             return
         
-        await interaction.response.defer(ephemeral=True)
-        
         async with AsyncSessionLocal() as session:
             # Check if already authenticated
             result = await session.execute(
                 select(AuthenticatedUser).where(AuthenticatedUser.user_id == interaction.user.id)
             )
             if result.scalar_one_or_none():
-                await interaction.followup.send(
+                await interaction.response.send_message(
                     "Vous êtes déjà authentifié.",
                     ephemeral=True
                 )
                 return
             
+            # Rate limit right before the token and email work: only real sends use tokens
+            retry_after = await acquire_auth_email(interaction.user.id, student_info['email'])
+            if retry_after:
+                await interaction.response.send_message(rate_limit_message(retry_after), ephemeral=True)
+                return
+            
+            await interaction.response.defer(ephemeral=True)
+            
             # Create or update pending authentication
             result = await session.execute(
                 select(PendingAuth).where(PendingAuth.user_id == interaction.user.id)
@@ -197,18 +240,8 @@ class StudentModal(ui.Modal, title="Authentification Étudiant"):
             
             await session.commit()
             
-            # Send email with token
-            send_email(
-                ConfigManager.get('email_object'),
-                ConfigManager.get('email_body').format(token),
-                student_info['email']
-            )
-            
-            await interaction.followup.send(
-                f"✉️ Mail envoyé à {student_info['email']}\n\nEntrez le jeton reçu en cliquant sur le bouton ci-dessous.",
-                view=FeedbackView(),
-                ephemeral=True
-            )
+            # Send email with token (through the outbox, the status is reported in the message)
+            await send_token_email(interaction, student_info['email'], token)
 
 
 class ProfessionalModal(ui.Modal, title="Authentification Professionnel"):
@@ -262,6 +295,12 @@ class ProfessionalModal(ui.Modal, title="Authentification Professionnel"):
                 )
                 return
             
+            # Rate limit right before the token and email work: only real sends use tokens
+            retry_after = await acquire_auth_email(interaction.user.id, self.email.value)
+            if retry_after:
+                await interaction.followup.send(rate_limit_message(retry_after), ephemeral=True)
+                return
+            
             # Create or update pending authentication
             result = await session.execute(
                 select(PendingAuth).where(PendingAuth.user_id == interaction.user.id)
@@ -298,18 +337,8 @@ class ProfessionalModal(ui.Modal, title="Authentification Professionnel"):
             
             await session.commit()
             
-            # Send email with token
-            send_email(
-                ConfigManager.get('email_object'),
-                ConfigManager.get('email_body').format(token),
-                self.email.value
-            )
-            
-            await interaction.followup.send(
-                f"✉️ Mail envoyé à {self.email.value}\n\nEntrez le jeton reçu en cliquant sur le bouton ci-dessous.",
-                view=FeedbackView(),
-                ephemeral=True
-            )
+            # Send email with token (through the outbox, the status is reported in the message)
+            await send_token_email(interaction, self.email.value, token)
 
 
 class FeedbackView(ui.View):
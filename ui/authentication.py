@@ -2,18 +2,31 @@
 UI components for authentication management.
 Provides admin panels, modals, and views for managing users and professionals.
 """
-from discord import ui, Interaction, Embed, Color, SelectOption, TextChannel, ButtonStyle, Member
+import asyncio
+from discord import ui, Interaction, Embed, Color, SelectOption, TextChannel, ButtonStyle, Member, Message, HTTPException
 from discord.ext import commands
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 from db import AsyncSessionLocal
-from db.models import AuthenticatedUser, Professional, ProfessionalCourseChannel, PendingAuth
+from db.models import AuthenticatedUser, Professional, ProfessionalCourseChannel, PendingAuth, PlayerProfile
 from utils import ROLE_M1, ROLE_M2, ROLE_FI, ROLE_FA
+from utils.roster_store import RosterDiff, preview_roster, apply_roster
+from utils.student_roster import parse_roster_csv
+from utils.pending_auths import purge_expired_pending_auths
+from utils.metrics import metrics
+from utils.stats import stats_service
+from utils.role_jobs import role_jobs, build_progress_embed, RoleJobProgress
+from utils.role_sync import record_role_reset
+from utils.user_search import user_search, UserDocument
+from utils.listings import KeysetPage, Cursor, PAGE_SIZE, student_page, professional_page
+from utils.team_scores import refresh_teams
 from sqlalchemy import select as select_db
 
+MAX_ROSTER_SIZE = 2 * 1024 * 1024  # Bytes
+
 
 class AuthenticationAdminPanel(ui.View):
     """Main admin panel for authentication management."""
@@ -95,6 +108,12 @@ class AuthenticationAdminPanel(ui.View):
                 value="reset_roles",
                 emoji="🔄"
             ),
+            SelectOption(
+                label="Upload Student Roster",
+                description="Replace a student list (M1/M2 FI/FA) from a CSV file",
+                value="upload_roster",
+                emoji="📤"
+            ),
         ]
         
         select = ui.Select(
@@ -180,164 +199,86 @@ class AuthenticationAdminPanel(ui.View):
                 inline=False
             )
             await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
-    
-    async def show_stats(self, interaction: Interaction):
-        """Show authentication statistics."""
-        async with AsyncSessionLocal() as session:
-            # Count authenticated users
-            student_count = await session.execute(
-                select(func.count(AuthenticatedUser.user_id)).where(
-                    AuthenticatedUser.user_type == 'student'
-                )
-            )
-            total_students = student_count.scalar() or 0
-            
-            pro_count = await session.execute(
-                select(func.count(Professional.id))
-            )
-            total_pros = pro_count.scalar() or 0
-            
-            # Count by grade and path
-            m1_count = await session.execute(
-                select(func.count(AuthenticatedUser.user_id)).where(
-                    AuthenticatedUser.grade_level == 'M1'
-                )
-            )
-            m1_total = m1_count.scalar() or 0
-            
-            m2_count = await session.execute(
-                select(func.count(AuthenticatedUser.user_id)).where(
-                    AuthenticatedUser.grade_level == 'M2'
-                )
-            )
-            m2_total = m2_count.scalar() or 0
-            
-            fi_count = await session.execute(
-                select(func.count(AuthenticatedUser.user_id)).where(
-                    AuthenticatedUser.formation_type == 'FI'
-                )
-            )
-            fi_total = fi_count.scalar() or 0
-            
-            fa_count = await session.execute(
-                select(func.count(AuthenticatedUser.user_id)).where(
-                    AuthenticatedUser.formation_type == 'FA'
-                )
-            )
-            fa_total = fa_count.scalar() or 0
-            
-            # Count pending auths
-            pending_count = await session.execute(
-                select(func.count(PendingAuth.id))
-            )
-            total_pending = pending_count.scalar() or 0
-            
+        
+        elif action == "upload_roster":
+            view = RosterUploadView()
             embed = Embed(
-                title="📊 Authentication Statistics",
-                description="Overview of the authentication system:",
+                title="📤 Upload Student Roster",
+                description="Select the student list to replace, then send its CSV file in this channel.",
                 color=Color.blue()
             )
-            
             embed.add_field(
-                name="👥 Total Users",
-                value=f"**Students:** {total_students}\n**Professionals:** {total_pros}",
+                name="CSV format",
+                value="Columns: `N° étudiant`, `Nom`, `Prénom`, `Email` (university address or its part before `@`).\n"
+                      "Separator: `,` or `;`",
                 inline=False
             )
-            
-            embed.add_field(
-                name="🎓 Students by Grade",
-                value=f"**M1:** {m1_total}\n**M2:** {m2_total}",
-                inline=True
-            )
-            
-            embed.add_field(
-                name="📚 Students by Path",
-                value=f"**FI (Formation Initiale):** {fi_total}\n**FA (Formation Alternance):** {fa_total}",
-                inline=True
-            )
-            
-            embed.add_field(
-                name="⏰ Pending Authentications",
-                value=f"{total_pending} request(s)",
-                inline=False
-            )
-            
-            embed.set_footer(text=f"Generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+    
+    async def show_stats(self, interaction: Interaction):
+        """Show authentication statistics."""
+        stats = await stats_service.auth()
+        
+        embed = Embed(
+            title="📊 Authentication Statistics",
+            description="Overview of the authentication system:",
+            color=Color.blue()
+        )
+        
+        embed.add_field(
+            name="👥 Total Users",
+            value=f"**Students:** {stats.students}\n**Professionals:** {stats.registered_professionals}",
+            inline=False
+        )
+        
+        embed.add_field(
+            name="🎓 Students by Grade",
+            value=f"**M1:** {stats.by_grade.get('M1', 0)}\n**M2:** {stats.by_grade.get('M2', 0)}",
+            inline=True
+        )
+        
+        embed.add_field(
+            name="📚 Students by Path",
+            value=f"**FI (Formation Initiale):** {stats.by_formation.get('FI', 0)}\n"
+                  f"**FA (Formation Alternance):** {stats.by_formation.get('FA', 0)}",
+            inline=True
+        )
+        
+        embed.add_field(
+            name="⏰ Pending Authentications",
+            value=f"{stats.pending} request(s)",
+            inline=False
+        )
+        
+        embed.set_footer(text=f"Generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
     
     async def list_students(self, interaction: Interaction):
-        """List all authenticated students."""
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(AuthenticatedUser).where(
-                    AuthenticatedUser.user_type == 'student'
-                ).order_by(AuthenticatedUser.authenticated_at.desc())
+        """List all authenticated students, one page at a time."""
+        view = StudentListView()
+        if not await view.load():
+            await interaction.response.send_message(
+                "ℹ️ No authenticated students found.",
+                ephemeral=True
             )
-            students = result.scalars().all()
-            
-            if not students:
-                await interaction.response.send_message(
-                    "ℹ️ No authenticated students found.",
-                    ephemeral=True
-                )
-                return
-            
-            # Paginate if there are many students
-            students_per_page = 10
-            total_pages = (len(students) + students_per_page - 1) // students_per_page
-            
-            view = StudentListView(students, page=0, total_pages=total_pages)
-            embed = view.create_embed()
-            
-            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+            return
+        
+        embed = view.create_embed((await stats_service.auth()).students)
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
     
     async def list_professionals(self, interaction: Interaction):
-        """List all registered professionals."""
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(select(Professional))
-            professionals = result.scalars().all()
-            
-            if not professionals:
-                await interaction.response.send_message(
-                    "ℹ️ No professionals registered yet.",
-                    ephemeral=True
-                )
-                return
-            
-            embed = Embed(
-                title="👔 Registered Professionals",
-                description=f"Total: {len(professionals)}",
-                color=Color.blue()
+        """List all registered professionals, one page at a time."""
+        view = ProfessionalListView()
+        if not await view.load():
+            await interaction.response.send_message(
+                "ℹ️ No professionals registered yet.",
+                ephemeral=True
             )
-            
-            for pro in professionals[:25]:  # Discord embed field limit
-                # Count course channels
-                course_count = len(pro.course_channels)
-                
-                # Check if authenticated
-                result_user = await session.execute(
-                    select(AuthenticatedUser).where(
-                        AuthenticatedUser.email == pro.email,
-                        AuthenticatedUser.user_type == 'professional'
-                    )
-                )
-                auth_user = result_user.scalar_one_or_none()
-                
-                status = "✅ Authenticated" if auth_user else "⏳ Not authenticated"
-                
-                name = f"{pro.first_name or ''} {pro.last_name or ''}".strip() or "N/A"
-                
-                embed.add_field(
-                    name=f"📧 {pro.email}",
-                    value=f"**Name:** {name}\n**Courses:** {course_count}\n**Status:** {status}",
-                    inline=False
-                )
-            
-            if len(professionals) > 25:
-                embed.set_footer(text=f"Showing first 25 of {len(professionals)} professionals")
-            
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        embed = view.create_embed((await stats_service.auth()).registered_professionals)
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
     
     async def show_pending_auths(self, interaction: Interaction):
         """Show pending authentication requests."""
@@ -391,78 +332,184 @@ class AuthenticationAdminPanel(ui.View):
             await interaction.response.send_message(embed=embed, ephemeral=True)
     
     async def clear_expired_tokens(self, interaction: Interaction):
-        """Clear expired authentication tokens."""
-        async with AsyncSessionLocal() as session:
-            # Get expired tokens (older than 15 minutes)
-            cutoff_time = datetime.now() - timedelta(minutes=15)
-            
-            result = await session.execute(
-                select(PendingAuth).where(PendingAuth.created_at < cutoff_time)
-            )
-            expired = result.scalars().all()
-            
-            count = len(expired)
-            
-            if count == 0:
-                await interaction.response.send_message(
-                    "ℹ️ No expired tokens to clear.",
-                    ephemeral=True
-                )
-                return
-            
-            # Delete expired tokens
-            for token in expired:
-                await session.delete(token)
-            
-            await session.commit()
-            
+        """Clear expired authentication tokens (also done automatically every 10 minutes)."""
+        count = await purge_expired_pending_auths()
+        total = metrics.get('pending_auths.expired_deleted')
+        
+        if count == 0:
             await interaction.response.send_message(
-                f"✅ Cleared {count} expired authentication token(s).",
+                f"ℹ️ No expired tokens to clear.\n-# {total} expired token(s) cleared automatically since startup.",
                 ephemeral=True
             )
+            return
+        
+        await interaction.response.send_message(
+            f"✅ Cleared {count} expired authentication token(s).",
+            ephemeral=True
+        )
 
 
-class StudentListView(ui.View):
-    """Paginated view for student list."""
+PageFetcher = Callable[[Optional[Cursor], bool], Awaitable[KeysetPage]]
+RowFormatter = Callable[[Any], Tuple[str, str]]
+
+
+class KeysetListView(ui.View):
+    """Paginated listing fetching one page at a time; the cursor is the edge rows of the current page."""
     
-    def __init__(self, students: List[AuthenticatedUser], page: int = 0, total_pages: int = 1):
+    def __init__(self, fetch: PageFetcher, format_row: RowFormatter, title: str, color: Color = Color.blue()):
+        """
+        Args:
+            fetch: Page query, called with (cursor, backward)
+            format_row: Gives the (field name, field value) of a row
+            title: Embed title
+            color: Embed color
+        """
         super().__init__(timeout=300)
-        self.students = students
+        self.fetch = fetch
+        self.format_row = format_row
+        self.title = title
+        self.color = color
+        self.page: Optional[KeysetPage] = None
+        self.page_number = 0
+        self.total = 0
+    
+    async def load(self, cursor: Optional[Cursor] = None, backward: bool = False) -> bool:
+        """Fetch a page and update the buttons; returns False if it is empty."""
+        page = await self.fetch(cursor, backward)
+        if not page.rows:
+            return False
         self.page = page
-        self.total_pages = total_pages
-        self.students_per_page = 10
+        self.children[0].disabled = not page.has_previous
+        self.children[1].disabled = not page.has_next
+        return True
+    
+    def create_embed(self, total: Optional[int] = None) -> Embed:
+        """Create embed for current page."""
+        if total is not None:
+            self.total = total
+        per_page = PAGE_SIZE
+        total_pages = max(1, (self.total + per_page - 1) // per_page)
+        embed = Embed(
+            title=self.title,
+            description=f"Page {self.page_number + 1}/{max(total_pages, self.page_number + 1)}",
+            color=self.color
+        )
+        for row in self.page.rows:
+            name, value = self.format_row(row)
+            embed.add_field(name=name, value=value, inline=False)
+        embed.set_footer(text=f"Total: {self.total}")
+        return embed
+    
+    @ui.button(label="◀️ Previous", style=ButtonStyle.grey)
+    async def previous_page(self, interaction: Interaction, button: ui.Button):
+        """Go to previous page."""
+        if self.page and await self.load(self.page.first, backward=True):
+            self.page_number = max(0, self.page_number - 1)
+        await interaction.response.edit_message(embed=self.create_embed(), view=self)
+    
+    @ui.button(label="Next ▶️", style=ButtonStyle.grey)
+    async def next_page(self, interaction: Interaction, button: ui.Button):
+        """Go to next page."""
+        if self.page and await self.load(self.page.last):
+            self.page_number += 1
+        await interaction.response.edit_message(embed=self.create_embed(), view=self)
+
+
+def format_student_row(row) -> Tuple[str, str]:
+    return (
+        row.email,
+        f"<@{row.user_id}>\n"
+        f"**Student ID:** {row.student_id or 'N/A'}\n"
+        f"**Grade:** {row.grade_level or 'N/A'}\n"
+        f"**Path:** {row.formation_type or 'N/A'}\n"
+        f"**Authenticated:** <t:{int(row.authenticated_at.timestamp())}:R>"
+    )
+
+
+def format_professional_row(row) -> Tuple[str, str]:
+    name = f"{row.first_name or ''} {row.last_name or ''}".strip() or "N/A"
+    status = "✅ Authenticated" if row.authenticated else "⏳ Not authenticated"
+    return (
+        f"📧 {row.email}",
+        f"**Name:** {name}\n**Courses:** {row.course_count}\n**Status:** {status}"
+    )
+
+
+class StudentListView(KeysetListView):
+    """Paginated view for student list."""
+    
+    def __init__(self):
+        super().__init__(student_page, format_student_row, "👥 Authenticated Students", Color.green())
+
+
+class ProfessionalListView(KeysetListView):
+    """Paginated view for professional list."""
+    
+    def __init__(self):
+        super().__init__(professional_page, format_professional_row, "👔 Registered Professionals")
+
+
+class SearchUserModal(ui.Modal, title="Search User"):
+    """Modal for searching users."""
+    
+    search_term = ui.TextInput(
+        label="Email, Student ID or Name",
+        placeholder="Enter email, student ID, name or Discord name",
+        required=True,
+        max_length=100
+    )
+    
+    async def on_submit(self, interaction: Interaction):
+        users = await user_search.search(interaction.guild, self.search_term.value)
+        
+        if not users:
+            await interaction.response.send_message(
+                f"❌ No users found matching '{self.search_term.value}'.",
+                ephemeral=True
+            )
+            return
+        
+        view = SearchResultsView(self.search_term.value, users)
+        await interaction.response.send_message(embed=view.create_embed(), view=view, ephemeral=True)
+
+
+class SearchResultsView(ui.View):
+    """Paginated, ranked user search results."""
+    
+    def __init__(self, term: str, users: List[UserDocument]):
+        super().__init__(timeout=300)
+        self.term = term
+        self.users = users
+        self.page = 0
+        self.users_per_page = 10
+        self.total_pages = max(1, (len(users) + self.users_per_page - 1) // self.users_per_page)
         
         # Update button states
-        self.children[0].disabled = (page == 0)
-        self.children[1].disabled = (page >= total_pages - 1)
+        self.children[0].disabled = True
+        self.children[1].disabled = self.total_pages <= 1
     
     def create_embed(self) -> Embed:
         """Create embed for current page."""
         embed = Embed(
-            title="👥 Authenticated Students",
-            description=f"Page {self.page + 1}/{self.total_pages}",
-            color=Color.green()
+            title="🔍 Search Results",
+            description=f"Found {len(self.users)} user(s) matching '{self.term}':",
+            color=Color.blue()
         )
         
-        start_idx = self.page * self.students_per_page
-        end_idx = start_idx + self.students_per_page
-        page_students = self.students[start_idx:end_idx]
-        
-        for student in page_students:
-            user_mention = f"<@{student.user_id}>"
-            
+        start_idx = self.page * self.users_per_page
+        for user in self.users[start_idx:start_idx + self.users_per_page]:
             embed.add_field(
-                name=f"{user_mention}",
-                value=f"**Email:** {student.email}\n"
-                      f"**Student ID:** {student.student_id or 'N/A'}\n"
-                      f"**Grade:** {student.grade_level or 'N/A'}\n"
-                      f"**Path:** {student.formation_type or 'N/A'}\n"
-                      f"**Authenticated:** <t:{int(student.authenticated_at.timestamp())}:R>",
+                name=user.name or user.display_name or str(user.user_id),
+                value=f"<@{user.user_id}>\n"
+                      f"**Email:** {user.email}\n"
+                      f"**Type:** {user.user_type.capitalize()}\n"
+                      f"**Student ID:** {user.student_id or 'N/A'}\n"
+                      f"**Grade:** {user.grade_level or 'N/A'}\n"
+                      f"**Path:** {user.formation_type or 'N/A'}",
                 inline=False
             )
         
-        embed.set_footer(text=f"Total students: {len(self.students)}")
-        
+        embed.set_footer(text=f"Page {self.page + 1}/{self.total_pages} • Best matches first")
         return embed
     
     @ui.button(label="◀️ Previous", style=ButtonStyle.grey)
@@ -472,9 +519,7 @@ class StudentListView(ui.View):
             self.page -= 1
             self.children[0].disabled = (self.page == 0)
             self.children[1].disabled = False
-            
-            embed = self.create_embed()
-            await interaction.response.edit_message(embed=embed, view=self)
+            await interaction.response.edit_message(embed=self.create_embed(), view=self)
     
     @ui.button(label="Next ▶️", style=ButtonStyle.grey)
     async def next_page(self, interaction: Interaction, button: ui.Button):
@@ -483,70 +528,7 @@ class StudentListView(ui.View):
             self.page += 1
             self.children[0].disabled = False
             self.children[1].disabled = (self.page >= self.total_pages - 1)
-            
-            embed = self.create_embed()
-            await interaction.response.edit_message(embed=embed, view=self)
-
-
-class SearchUserModal(ui.Modal, title="Search User"):
-    """Modal for searching users."""
-    
-    search_term = ui.TextInput(
-        label="Email or Student ID",
-        placeholder="Enter email or student ID",
-        required=True,
-        max_length=100
-    )
-    
-    async def on_submit(self, interaction: Interaction):
-        async with AsyncSessionLocal() as session:
-            # Search by email first
-            result = await session.execute(
-                select(AuthenticatedUser).where(
-                    AuthenticatedUser.email.ilike(f"%{self.search_term.value}%")
-                )
-            )
-            users = result.scalars().all()
-            
-            # If no results, try student ID
-            if not users:
-                result = await session.execute(
-                    select(AuthenticatedUser).where(
-                        AuthenticatedUser.student_id.ilike(f"%{self.search_term.value}%")
-                    )
-                )
-                users = result.scalars().all()
-            
-            if not users:
-                await interaction.response.send_message(
-                    f"❌ No users found matching '{self.search_term.value}'.",
-                    ephemeral=True
-                )
-                return
-            
-            embed = Embed(
-                title="🔍 Search Results",
-                description=f"Found {len(users)} user(s):",
-                color=Color.blue()
-            )
-            
-            for user in users[:10]:  # Limit to 10 results
-                user_mention = f"<@{user.user_id}>"
-                
-                embed.add_field(
-                    name=f"{user_mention}",
-                    value=f"**Email:** {user.email}\n"
-                          f"**Type:** {user.user_type.capitalize()}\n"
-                          f"**Student ID:** {user.student_id or 'N/A'}\n"
-                          f"**Grade:** {user.grade_level or 'N/A'}\n"
-                          f"**Path:** {user.formation_type or 'N/A'}",
-                    inline=False
-                )
-            
-            if len(users) > 10:
-                embed.set_footer(text=f"Showing first 10 of {len(users)} results")
-            
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await interaction.response.edit_message(embed=self.create_embed(), view=self)
 
 
 class RegisterProfessionalModal(ui.Modal, title="Register Professional"):
@@ -1223,8 +1205,14 @@ class ConfirmDeauthView(ui.View):
                     except Exception as e:
                         print(f"Error removing roles: {e}")
             
+            # The cascade also deletes the CTF profile and Root-Me cache: the team's score changes
+            team_id = (await session.execute(
+                select(PlayerProfile.team_id).where(PlayerProfile.user_id == self.user_id)
+            )).scalar_one_or_none()
+            
             # Delete authentication record
             await session.delete(user)
+            await refresh_teams(session, [team_id])
             await session.commit()
             
             message = f"✅ User <@{self.user_id}> has been deauthenticated."
@@ -1311,22 +1299,27 @@ class ConfirmResetRolesView(ui.View):
     @ui.button(label="Confirm Reset", style=ButtonStyle.danger)
     async def confirm(self, interaction: Interaction, button: ui.Button):
         """Confirm role reset."""
-        await interaction.response.defer(ephemeral=True)
-        
-        # Get all members with this role
         members_with_role = self.role.members
-        count = 0
+        await interaction.response.edit_message(
+            content=f"⏳ Removing **{self.role.name}** from {len(members_with_role)} member(s)...",
+            embed=None,
+            view=None
+        )
         
-        for member in members_with_role:
-            try:
-                await member.remove_roles(self.role, reason=f"Role reset by admin")
-                count += 1
-            except Exception as e:
-                print(f"Error removing role from {member}: {e}")
+        async def show_progress(progress: RoleJobProgress):
+            await interaction.edit_original_response(content=None, embed=build_progress_embed(progress))
         
-        await interaction.followup.send(
-            f"✅ Removed **{self.role.name}** role from {count} member(s).",
-            ephemeral=True
+        # Reconciliation must not give the role back
+        await record_role_reset(self.role.id, interaction.user.id)
+        
+        # Runs in the background and resumes after a restart
+        await role_jobs.run(
+            interaction.client,
+            interaction.guild.id,
+            f"Remove {self.role.mention} (reset by {interaction.user})",
+            {member.id: ((), (self.role.id,)) for member in members_with_role},
+            created_by=interaction.user.id,
+            on_progress=show_progress
         )
     
     @ui.button(label="Cancel", style=ButtonStyle.secondary)
@@ -1338,3 +1331,118 @@ class ConfirmResetRolesView(ui.View):
             view=None
         )
 
+
+class RosterUploadView(ui.View):
+    """Select the student list to replace, then wait for its CSV file."""
+    
+    def __init__(self):
+        super().__init__(timeout=300)
+        
+        options = [
+            SelectOption(label=f"{grade} {formation}", value=f"{grade}:{formation}", emoji="🎓")
+            for grade in ('M1', 'M2') for formation in ('FI', 'FA')
+        ]
+        select = ui.Select(placeholder="Select the student list...", options=options)
+        select.callback = self.list_selected
+        self.add_item(select)
+    
+    async def list_selected(self, interaction: Interaction):
+        """Ask for the CSV file, then show the changes it makes to the roster."""
+        grade_level, formation_type = self.children[0].values[0].split(':')
+        
+        await interaction.response.edit_message(
+            content=f"📎 Send the **{grade_level} {formation_type}** CSV file in this channel within 2 minutes.\n"
+                    "The message will be deleted once the file has been read.",
+            view=None
+        )
+        
+        def check(message: Message) -> bool:
+            return (
+                message.author.id == interaction.user.id
+                and message.channel.id == interaction.channel_id
+                and bool(message.attachments)
+            )
+        
+        try:
+            message = await interaction.client.wait_for('message', check=check, timeout=120)
+        except asyncio.TimeoutError:
+            await interaction.followup.send("⏱️ Upload cancelled: no file received.", ephemeral=True)
+            return
+        
+        attachment = message.attachments[0]
+        if attachment.size > MAX_ROSTER_SIZE:
+            await interaction.followup.send("❌ File too large (2 MB max).", ephemeral=True)
+            return
+        content = await attachment.read()
+        try:
+            await message.delete()
+        except HTTPException:
+            pass
+        
+        try:
+            data = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            data = content.decode('latin-1')
+        students, errors = parse_roster_csv(data, grade_level, formation_type)
+        diff = await preview_roster(students, grade_level, formation_type)
+        
+        view = RosterUploadConfirmView(grade_level, formation_type, students)
+        if diff.is_empty:
+            view.confirm.disabled = True
+        await interaction.followup.send(embed=view.create_embed(diff, errors), view=view, ephemeral=True)
+
+
+class RosterUploadConfirmView(ui.View):
+    """Preview of a roster upload with confirmation."""
+    
+    def __init__(self, grade_level: str, formation_type: str, students: List[dict]):
+        super().__init__(timeout=300)
+        self.grade_level = grade_level
+        self.formation_type = formation_type
+        self.students = students
+    
+    def create_embed(self, diff: RosterDiff, errors: List[str]) -> Embed:
+        embed = Embed(
+            title=f"📤 Roster Preview - {self.grade_level} {self.formation_type}",
+            description=f"**{len(self.students)}** student(s) in the file.",
+            color=Color.blue() if self.students else Color.red()
+        )
+        embed.add_field(
+            name="Changes",
+            value=f"➕ {len(diff.inserts)} added\n"
+                  f"✏️ {len(diff.updates)} updated\n"
+                  f"➖ {len(diff.deletes)} removed\n"
+                  f"✔️ {diff.unchanged} unchanged",
+            inline=False
+        )
+        if diff.deletes and not self.students:
+            embed.add_field(name="⚠️ Warning", value="The file has no students: the whole list would be removed.", inline=False)
+        
+        if errors:
+            lines = errors[:10]
+            if len(errors) > 10:
+                lines.append(f"... and {len(errors) - 10} more")
+            embed.add_field(name=f"⚠️ {len(errors)} error(s)", value="\n".join(lines)[:1024], inline=False)
+        
+        return embed
+    
+    @ui.button(label="Apply", style=ButtonStyle.success, emoji="📤")
+    async def confirm(self, interaction: Interaction, button: ui.Button):
+        await interaction.response.defer(ephemeral=True)
+        for item in self.children:
+            item.disabled = True
+        await interaction.edit_original_response(view=self)
+        
+        # Diff computed again inside the transaction: the roster may have changed since the preview
+        diff = await apply_roster(self.students, self.grade_level, self.formation_type)
+        
+        await interaction.followup.send(
+            f"✅ {self.grade_level} {self.formation_type} roster updated: "
+            f"{len(diff.inserts)} added, {len(diff.updates)} updated, {len(diff.deletes)} removed.",
+            ephemeral=True
+        )
+    
+    @ui.button(label="Cancel", style=ButtonStyle.secondary)
+    async def cancel(self, interaction: Interaction, button: ui.Button):
+        await interaction.response.edit_message(content="Roster upload cancelled.", embed=None, view=None)
+
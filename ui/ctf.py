@@ -13,6 +13,8 @@ import pytz
 from db import AsyncSessionLocal
 from db.models import PlayerProfile, Team, TeamInvite, TeamApplication, AuthenticatedUser
 from utils import CTF_CATEGORY
+from utils.player_index import player_index, Player
+from utils.team_scores import refresh_teams
 
 
 # ============================================================================
@@ -134,120 +136,6 @@ class SetStatusView(ui.View):
 # User Selection Components
 # ============================================================================
 
-class PaginatedUserSelectView(ui.View):
-    """Paginated view for selecting authenticated users."""
-    
-    def __init__(self, users: List[AuthenticatedUser], page: int = 0, callback_func=None, **callback_kwargs):
-        super().__init__(timeout=300)
-        self.users = users
-        self.page = page
-        self.callback_func = callback_func
-        self.callback_kwargs = callback_kwargs
-        self.users_per_page = 25  # Discord limit
-        self.total_pages = (len(users) + self.users_per_page - 1) // self.users_per_page
-        
-        # Update button states
-        if hasattr(self, 'children') and len(self.children) > 0:
-            self.children[0].disabled = (page == 0)
-            self.children[1].disabled = (page >= self.total_pages - 1)
-    
-    async def send(self, interaction: Interaction):
-        """Send the user selection view."""
-        embed = self.create_embed(interaction)
-        await interaction.response.send_message(embed=embed, view=self, ephemeral=True)
-    
-    def create_embed(self, interaction: Interaction) -> Embed:
-        """Create embed for current page."""
-        embed = Embed(
-            title="👥 Select User",
-            description=f"Page {self.page + 1}/{self.total_pages}",
-            color=Color.blue()
-        )
-        
-        start_idx = self.page * self.users_per_page
-        end_idx = start_idx + self.users_per_page
-        page_users = self.users[start_idx:end_idx]
-        
-        # Create select menu options
-        options = []
-        for user in page_users:
-            member = interaction.guild.get_member(user.user_id)
-            display_name = member.display_name if member else f"User ID: {user.user_id}"
-            rootme_info = f" ({user.rootme_id})" if user.rootme_id else ""
-            
-            options.append(SelectOption(
-                label=display_name[:100],  # Discord limit
-                description=f"Email: {user.email}{rootme_info}",
-                value=str(user.user_id)
-            ))
-        
-        # Update existing select menu or create new one
-        if len(self.children) > 2:  # If select menu exists (after buttons)
-            self.children[2].options = options
-        else:
-            # Create select menu
-            select = ui.Select(placeholder="Choose a user...", options=options)
-            select.callback = self.user_selected
-            self.add_item(select)
-        
-        embed.set_footer(text=f"Total users: {len(self.users)} | Use buttons to navigate")
-        
-        return embed
-    
-    async def user_selected(self, interaction: Interaction):
-        """Handle user selection."""
-        # Find the select menu (it's the last child after buttons)
-        select_menu = None
-        for child in self.children:
-            if isinstance(child, ui.Select):
-                select_menu = child
-                break
-        
-        if not select_menu or not select_menu.values:
-            await interaction.response.send_message(
-                "❌ No user selected.",
-                ephemeral=True
-            )
-            return
-        
-        user_id = int(select_menu.values[0])
-        
-        if self.callback_func:
-            await self.callback_func(interaction, user_id, **self.callback_kwargs)
-    
-    @ui.button(label="◀️ Previous", style=ButtonStyle.grey)
-    async def previous_page(self, interaction: Interaction, button: ui.Button):
-        """Go to previous page."""
-        if self.page > 0:
-            self.page -= 1
-            # Update button states
-            for child in self.children:
-                if isinstance(child, ui.Button):
-                    if child.label == "◀️ Previous":
-                        child.disabled = (self.page == 0)
-                    elif child.label == "Next ▶️":
-                        child.disabled = False
-            
-            embed = self.create_embed(interaction)
-            await interaction.response.edit_message(embed=embed, view=self)
-    
-    @ui.button(label="Next ▶️", style=ButtonStyle.grey)
-    async def next_page(self, interaction: Interaction, button: ui.Button):
-        """Go to next page."""
-        if self.page < self.total_pages - 1:
-            self.page += 1
-            # Update button states
-            for child in self.children:
-                if isinstance(child, ui.Button):
-                    if child.label == "◀️ Previous":
-                        child.disabled = False
-                    elif child.label == "Next ▶️":
-                        child.disabled = (self.page >= self.total_pages - 1)
-            
-            embed = self.create_embed(interaction)
-            await interaction.response.edit_message(embed=embed, view=self)
-
-
 # ============================================================================
 # Team Creation
 # ============================================================================
@@ -373,6 +261,7 @@ class CreateTeamModal(ui.Modal, title="Create CTF Team"):
                 
                 # Update profile
                 profile.team_id = team.id
+                await refresh_teams(session, [team.id])
                 await session.commit()
                 
                 # Assign team role to owner
@@ -697,6 +586,7 @@ class ApplicationResponseView(ui.View):
             # Approve application
             application.status = 'approved'
             profile.team_id = team.id
+            await refresh_teams(session, [team.id])
             await session.commit()
             
             # Add team role
@@ -850,8 +740,7 @@ class TeamManagementPanel(ui.View):
             await interaction.response.send_modal(modal)
         
         elif action == "invite":
-            view = InviteMemberView(self.team_id)
-            await view.send(interaction)
+            await interaction.response.send_modal(InviteMemberModal(self.team_id))
         
         elif action == "members":
             await self.show_members(interaction)
@@ -1134,132 +1023,150 @@ class EditTeamInfoModal(ui.Modal, title="Edit Team Info"):
                 )
 
 
-class InviteMemberView(ui.View):
-    """View for inviting a member with user selection."""
+class InviteMemberModal(ui.Modal, title="Invite Member"):
+    """Modal looking up players to invite by the start of their name."""
+    
+    name = ui.TextInput(
+        label="Name or Root-Me pseudo",
+        placeholder="Start of the player's name (empty to list everyone)",
+        required=False,
+        max_length=100
+    )
     
     def __init__(self, team_id: int):
-        super().__init__(timeout=300)
+        super().__init__()
         self.team_id = team_id
     
-    async def send(self, interaction: Interaction):
-        """Send the invite member view."""
-        async with AsyncSessionLocal() as session:
-            # Get all authenticated users
-            result = await session.execute(
-                select(AuthenticatedUser).order_by(AuthenticatedUser.user_id)
-            )
-            users = result.scalars().all()
-            
-            if not users:
-                await interaction.response.send_message(
-                    "❌ No authenticated users found.",
-                    ephemeral=True
-                )
-                return
-            
-            view = PaginatedUserSelectView(
-                users=users,
-                callback_func=self.invite_user,
-                team_id=self.team_id
+    async def on_submit(self, interaction: Interaction):
+        players = await player_index.complete(interaction.guild, self.name.value or "")
+        
+        if not players:
+            await interaction.response.send_message(
+                "❌ No player looking for a team matches this name.",
+                ephemeral=True
             )
-            await view.send(interaction)
+            return
+        
+        view = InviteMemberView(self.team_id, players)
+        await interaction.response.send_message("👥 Select the player to invite:", view=view, ephemeral=True)
+
+
+class InviteMemberView(ui.View):
+    """View for inviting one of the players matching a lookup."""
     
-    async def invite_user(self, interaction: Interaction, user_id: int, team_id: int):
-        """Handle user invitation."""
-        async with AsyncSessionLocal() as session:
-            # Get team
-            result = await session.execute(
-                select(Team).where(Team.id == team_id)
+    def __init__(self, team_id: int, players: List[Player]):
+        super().__init__(timeout=300)
+        self.team_id = team_id
+        
+        options = [
+            SelectOption(label=player.label[:100], value=str(player.user_id))
+            for player in players[:25]  # Discord limit
+        ]
+        select = ui.Select(placeholder="Choose a player...", options=options)
+        select.callback = self.player_selected
+        self.add_item(select)
+    
+    async def player_selected(self, interaction: Interaction):
+        """Invite the selected player."""
+        await send_team_invite(interaction, int(self.children[0].values[0]), self.team_id)
+
+
+async def send_team_invite(interaction: Interaction, user_id: int, team_id: int):
+    """Invite a user to a team and DM them the invitation."""
+    async with AsyncSessionLocal() as session:
+        # Get team
+        result = await session.execute(
+            select(Team).where(Team.id == team_id)
+        )
+        team = result.scalar_one()
+        
+        # Check if user already on a team
+        result = await session.execute(
+            select(PlayerProfile).where(PlayerProfile.user_id == user_id)
+        )
+        profile = result.scalar_one_or_none()
+        
+        if not profile:
+            # Create profile
+            profile = PlayerProfile(user_id=user_id)
+            session.add(profile)
+            await session.flush()
+        
+        if profile.team_id:
+            target_user = interaction.guild.get_member(user_id)
+            user_mention = target_user.mention if target_user else f"User ID: {user_id}"
+            await interaction.response.send_message(
+                f"❌ {user_mention} is already on a team.",
+                ephemeral=True
             )
-            team = result.scalar_one()
-            
-            # Check if user already on a team
-            result = await session.execute(
-                select(PlayerProfile).where(PlayerProfile.user_id == user_id)
+            return
+        
+        # Check if already invited
+        result = await session.execute(
+            select(TeamInvite).where(
+                TeamInvite.team_id == team_id,
+                TeamInvite.invitee_id == user_id,
+                TeamInvite.status == 'pending'
             )
-            profile = result.scalar_one_or_none()
-            
-            if not profile:
-                # Create profile
-                profile = PlayerProfile(user_id=user_id)
-                session.add(profile)
-                await session.flush()
-            
-            if profile.team_id:
-                target_user = interaction.guild.get_member(user_id)
-                user_mention = target_user.mention if target_user else f"User ID: {user_id}"
-                await interaction.response.send_message(
-                    f"❌ {user_mention} is already on a team.",
-                    ephemeral=True
+        )
+        existing_invite = result.scalar_one_or_none()
+        
+        if existing_invite:
+            target_user = interaction.guild.get_member(user_id)
+            user_mention = target_user.mention if target_user else f"User ID: {user_id}"
+            await interaction.response.send_message(
+                f"❌ {user_mention} has already been invited.",
+                ephemeral=True
+            )
+            return
+        
+        # Create invite
+        invite = TeamInvite(
+            team_id=team_id,
+            invitee_id=user_id,
+            status='pending'
+        )
+        
+        session.add(invite)
+        await session.commit()
+        
+        # Send DM
+        try:
+            target_user = interaction.guild.get_member(user_id)
+            if target_user:
+                dm_embed = Embed(
+                    title="🎉 Team Invitation",
+                    description=f"You've been invited to join **{team.name}**!",
+                    color=Color.green()
                 )
-                return
-            
-            # Check if already invited
-            result = await session.execute(
-                select(TeamInvite).where(
-                    TeamInvite.team_id == team_id,
-                    TeamInvite.invitee_id == user_id,
-                    TeamInvite.status == 'pending'
+                if team.description:
+                    dm_embed.add_field(name="About", value=team.description, inline=False)
+                
+                dm_embed.add_field(
+                    name="Team Channel",
+                    value=f"<#{team.channel_id}>",
+                    inline=True
                 )
-            )
-            existing_invite = result.scalar_one_or_none()
-            
-            if existing_invite:
-                target_user = interaction.guild.get_member(user_id)
-                user_mention = target_user.mention if target_user else f"User ID: {user_id}"
+                
+                view = InviteResponseView(invite.id)
+                await target_user.send(embed=dm_embed, view=view)
+                
                 await interaction.response.send_message(
-                    f"❌ {user_mention} has already been invited.",
+                    f"✅ Invitation sent to {target_user.mention}!",
                     ephemeral=True
                 )
-                return
-            
-            # Create invite
-            invite = TeamInvite(
-                team_id=team_id,
-                invitee_id=user_id,
-                status='pending'
-            )
-            
-            session.add(invite)
-            await session.commit()
-            
-            # Send DM
-            try:
-                target_user = interaction.guild.get_member(user_id)
-                if target_user:
-                    dm_embed = Embed(
-                        title="🎉 Team Invitation",
-                        description=f"You've been invited to join **{team.name}**!",
-                        color=Color.green()
-                    )
-                    if team.description:
-                        dm_embed.add_field(name="About", value=team.description, inline=False)
-                    
-                    dm_embed.add_field(
-                        name="Team Channel",
-                        value=f"<#{team.channel_id}>",
-                        inline=True
-                    )
-                    
-                    view = InviteResponseView(invite.id)
-                    await target_user.send(embed=dm_embed, view=view)
-                    
-                    await interaction.response.send_message(
-                        f"✅ Invitation sent to {target_user.mention}!",
-                        ephemeral=True
-                    )
-                else:
-                    await interaction.response.send_message(
-                        f"✅ Invitation created for User ID: {user_id}",
-                        ephemeral=True
-                    )
-            
-            except:
+            else:
                 await interaction.response.send_message(
-                    f"✅ Invitation created, but couldn't send DM to User ID: {user_id}.\n"
-                    f"They may have DMs disabled or left the server.",
+                    f"✅ Invitation created for User ID: {user_id}",
                     ephemeral=True
                 )
+        
+        except:
+            await interaction.response.send_message(
+                f"✅ Invitation created, but couldn't send DM to User ID: {user_id}.\n"
+                f"They may have DMs disabled or left the server.",
+                ephemeral=True
+            )
 
 
 class InviteResponseView(ui.View):
@@ -1315,6 +1222,7 @@ class InviteResponseView(ui.View):
             # Accept invite
             invite.status = 'accepted'
             profile.team_id = team.id
+            await refresh_teams(session, [team.id])
             await session.commit()
             
             # Add team role
@@ -1452,6 +1360,7 @@ class ConfirmKickView(ui.View):
             
             # Remove from team
             profile.team_id = None
+            await refresh_teams(session, [self.team_id])
             await session.commit()
             
             # Remove team role
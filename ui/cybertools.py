@@ -5,6 +5,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models import Category, Tool, ToolSuggestion
+from utils.stats import stats_service
 
 
 class CategorySelect(ui.Select):
@@ -515,47 +516,31 @@ class CyberToolsAdminPanel(ui.View):
                 await interaction.response.send_message(embed=embed, ephemeral=True)
         
         elif action == "stats":
-            async with AsyncSessionLocal() as session:
-                # Get statistics
-                categories_result = await session.execute(select(Category))
-                categories = categories_result.scalars().all()
-                
-                tools_result = await session.execute(select(Tool))
-                tools = tools_result.scalars().all()
-                
-                suggestions_result = await session.execute(select(ToolSuggestion))
-                suggestions = suggestions_result.scalars().all()
-                
-                pending_suggestions = sum(1 for s in suggestions if s.status == 'pending')
-                approved_suggestions = sum(1 for s in suggestions if s.status == 'approved')
-                denied_suggestions = sum(1 for s in suggestions if s.status == 'denied')
+            stats = await stats_service.tools()
+            
+            embed = Embed(
+                title="📊 Cybersecurity Tools Statistics",
+                description="Overview of the tool database:",
+                color=discord.Color.blue()
+            )
+            embed.add_field(name="📁 Categories", value=str(len(stats.categories)), inline=True)
+            embed.add_field(name="🔧 Tools", value=str(stats.tools), inline=True)
+            embed.add_field(name="📝 Total Suggestions", value=str(stats.total_suggestions), inline=True)
+            embed.add_field(name="⏳ Pending", value=str(stats.suggestions.get('pending', 0)), inline=True)
+            embed.add_field(name="✅ Approved", value=str(stats.suggestions.get('approved', 0)), inline=True)
+            embed.add_field(name="❌ Denied", value=str(stats.suggestions.get('denied', 0)), inline=True)
+            
+            # Category breakdown
+            if stats.categories:
+                category_info = [f"• **{name}**: {tool_count} tool(s)" for name, tool_count in stats.categories]
                 
-                embed = Embed(
-                    title="📊 Cybersecurity Tools Statistics",
-                    description="Overview of the tool database:",
-                    color=discord.Color.blue()
+                embed.add_field(
+                    name="Category Breakdown",
+                    value="\n".join(category_info)[:1024] or "No categories",
+                    inline=False
                 )
-                embed.add_field(name="📁 Categories", value=str(len(categories)), inline=True)
-                embed.add_field(name="🔧 Tools", value=str(len(tools)), inline=True)
-                embed.add_field(name="📝 Total Suggestions", value=str(len(suggestions)), inline=True)
-                embed.add_field(name="⏳ Pending", value=str(pending_suggestions), inline=True)
-                embed.add_field(name="✅ Approved", value=str(approved_suggestions), inline=True)
-                embed.add_field(name="❌ Denied", value=str(denied_suggestions), inline=True)
-                
-                # Category breakdown
-                if categories:
-                    category_info = []
-                    for cat in categories:
-                        tool_count = len(cat.tools)
-                        category_info.append(f"• **{cat.name}**: {tool_count} tool(s)")
-                    
-                    embed.add_field(
-                        name="Category Breakdown",
-                        value="\n".join(category_info) or "No categories",
-                        inline=False
-                    )
-                
-                await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+            await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
 class AdminPanelView(ui.View):
@@ -2,13 +2,42 @@
 UI components for the My Tasks personal hub.
 Provides persistent button views and interactive task list.
 """
-from discord import ui, Interaction, Embed, Color, ButtonStyle
-from typing import List, Set
-from datetime import datetime
+from discord import ui, Interaction, Embed, Color, ButtonStyle, SelectOption
+from typing import List, Optional, Set
+from sqlalchemy import select
 import logging
 
+from db import AsyncSessionLocal
+from db.models import MyTasksHubConfig, UserAssignmentProgress, ReminderPreference
+from utils.assignment_snapshot import assignment_snapshots, GradeSnapshot, AssignmentEntry, SortKey
+from utils.progress_writer import progress_writer
+
 logger = logging.getLogger(__name__)
 
+PAGE_SIZE = 10  # Two rows of toggle buttons; the other rows hold the filters and navigation
+
+
+async def load_completed_ids(user_id: int) -> Set[int]:
+    """Load the IDs of the assignments a user completed (uses the user_id index)."""
+    # Buffered toggles must be written first so the progress set is up to date
+    if progress_writer.has_pending(user_id):
+        await progress_writer.flush()
+    
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(UserAssignmentProgress.assignment_id).where(
+                UserAssignmentProgress.user_id == user_id
+            )
+        )
+        return set(result.scalars().all())
+
+
+async def load_dm_reminders(user_id: int) -> bool:
+    """Whether a user opted in to personal DM reminders."""
+    async with AsyncSessionLocal() as session:
+        preference = await session.get(ReminderPreference, user_id)
+        return bool(preference and preference.dm_enabled)
+
 
 class MyTasksHubView(ui.View):
     """Persistent view for the My Tasks hub with the main button."""
@@ -26,10 +55,6 @@ class MyTasksHubView(ui.View):
         """Handle clicking the 'View My Tasks' button."""
         await interaction.response.defer(ephemeral=True, thinking=True)
         
-        from db import AsyncSessionLocal
-        from db.models import MyTasksHubConfig, UserAssignmentProgress, Assignment, Course, GradeChannelConfig, AssignmentStatus
-        from sqlalchemy import select, and_
-        
         async with AsyncSessionLocal() as session:
             # Find grade level for this channel
             result = await session.execute(
@@ -45,59 +70,63 @@ class MyTasksHubView(ui.View):
                     ephemeral=True
                 )
                 return
-            
-            grade_level = hub_config.grade_level
-            
-            # Get all relevant assignments for this grade level
-            # Use selectinload to eagerly load course relationship to avoid lazy loading issues
-            from sqlalchemy.orm import selectinload
-            
-            result = await session.execute(
-                select(Assignment)
-                .options(selectinload(Assignment.course))  # Eagerly load course
-                .join(Course, Assignment.course_id == Course.id)
-                .join(GradeChannelConfig, Course.channel_id == GradeChannelConfig.channel_id)
-                .where(
-                    GradeChannelConfig.grade_level == grade_level,
-                    Assignment.status == AssignmentStatus.ACTIVE.value
-                )
-                .order_by(Assignment.due_date.asc())
-            )
-            all_assignments: List[Assignment] = result.scalars().all()
-            
-            # Get user's completed task IDs
-            result = await session.execute(
-                select(UserAssignmentProgress.assignment_id).where(
-                    UserAssignmentProgress.user_id == interaction.user.id
-                )
-            )
-            completed_ids: Set[int] = set(result.scalars().all())
-            
-            # Create the task list view
-            view = UserTaskListView(
-                interaction.user.id,
-                all_assignments,
-                completed_ids,
-                self.bot
-            )
-            embed = view.create_embed()
-            
-            await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+        
+        # Assignments come from the shared grade snapshot, only the progress set is per user
+        snapshot = await assignment_snapshots.get(hub_config.grade_level)
+        completed_ids = await load_completed_ids(interaction.user.id)
+        
+        # Create the task list view on its first page
+        view = UserTaskListView(interaction.user.id, snapshot, completed_ids, self.bot)
+        view.dm_reminders = await load_dm_reminders(interaction.user.id)
+        await view.load()
+        embed = view.create_embed()
+        
+        await interaction.followup.send(embed=embed, view=view, ephemeral=True)
 
 
 class UserTaskListView(ui.View):
-    """Ephemeral view showing all tasks for a user with check/uncheck buttons."""
+    """Ephemeral view showing one page of a user's tasks with check/uncheck buttons."""
     
-    def __init__(self, user_id: int, all_assignments: List, completed_ids: Set[int], bot):
+    def __init__(self, user_id: int, snapshot: GradeSnapshot, completed_ids: Set[int], bot):
         super().__init__(timeout=180)  # Ephemeral views timeout
         self.user_id = user_id
-        self.all_assignments = all_assignments
+        self.snapshot = snapshot
         self.completed_ids = completed_ids
         self.bot = bot
+        
+        # Filters
+        self.course_id: Optional[int] = None
+        self.incomplete_only = False
+        
+        # Personal DM reminders for uncompleted tasks (opt-in)
+        self.dm_reminders = False
+        
+        # Keyset pagination state: start cursor of every page up to the current one
+        self.page_cursors: List[Optional[SortKey]] = [None]
+        self.assignments: List[AssignmentEntry] = []
+        self.has_next = False
+    
+    @property
+    def page_index(self) -> int:
+        return len(self.page_cursors) - 1
+    
+    @property
+    def courses(self) -> List:
+        return sorted(self.snapshot.courses, key=lambda c: c.name.lower())
+    
+    async def load(self):
+        """Fetch the current page from the latest grade snapshot."""
+        self.snapshot = await assignment_snapshots.get(self.snapshot.grade_level)
+        self.assignments, self.has_next = self.snapshot.page(
+            self.page_cursors[-1],
+            PAGE_SIZE,
+            course_id=self.course_id,
+            exclude=self.completed_ids if self.incomplete_only else None
+        )
         self.populate_items()
     
     def create_embed(self) -> Embed:
-        """Create the embed showing all tasks and their completion status."""
+        """Create the embed showing the tasks of the page and their completion status."""
         embed = Embed(
             title="📋 My Tasks",
             description="Manage your assignment progress below:",
@@ -105,8 +134,9 @@ class UserTaskListView(ui.View):
         )
         
         description_parts = []
+        first_idx = self.page_index * PAGE_SIZE + 1
         
-        for idx, assignment in enumerate(self.all_assignments, start=1):
+        for idx, assignment in enumerate(self.assignments, start=first_idx):
             is_checked = assignment.id in self.completed_ids
             
             # Format due date
@@ -126,22 +156,44 @@ class UserTaskListView(ui.View):
         else:
             embed.description = "\n".join(description_parts)
         
-        # Add footer stats
-        completed_count = len(self.completed_ids)
-        total_count = len(self.all_assignments)
+        # Add footer stats (for the selected course, if any)
+        in_scope = [
+            a for a in self.snapshot.assignments
+            if self.course_id is None or a.course.id == self.course_id
+        ]
+        completed_count = sum(1 for a in in_scope if a.id in self.completed_ids)
+        total_count = len(in_scope)
         progress = (completed_count / total_count * 100) if total_count > 0 else 0
-        embed.set_footer(text=f"Progress: {completed_count}/{total_count} ({progress:.0f}%)")
+        filters = []
+        if self.course_id is not None:
+            filters.append(next((c.name for c in self.snapshot.courses if c.id == self.course_id), "Course"))
+        if self.incomplete_only:
+            filters.append("Incomplete only")
+        footer = f"Page {self.page_index + 1} • Progress: {completed_count}/{total_count} ({progress:.0f}%)"
+        if filters:
+            footer += f" • Filters: {', '.join(filters)}"
+        embed.set_footer(text=footer)
         
         return embed
     
     def populate_items(self):
-        """Add/refresh all buttons for tasks."""
+        """Add/refresh the filter controls, task buttons and navigation."""
         self.clear_items()
         
-        # Limit to 25 buttons (5 rows max in Discord)
-        tasks_to_show = self.all_assignments[:25]
+        # Row 0: course filter
+        if self.courses:
+            options = [SelectOption(label="All courses", value="all", default=self.course_id is None)]
+            options += [
+                SelectOption(label=course.name[:100], value=str(course.id), default=course.id == self.course_id)
+                for course in self.courses[:24]
+            ]
+            course_select = ui.Select(placeholder="Filter by course...", options=options, row=0)
+            course_select.callback = self.course_selected
+            self.add_item(course_select)
         
-        for idx, assignment in enumerate(tasks_to_show, start=1):
+        # Rows 1-2: one toggle button per task of the page
+        first_idx = self.page_index * PAGE_SIZE + 1
+        for idx, assignment in enumerate(self.assignments, start=first_idx):
             is_checked = assignment.id in self.completed_ids
             
             if is_checked:
@@ -162,20 +214,78 @@ class UserTaskListView(ui.View):
                     label=label,
                     style=style,
                     custom_id=custom_id,
-                    assignment_id=assignment.id
+                    assignment_id=assignment.id,
+                    row=1 + (idx - first_idx) // 5
                 )
             )
         
-        if len(self.all_assignments) > 25:
-            # Add info about pagination
-            pass  # Could implement pagination here if needed
+        # Row 3: navigation and completion filter
+        previous_button = ui.Button(label="◀️ Previous", style=ButtonStyle.grey, row=3, disabled=self.page_index == 0)
+        previous_button.callback = self.previous_page
+        self.add_item(previous_button)
+        
+        next_button = ui.Button(label="Next ▶️", style=ButtonStyle.grey, row=3, disabled=not self.has_next)
+        next_button.callback = self.next_page
+        self.add_item(next_button)
+        
+        filter_button = ui.Button(
+            label="Show All" if self.incomplete_only else "Incomplete Only",
+            style=ButtonStyle.primary,
+            row=3
+        )
+        filter_button.callback = self.toggle_incomplete_only
+        self.add_item(filter_button)
+        
+        dm_button = ui.Button(
+            label="🔔 DM Reminders: On" if self.dm_reminders else "🔕 DM Reminders: Off",
+            style=ButtonStyle.success if self.dm_reminders else ButtonStyle.secondary,
+            row=3
+        )
+        dm_button.callback = self.toggle_dm_reminders
+        self.add_item(dm_button)
+    
+    async def refresh(self, interaction: Interaction):
+        """Reload the current page and update the message."""
+        await self.load()
+        await interaction.response.edit_message(embed=self.create_embed(), view=self)
+    
+    async def course_selected(self, interaction: Interaction):
+        value = interaction.data['values'][0]
+        self.course_id = None if value == "all" else int(value)
+        self.page_cursors = [None]
+        await self.refresh(interaction)
+    
+    async def toggle_incomplete_only(self, interaction: Interaction):
+        self.incomplete_only = not self.incomplete_only
+        self.page_cursors = [None]
+        await self.refresh(interaction)
+    
+    async def toggle_dm_reminders(self, interaction: Interaction):
+        """Opt in or out of personal DM reminders for the tasks not marked complete."""
+        enabled = not self.dm_reminders
+        async with AsyncSessionLocal() as session:
+            await session.merge(ReminderPreference(user_id=self.user_id, dm_enabled=enabled))
+            await session.commit()
+        self.dm_reminders = enabled
+        await self.refresh(interaction)
+    
+    async def previous_page(self, interaction: Interaction):
+        if self.page_index > 0:
+            self.page_cursors.pop()
+        await self.refresh(interaction)
+    
+    async def next_page(self, interaction: Interaction):
+        if self.has_next and self.assignments:
+            last = self.assignments[-1]
+            self.page_cursors.append((last.due_date, last.id))
+        await self.refresh(interaction)
 
 
 class TaskToggleButton(ui.Button):
     """Helper button for individual task toggling."""
     
-    def __init__(self, *, label: str, style: ButtonStyle, custom_id: str, assignment_id: int):
-        super().__init__(label=label, style=style, custom_id=custom_id)
+    def __init__(self, *, label: str, style: ButtonStyle, custom_id: str, assignment_id: int, row: Optional[int] = None):
+        super().__init__(label=label, style=style, custom_id=custom_id, row=row)
         self.assignment_id = assignment_id
     
     async def callback(self, interaction: Interaction):
@@ -190,37 +300,17 @@ class TaskToggleButton(ui.Button):
             return
         
         action = parts[1]
+        completed = action == "check"
         
-        await interaction.response.defer()
+        # Apply optimistically: double clicks on a stale button are no-ops
+        if completed:
+            view.completed_ids.add(self.assignment_id)
+        else:
+            view.completed_ids.discard(self.assignment_id)
         
-        from db import AsyncSessionLocal
-        from db.models import UserAssignmentProgress, Assignment
-        from sqlalchemy import delete
+        # Refresh the message (the page itself is unchanged, no need to query it again)
+        view.populate_items()
+        await interaction.response.edit_message(embed=view.create_embed(), view=view)
         
-        async with AsyncSessionLocal() as session:
-            if action == "check":
-                # Mark as completed
-                new_progress = UserAssignmentProgress(
-                    user_id=user_id,
-                    assignment_id=self.assignment_id
-                )
-                session.add(new_progress)
-                view.completed_ids.add(self.assignment_id)
-                
-            elif action == "uncheck":
-                # Mark as incomplete
-                stmt = delete(UserAssignmentProgress).where(
-                    UserAssignmentProgress.user_id == user_id,
-                    UserAssignmentProgress.assignment_id == self.assignment_id
-                )
-                await session.execute(stmt)
-                view.completed_ids.discard(self.assignment_id)
-            
-            await session.commit()
-            
-            # Refresh the message
-            new_embed = view.create_embed()
-            view.populate_items()  # Refresh all buttons
-            
-            await interaction.edit_original_response(embed=new_embed, view=view)
-
+        # Persisted by the write-behind batcher (idempotent upsert/delete)
+        progress_writer.set_completed(user_id, self.assignment_id, completed)
@@ -5,6 +5,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models import ScheduleChannelConfig
+from utils.message_registry import message_registry
+from utils.schedule_model import SheetLayout
 
 # Day names mapping
 DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
@@ -221,8 +223,17 @@ class EditScheduleConfigModal(ui.Modal, title="Edit Schedule Configuration"):
         max_length=30
     )
     
+    sheet_layout = ui.TextInput(
+        label="Sheet layout (JSON, empty = default)",
+        placeholder='{"row_ranges": [[8, 92], [102, null]], "first_day_column": 1}',
+        style=TextStyle.paragraph,
+        required=False,
+        max_length=500
+    )
+    
     def __init__(self, channel_id: int, spreadsheet_url: str, gid: str, 
-                 classes_per_day: int, start_day_index: int, end_day_index: int):
+                 classes_per_day: int, start_day_index: int, end_day_index: int,
+                 sheet_layout: Optional[str] = None):
         super().__init__()
         self.channel_id = channel_id
         
@@ -231,6 +242,7 @@ class EditScheduleConfigModal(ui.Modal, title="Edit Schedule Configuration"):
         self.gid.default = gid
         self.classes_per_day.default = str(classes_per_day)
         self.day_range.default = f"{DAY_NAMES[start_day_index][:3]}-{DAY_NAMES[end_day_index][:3]}"
+        self.sheet_layout.default = sheet_layout or ""
     
     async def on_submit(self, interaction: Interaction):
         from db import AsyncSessionLocal
@@ -311,6 +323,18 @@ class EditScheduleConfigModal(ui.Modal, title="Edit Schedule Configuration"):
                 )
                 return
             
+            # Validate sheet layout
+            sheet_layout = None
+            if self.sheet_layout.value.strip():
+                try:
+                    sheet_layout = SheetLayout.from_json(self.sheet_layout.value).to_json()
+                except (ValueError, TypeError, KeyError, AttributeError):
+                    await interaction.response.send_message(
+                        "❌ Invalid sheet layout. Expected JSON with row_ranges, label_column, first_day_column or date_format.",
+                        ephemeral=True
+                    )
+                    return
+            
             # Fetch config from database
             result = await session.execute(
                 select(ScheduleChannelConfig).where(
@@ -332,6 +356,7 @@ class EditScheduleConfigModal(ui.Modal, title="Edit Schedule Configuration"):
             config.classes_per_day = classes_per_day_value
             config.start_day_index = start_day_index
             config.end_day_index = end_day_index
+            config.sheet_layout = sheet_layout
             config.last_schedule_hash = None  # Reset to force update
             
             await session.commit()
@@ -380,11 +405,20 @@ class ScheduleManagementView(ui.View):
             modal = EditScheduleConfigModal(config.channel_id, config.spreadsheet_url, config.gid, 
                                            getattr(config, 'classes_per_day', 2), 
                                            getattr(config, 'start_day_index', 0), 
-                                           getattr(config, 'end_day_index', 1))
+                                           getattr(config, 'end_day_index', 1),
+                                           getattr(config, 'sheet_layout', None))
             await interaction.response.send_modal(modal)
     
     @ui.button(label="Force Refresh", style=ButtonStyle.grey)
     async def force_refresh(self, interaction: Interaction, button: ui.Button):
+        await self.refresh(interaction, bypass_cache=False)
+    
+    @ui.button(label="Reload Sheet", style=ButtonStyle.grey)
+    async def reload_sheet(self, interaction: Interaction, button: ui.Button):
+        await self.refresh(interaction, bypass_cache=True)
+    
+    async def refresh(self, interaction: Interaction, bypass_cache: bool):
+        """Republish the schedule, optionally downloading the sheet again instead of using the shared cache."""
         from db import AsyncSessionLocal
         
         async with AsyncSessionLocal() as session:
@@ -403,16 +437,18 @@ class ScheduleManagementView(ui.View):
                 )
                 return
             
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            
             # Reset hash to force update
             config.last_schedule_hash = None
             await session.commit()
             
             # Trigger update
             from cogs.schedule import update_schedule_for_channel
-            await update_schedule_for_channel(interaction.client, session, config)
+            await update_schedule_for_channel(interaction.client, session, config, bypass_cache=bypass_cache)
             
-            await interaction.response.send_message(
-                "✅ Schedule refreshed!",
+            await interaction.followup.send(
+                "✅ Schedule reloaded from the spreadsheet!" if bypass_cache else "✅ Schedule refreshed!",
                 ephemeral=True
             )
     
@@ -459,6 +495,11 @@ class ScheduleManagementView(ui.View):
                 value=day_range_display,
                 inline=False
             )
+            embed.add_field(
+                name="Sheet Layout",
+                value=f"`{config.sheet_layout}`" if getattr(config, 'sheet_layout', None) else "Default",
+                inline=False
+            )
             embed.add_field(
                 name="Message ID",
                 value=str(config.message_id) if config.message_id else "Not set yet",
@@ -494,14 +535,11 @@ class ScheduleManagementView(ui.View):
             
             async def confirm_callback(confirm_interaction: Interaction):
                 # Delete the schedule message if it exists
-                if config.message_id:
-                    try:
-                        channel = interaction.guild.get_channel(config.channel_id)
-                        if channel:
-                            message = await channel.fetch_message(config.message_id)
-                            await message.delete()
-                    except:
-                        pass  # Message might already be deleted
+                await message_registry.delete(
+                    interaction.guild.get_channel(config.channel_id),
+                    f"schedule:{config.channel_id}",
+                    config.message_id
+                )
                 
                 await session.delete(config)
                 await session.commit()
@@ -1,3 +1,4 @@
+import asyncio
 import discord
 from discord import ui, ButtonStyle, TextStyle, Interaction, Embed, SelectOption, ChannelType
 from typing import List, Optional
@@ -6,6 +7,12 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models import GradeChannelConfig, Course, Assignment
+from utils.assignment_import import ImportRow, ImportResult, parse_file, validate
+from utils.assignment_snapshot import assignment_snapshots
+from utils.completion_stats import completion_stats
+from utils.message_registry import message_registry
+
+MAX_IMPORT_SIZE = 1024 * 1024  # Bytes
 
 
 # ============================================================================
@@ -33,6 +40,12 @@ class TaskAdminPanel(ui.View):
                 value="add_assignment",
                 emoji="➕"
             ),
+            SelectOption(
+                label="Import Assignments",
+                description="Bulk import assignments from a CSV or ICS file",
+                value="import_assignments",
+                emoji="📥"
+            ),
             SelectOption(
                 label="Edit Assignment",
                 description="Modify an existing assignment",
@@ -145,6 +158,9 @@ class TaskAdminPanel(ui.View):
                 )
                 await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
         
+        elif action == "import_assignments":
+            await self.import_assignments(interaction)
+        
         elif action == "edit_assignment":
             # Use current channel
             async with AsyncSessionLocal() as session:
@@ -387,10 +403,25 @@ class TaskAdminPanel(ui.View):
                         total_assignments += len(course.assignments)
                         active_assignments += len([a for a in course.assignments if a.status == 'active'])
                     
+                    value = (
+                        f"📘 {len(courses)} course(s)\n"
+                        f"📝 {active_assignments}/{total_assignments} active assignments"
+                    )
+                    
+                    # Completion rates of the active assignments (cached aggregate)
+                    snapshot = await assignment_snapshots.get(config.grade_level)
+                    completion = await completion_stats.get(snapshot)
+                    if completion.students and snapshot.assignments:
+                        overall = completion.course_rate(a.id for a in snapshot.assignments)
+                        value += f"\n✅ {overall:.0f}% average completion ({completion.students} students)"
+                        for course in snapshot.courses:
+                            course_ids = [a.id for a in snapshot.assignments if a.course.id == course.id]
+                            if course_ids:
+                                value += f"\n• {course.name}: {completion.course_rate(course_ids):.0f}%"
+                    
                     embed.add_field(
                         name=f"{config.grade_level} - {channel_name}",
-                        value=f"📘 {len(courses)} course(s)\n"
-                              f"📝 {active_assignments}/{total_assignments} active assignments",
+                        value=value[:1024],
                         inline=False
                     )
                 
@@ -444,6 +475,87 @@ class TaskAdminPanel(ui.View):
                 await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
 
+    async def import_assignments(self, interaction: Interaction):
+        """Ask for a CSV/ICS file in the channel, then show a preview of the import."""
+        from db import AsyncSessionLocal
+        
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(GradeChannelConfig).where(
+                    GradeChannelConfig.channel_id == self.channel_id
+                )
+            )
+            if not result.scalar_one_or_none():
+                await interaction.response.send_message(
+                    f"❌ This channel is not configured as a task channel. Use 'Setup task Channel' first.",
+                    ephemeral=True
+                )
+                return
+        
+        embed = Embed(
+            title="📥 Import Assignments",
+            description="Send a **.csv** or **.ics** file in this channel within 2 minutes.\n"
+                        "The message will be deleted once the file has been read.",
+            color=discord.Color.green()
+        )
+        embed.add_field(
+            name="CSV format",
+            value="Columns: `course`, `title`, `due_date` (DD/MM/YYYY HH:MM), optional `description`, `modality`.\n"
+                  "Separator: `,` or `;`",
+            inline=False
+        )
+        embed.add_field(
+            name="ICS format",
+            value="One event per assignment. The course comes from `CATEGORIES` or a `[Course] Title` summary, "
+                  "the due date from `DTEND` (or `DTSTART`).",
+            inline=False
+        )
+        embed.set_footer(text="Courses are matched by name; unknown courses and duplicates are skipped")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        
+        def check(message: discord.Message) -> bool:
+            return (
+                message.author.id == interaction.user.id
+                and message.channel.id == interaction.channel_id
+                and bool(message.attachments)
+            )
+        
+        try:
+            message = await interaction.client.wait_for('message', check=check, timeout=120)
+        except asyncio.TimeoutError:
+            await interaction.followup.send("⏱️ Import cancelled: no file received.", ephemeral=True)
+            return
+        
+        attachment = message.attachments[0]
+        if attachment.size > MAX_IMPORT_SIZE:
+            await interaction.followup.send("❌ File too large (1 MB max).", ephemeral=True)
+            return
+        content = await attachment.read()
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+        
+        parsed = parse_file(attachment.filename, content)
+        
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Course.id, Course.name).where(Course.channel_id == self.channel_id)
+            )
+            courses = {name.lower(): course_id for course_id, name in result.all()}
+            
+            result = await session.execute(
+                select(Assignment.course_id, Assignment.title, Assignment.due_date)
+                .join(Course, Assignment.course_id == Course.id)
+                .where(Course.channel_id == self.channel_id)
+            )
+            existing = [(course_id, title.lower(), due_date) for course_id, title, due_date in result.all()]
+        
+        validated = validate(parsed, courses, existing)
+        view = ImportAssignmentsConfirmView(self.channel_id, validated.rows)
+        await interaction.followup.send(embed=view.create_embed(validated), view=view, ephemeral=True)
+
+
 class SetupChannelSelectView(ui.View):
     """View with channel select for task setup."""
     
@@ -531,6 +643,7 @@ class GradeLevelSelectView(ui.View):
             )
             session.add(config)
             await session.commit()
+            assignment_snapshots.invalidate(self.channel_id)
             
             # Create initial message
             from cogs.task import update_task_message
@@ -657,16 +770,14 @@ class ConfirmRemoveChannelView(ui.View):
             # Delete the configuration (cascade will handle courses and assignments)
             await session.delete(config)
             await session.commit()
+            assignment_snapshots.invalidate(channel_id)
             
             # Try to delete the to-do list message
-            if message_id:
-                try:
-                    channel = interaction.guild.get_channel(channel_id)
-                    if channel:
-                        message = await channel.fetch_message(message_id)
-                        await message.delete()
-                except:
-                    pass  # Message might already be deleted
+            await message_registry.delete(
+                interaction.guild.get_channel(channel_id),
+                f"tasks:{channel_id}",
+                message_id
+            )
             
             embed = Embed(
                 title="✅ Configuration Removed",
@@ -1062,6 +1173,7 @@ class AddAssignmentModal(ui.Modal, title="Add Assignment"):
         
         self.db_session.add(assignment)
         await self.db_session.commit()
+        assignment_snapshots.invalidate(self.course.channel_id)
         
         # Update the to-do list
         result = await self.db_session.execute(
@@ -1087,6 +1199,89 @@ class AddAssignmentModal(ui.Modal, title="Add Assignment"):
             )
 
 
+class ImportAssignmentsConfirmView(ui.View):
+    """Preview of a bulk import with confirmation."""
+    
+    def __init__(self, channel_id: int, rows: List[ImportRow]):
+        super().__init__(timeout=300)
+        self.channel_id = channel_id
+        self.rows = rows
+        if not rows:
+            self.confirm.disabled = True
+    
+    def create_embed(self, result: ImportResult) -> Embed:
+        embed = Embed(
+            title="📥 Import Preview",
+            description=f"**{len(result.rows)}** assignment(s) ready to import into <#{self.channel_id}>.",
+            color=discord.Color.green() if result.rows else discord.Color.red()
+        )
+        
+        if result.rows:
+            lines = [
+                f"• **{row.title}** ({row.course}) - {row.due_date.strftime('%d/%m/%Y %H:%M')}"
+                for row in result.rows[:10]
+            ]
+            if len(result.rows) > 10:
+                lines.append(f"... and {len(result.rows) - 10} more")
+            embed.add_field(name="Assignments", value="\n".join(lines)[:1024], inline=False)
+        
+        if result.duplicates:
+            embed.add_field(name="Skipped", value=f"{result.duplicates} duplicate(s)", inline=False)
+        
+        if result.errors:
+            lines = [f"Line {line}: {message}" if line else message for line, message in result.errors[:10]]
+            if len(result.errors) > 10:
+                lines.append(f"... and {len(result.errors) - 10} more")
+            embed.add_field(name=f"⚠️ {len(result.errors)} error(s)", value="\n".join(lines)[:1024], inline=False)
+        
+        return embed
+    
+    @ui.button(label="Import", style=ButtonStyle.success, emoji="📥")
+    async def confirm(self, interaction: Interaction, button: ui.Button):
+        from db import AsyncSessionLocal
+        
+        await interaction.response.defer(ephemeral=True)
+        for item in self.children:
+            item.disabled = True
+        await interaction.edit_original_response(view=self)
+        
+        async with AsyncSessionLocal() as session:
+            # Single transaction for the whole import
+            session.add_all([
+                Assignment(
+                    title=row.title,
+                    description=row.description,
+                    due_date=row.due_date,
+                    modality=row.modality,
+                    status='active',
+                    course_id=row.course_id
+                )
+                for row in self.rows
+            ])
+            await session.commit()
+            assignment_snapshots.invalidate(self.channel_id)
+            
+            # Refresh the to-do list once
+            result = await session.execute(
+                select(GradeChannelConfig).where(GradeChannelConfig.channel_id == self.channel_id)
+            )
+            config = result.scalar_one_or_none()
+            if config:
+                from cogs.task import update_task_message
+                await update_task_message(interaction.client, session, config)
+        
+        await interaction.followup.send(
+            f"✅ {len(self.rows)} assignment(s) imported into <#{self.channel_id}>!",
+            ephemeral=True
+        )
+    
+    @ui.button(label="Cancel", style=ButtonStyle.secondary)
+    async def cancel(self, interaction: Interaction, button: ui.Button):
+        for item in self.children:
+            item.disabled = True
+        await interaction.response.edit_message(content="Import cancelled.", view=self)
+
+
 class EditAssignmentSelect(ui.View):
     """View for selecting an assignment to edit."""
     
@@ -1176,6 +1371,7 @@ class EditAssignmentModal(ui.Modal, title="Edit Assignment"):
         self.assignment.description = self.description.value if self.description.value else None
         
         await self.db_session.commit()
+        assignment_snapshots.invalidate(self.course.channel_id)
         
         # Update to-do list
         result = await self.db_session.execute(
@@ -1318,6 +1514,7 @@ class AddCourseModal(ui.Modal, title="Add Course"):
             )
             session.add(course)
             await session.commit()
+            assignment_snapshots.invalidate(self.channel_id)
             
             # Update the main message
             result = await session.execute(
@@ -1417,6 +1614,7 @@ class EditCourseModal(ui.Modal, title="Edit Course"):
         self.course.course_channel_id = course_channel_id
         
         await self.db_session.commit()
+        assignment_snapshots.invalidate(self.course.channel_id)
         
         # Update to-do list
         result = await self.db_session.execute(
@@ -1491,6 +1689,7 @@ class ConfirmDeleteView(ui.View):
         # Delete the item
         await self.db_session.delete(self.item)
         await self.db_session.commit()
+        assignment_snapshots.invalidate(self.channel_id)
         
         # Update to-do list
         result = await self.db_session.execute(
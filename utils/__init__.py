@@ -42,6 +42,7 @@ def send_email(subject, body, to_email):
 
     msg.attach(MIMEText(body, 'html'))
 
+    server = None
     try:
         # Connect to the server
         server = smtplib.SMTP("smtp.gmail.com", 587)
@@ -58,8 +59,9 @@ def send_email(subject, body, to_email):
         print(f"Failed to send email: {e}")
 
     finally:
-        # Close the connection
-        server.quit()
+        # Close the connection (not opened if the connection itself failed)
+        if server is not None:
+            server.quit()
 
 def create_jwt(email):
     expiration = datetime.now(timezone.utc) + timedelta(hours=1)
@@ -0,0 +1,240 @@
+"""
+Parsing and validation of bulk assignment imports (CSV or ICS files).
+"""
+import csv
+import io
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pytz
+
+
+DATE_FORMAT = "%d/%m/%Y %H:%M"  # Same format as the Add Assignment modal
+LOCAL_TZ = pytz.timezone("Europe/Paris")
+MAX_ROWS = 500
+
+# Accepted CSV header names (lowercase) for each field
+CSV_HEADERS = {
+    'course': ('course', 'cours'),
+    'title': ('title', 'titre'),
+    'due_date': ('due_date', 'due', 'date', 'échéance'),
+    'description': ('description',),
+    'modality': ('modality', 'modalité'),
+}
+
+
+@dataclass
+class ImportRow:
+    """An assignment read from the import file."""
+    line: int
+    course: str
+    title: str
+    due_date: datetime
+    description: Optional[str] = None
+    modality: Optional[str] = None
+    course_id: Optional[int] = None
+
+
+@dataclass
+class ImportResult:
+    rows: List[ImportRow]
+    errors: List[Tuple[int, str]]  # (line, message)
+    duplicates: int = 0
+
+
+def _clean(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip()
+    return value or None
+
+
+def parse_csv(data: str) -> ImportResult:
+    """
+    Parse a CSV file with course, title and due date columns (description and modality optional).
+    Dates use the DD/MM/YYYY HH:MM format.
+    """
+    try:
+        dialect = csv.Sniffer().sniff(data[:2048], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(data), dialect=dialect)
+
+    columns = {}
+    for name in reader.fieldnames or []:
+        key = name.strip().lower()
+        for field, aliases in CSV_HEADERS.items():
+            if key in aliases:
+                columns[field] = name
+    missing = [field for field in ('course', 'title', 'due_date') if field not in columns]
+    if missing:
+        return ImportResult(rows=[], errors=[(1, f"Missing column(s): {', '.join(missing)}")])
+
+    rows, errors = [], []
+    for line, record in enumerate(reader, start=2):
+        course = _clean(record.get(columns['course']))
+        title = _clean(record.get(columns['title']))
+        due_raw = _clean(record.get(columns['due_date']))
+        if not (course or title or due_raw):
+            continue  # Blank line
+        if not course or not title or not due_raw:
+            errors.append((line, "Course, title and due date are required"))
+            continue
+        try:
+            due_date = datetime.strptime(due_raw, DATE_FORMAT)
+        except ValueError:
+            errors.append((line, f"Invalid date `{due_raw}` (expected DD/MM/YYYY HH:MM)"))
+            continue
+        rows.append(ImportRow(
+            line=line,
+            course=course,
+            title=title,
+            due_date=due_date,
+            description=_clean(record.get(columns['description'])) if 'description' in columns else None,
+            modality=_clean(record.get(columns['modality'])) if 'modality' in columns else None,
+        ))
+    return ImportResult(rows=rows, errors=errors)
+
+
+def _unescape(value: str) -> str:
+    return (
+        value.replace('\\n', '\n').replace('\\N', '\n')
+        .replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+    )
+
+
+def _parse_ics_datetime(value: str, params: Dict[str, str]) -> datetime:
+    """Parse a DATE or DATE-TIME value into a naive Europe/Paris datetime."""
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d").replace(hour=23, minute=59)
+    if value.endswith('Z'):
+        utc = pytz.utc.localize(datetime.strptime(value, "%Y%m%dT%H%M%SZ"))
+        return utc.astimezone(LOCAL_TZ).replace(tzinfo=None)
+    parsed = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    tzid = params.get('TZID')
+    if tzid and tzid in pytz.all_timezones_set and tzid != LOCAL_TZ.zone:
+        return pytz.timezone(tzid).localize(parsed).astimezone(LOCAL_TZ).replace(tzinfo=None)
+    return parsed
+
+
+SUMMARY_COURSE = re.compile(r"^\[(?P<course>[^\]]+)\]\s*(?P<title>.+)$")
+
+
+def parse_ics(data: str) -> ImportResult:
+    """
+    Parse VEVENTs of an ICS file. The course comes from CATEGORIES or a "[Course] Title" summary;
+    the due date is DTEND (or DTSTART when there is no end).
+    """
+    # Unfold continuation lines
+    lines = re.sub(r"\r?\n[ \t]", "", data).splitlines()
+
+    rows, errors = [], []
+    event: Optional[Dict[str, Tuple[str, Dict[str, str]]]] = None
+    event_line = 0
+    for number, line in enumerate(lines, start=1):
+        if line == "BEGIN:VEVENT":
+            event, event_line = {}, number
+            continue
+        if event is None:
+            continue
+        if line == "END:VEVENT":
+            row = _event_to_row(event, event_line, errors)
+            if row:
+                rows.append(row)
+            event = None
+            continue
+
+        name_part, _, value = line.partition(':')
+        name, *raw_params = name_part.split(';')
+        params = dict(p.split('=', 1) for p in raw_params if '=' in p)
+        event[name.upper()] = (value, params)
+
+    return ImportResult(rows=rows, errors=errors)
+
+
+def _event_to_row(event: Dict[str, Tuple[str, Dict[str, str]]], line: int,
+                  errors: List[Tuple[int, str]]) -> Optional[ImportRow]:
+    summary = _unescape(event.get('SUMMARY', ("", {}))[0]).strip()
+    course = _unescape(event.get('CATEGORIES', ("", {}))[0]).split(',')[0].strip()
+    match = SUMMARY_COURSE.match(summary)
+    if match:
+        course = course or match.group('course').strip()
+        summary = match.group('title').strip()
+
+    due_value = event.get('DTEND') or event.get('DTSTART')
+    if not summary or not course or not due_value:
+        errors.append((line, "Event needs a summary, a course (CATEGORIES or \"[Course] Title\") and a date"))
+        return None
+    try:
+        due_date = _parse_ics_datetime(*due_value)
+    except ValueError:
+        errors.append((line, f"Invalid date `{due_value[0]}`"))
+        return None
+
+    description = _clean(_unescape(event.get('DESCRIPTION', ("", {}))[0]))
+    modality = None
+    if description:
+        # Descriptions exported by /calendar export end with "Modalité : ..."
+        kept = []
+        for part in description.split('\n'):
+            if part.startswith("Modalité : "):
+                modality = _clean(part[len("Modalité : "):])
+            else:
+                kept.append(part)
+        description = _clean('\n'.join(kept))
+
+    return ImportRow(line=line, course=course, title=summary, due_date=due_date,
+                     description=description, modality=modality)
+
+
+def parse_file(filename: str, content: bytes) -> ImportResult:
+    """Parse an uploaded file according to its extension (.csv or .ics)."""
+    try:
+        data = content.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        data = content.decode('latin-1')
+
+    if filename.lower().endswith('.ics'):
+        return parse_ics(data)
+    if filename.lower().endswith('.csv'):
+        return parse_csv(data)
+    return ImportResult(rows=[], errors=[(0, "Unsupported file type (use .csv or .ics)")])
+
+
+def validate(result: ImportResult, courses: Dict[str, int],
+             existing: Iterable[Tuple[int, str, datetime]]) -> ImportResult:
+    """
+    Match courses by name (case-insensitive) and drop invalid or duplicate rows.
+
+    Args:
+        result: Parsed import
+        courses: Course IDs keyed by lowercase course name
+        existing: (course_id, lowercase title, due date) of assignments already in the channel
+    """
+    seen: Set[Tuple[int, str, datetime]] = set(existing)
+    rows, errors, duplicates = [], list(result.errors), 0
+
+    if len(result.rows) > MAX_ROWS:
+        errors.append((0, f"Only the first {MAX_ROWS} assignments are imported"))
+
+    for row in result.rows[:MAX_ROWS]:
+        course_id = courses.get(row.course.lower())
+        if course_id is None:
+            errors.append((row.line, f"Unknown course `{row.course}`"))
+            continue
+        if len(row.title) > 300:
+            errors.append((row.line, "Title longer than 300 characters"))
+            continue
+        if row.modality and len(row.modality) > 100:
+            errors.append((row.line, "Modality longer than 100 characters"))
+            continue
+
+        key = (course_id, row.title.lower(), row.due_date)
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        row.course_id = course_id
+        rows.append(row)
+
+    return ImportResult(rows=rows, errors=errors, duplicates=duplicates)
@@ -0,0 +1,167 @@
+"""
+Shared in-memory snapshot of the active assignments of each grade.
+Built once from the database and reused by the task board, My Tasks and reminders
+until a write invalidates it.
+"""
+import asyncio
+import itertools
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from db import AsyncSessionLocal
+from db.constants import AssignmentStatus
+from db.models import GradeChannelConfig
+
+
+SortKey = Tuple[datetime, int]  # (due_date, id)
+
+
+@dataclass(frozen=True)
+class CourseEntry:
+    id: int
+    name: str
+    course_channel_id: Optional[int]
+
+
+@dataclass(frozen=True)
+class AssignmentEntry:
+    id: int
+    title: str
+    description: Optional[str]
+    due_date: datetime
+    modality: Optional[str]
+    course: CourseEntry
+
+    @property
+    def sort_key(self) -> SortKey:
+        return (self.due_date, self.id)
+
+
+@dataclass(frozen=True)
+class GradeSnapshot:
+    """Immutable view of a grade: its courses and active assignments sorted by (due_date, id)."""
+    grade_level: str
+    channel_id: Optional[int]  # Task to-do channel (None if the grade is not configured)
+    version: int
+    courses: Tuple[CourseEntry, ...]
+    assignments: Tuple[AssignmentEntry, ...]
+    keys: Tuple[SortKey, ...]
+
+    def by_course(self) -> Dict[int, List[AssignmentEntry]]:
+        """Active assignments grouped by course ID (each list sorted by due date)."""
+        grouped: Dict[int, List[AssignmentEntry]] = {}
+        for assignment in self.assignments:
+            grouped.setdefault(assignment.course.id, []).append(assignment)
+        return grouped
+
+    def count(self, course_id: Optional[int] = None) -> int:
+        if course_id is None:
+            return len(self.assignments)
+        return sum(1 for a in self.assignments if a.course.id == course_id)
+
+    def page(self, after: Optional[SortKey], limit: int, course_id: Optional[int] = None,
+             exclude: Optional[Set[int]] = None) -> Tuple[List[AssignmentEntry], bool]:
+        """
+        Keyset page of assignments strictly after a (due_date, id) cursor.
+
+        Returns:
+            Tuple of (assignments of the page, whether a next page exists)
+        """
+        start = bisect_right(self.keys, after) if after is not None else 0
+        items = []
+        for assignment in self.assignments[start:]:
+            if course_id is not None and assignment.course.id != course_id:
+                continue
+            if exclude and assignment.id in exclude:
+                continue
+            items.append(assignment)
+            if len(items) > limit:
+                return items[:limit], True
+        return items, False
+
+
+class AssignmentSnapshots:
+    """Per-grade snapshot cache with explicit invalidation."""
+
+    def __init__(self):
+        self._snapshots: Dict[str, GradeSnapshot] = {}
+        self._generation = 0  # Bumped on every invalidation
+        self._versions = itertools.count(1)
+        self._lock = asyncio.Lock()
+
+    async def get(self, grade_level) -> GradeSnapshot:
+        """Get the snapshot of a grade, building it on first use."""
+        key = grade_level.value if hasattr(grade_level, 'value') else str(grade_level)
+        snapshot = self._snapshots.get(key)
+        if snapshot:
+            return snapshot
+
+        async with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot:
+                return snapshot
+
+            generation = self._generation
+            snapshot = await self._build(key)
+            # Do not cache a snapshot that was invalidated while it was being built
+            if generation == self._generation:
+                self._snapshots[key] = snapshot
+            return snapshot
+
+    def invalidate(self, channel_id: Optional[int] = None) -> None:
+        """
+        Drop cached snapshots after a write.
+
+        Args:
+            channel_id: Task to-do channel whose grade changed (None drops every snapshot)
+        """
+        self._generation += 1
+        if channel_id is None:
+            self._snapshots.clear()
+            return
+        for key, snapshot in list(self._snapshots.items()):
+            if snapshot.channel_id in (channel_id, None):
+                del self._snapshots[key]
+
+    async def _build(self, grade_level: str) -> GradeSnapshot:
+        async with AsyncSessionLocal() as session:
+            # Courses and their assignments are loaded through the selectin relationships
+            result = await session.execute(
+                select(GradeChannelConfig).where(GradeChannelConfig.grade_level == grade_level)
+            )
+            config = result.scalar_one_or_none()
+
+            courses = []
+            assignments = []
+            if config:
+                for course in sorted(config.courses, key=lambda c: c.id):
+                    entry = CourseEntry(id=course.id, name=course.name, course_channel_id=course.course_channel_id)
+                    courses.append(entry)
+                    assignments.extend(
+                        AssignmentEntry(
+                            id=a.id,
+                            title=a.title,
+                            description=a.description,
+                            due_date=a.due_date,
+                            modality=a.modality,
+                            course=entry
+                        )
+                        for a in course.assignments if a.status == AssignmentStatus.ACTIVE
+                    )
+
+        assignments.sort(key=lambda a: a.sort_key)
+        return GradeSnapshot(
+            grade_level=grade_level,
+            channel_id=config.channel_id if config else None,
+            version=next(self._versions),
+            courses=tuple(courses),
+            assignments=tuple(assignments),
+            keys=tuple(a.sort_key for a in assignments),
+        )
+
+
+assignment_snapshots = AssignmentSnapshots()
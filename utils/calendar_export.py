@@ -0,0 +1,174 @@
+"""
+Per-grade ICS calendar exports.
+Each grade has a persistent calendar file built from two parts (schedule and assignments);
+a part is only regenerated when the hash of its source changed (the exported days of the parsed
+sheet / GradeChannelConfig.content_hash).
+"""
+import asyncio
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from db import AsyncSessionLocal, DB_DIR
+from db.constants import GradeLevel, AssignmentStatus
+from db.models import CalendarExport, ScheduleChannelConfig, GradeChannelConfig, Assignment, Course
+from .ics import build_calendar, schedule_events, assignment_events
+from .schedule_model import ScheduleIndex, SheetLayout, DEFAULT_LAYOUT
+from .schedule_source import schedule_source
+
+
+CALENDAR_DIR = os.path.join(DB_DIR, 'calendars')
+
+SourceHashes = Tuple[Optional[str], Optional[str]]  # (schedule hash, tasks hash)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read(path: str) -> Optional[bytes]:
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _layout(config: ScheduleChannelConfig) -> SheetLayout:
+    try:
+        return SheetLayout.from_json(config.sheet_layout)
+    except (ValueError, TypeError, KeyError):
+        return DEFAULT_LAYOUT
+
+
+def schedule_hash(config: ScheduleChannelConfig, layout: SheetLayout, index: ScheduleIndex) -> str:
+    """Hash of everything the schedule part exports: the configured days of every parsed week."""
+    days = [
+        [day.date.isoformat(), [[slot.course, slot.teacher, slot.room] for slot in day.slots]]
+        for week_start in sorted(index.weeks)
+        for day in index.weeks[week_start].days_between(config.start_day_index, config.end_day_index)
+    ]
+    payload = [config.grade_level.value, layout.to_json(), days]
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+class CalendarExporter:
+    """Keeps grade calendars on disk and in memory, rebuilding only stale parts."""
+
+    def __init__(self, directory: str = CALENDAR_DIR):
+        self.directory = directory
+        self._cache: Dict[GradeLevel, Tuple[SourceHashes, bytes]] = {}
+        self._locks: Dict[GradeLevel, asyncio.Lock] = {}
+
+    def calendar_path(self, grade_level: GradeLevel) -> str:
+        return os.path.join(self.directory, f"{grade_level.value}.ics")
+
+    def _part_path(self, grade_level: GradeLevel, part: str) -> str:
+        return os.path.join(self.directory, f"{grade_level.value}-{part}.part")
+
+    @staticmethod
+    def _render_schedule(config: ScheduleChannelConfig, layout: SheetLayout, index: ScheduleIndex) -> str:
+        return "\r\n".join(schedule_events(
+            index, config.grade_level.value, layout, config.start_day_index, config.end_day_index
+        ))
+
+    async def _render_tasks(self, session, config: Optional[GradeChannelConfig]) -> str:
+        if not config:
+            return ""
+        result = await session.execute(
+            select(Assignment)
+            .join(Course, Assignment.course_id == Course.id)
+            .where(Course.channel_id == config.channel_id, Assignment.status == AssignmentStatus.ACTIVE)
+            .options(selectinload(Assignment.course))
+        )
+        return "\r\n".join(assignment_events(result.scalars().all()))
+
+    async def get_calendar(self, grade_level: GradeLevel) -> bytes:
+        """
+        Get the ICS calendar of a grade, regenerating only the parts whose source changed.
+
+        Returns:
+            The encoded calendar file content
+        """
+        lock = self._locks.setdefault(grade_level, asyncio.Lock())
+        async with lock:
+            async with AsyncSessionLocal() as session:
+                schedule_config = (await session.execute(
+                    select(ScheduleChannelConfig).where(ScheduleChannelConfig.grade_level == grade_level)
+                )).scalar_one_or_none()
+                grade_config = (await session.execute(
+                    select(GradeChannelConfig).where(GradeChannelConfig.grade_level == grade_level)
+                )).scalar_one_or_none()
+
+                export = await session.get(CalendarExport, grade_level)
+                stored = (export.schedule_hash, export.tasks_hash) if export else (None, None)
+
+                # The sheet export is cached by the schedule source, so this is rarely a download
+                layout = index = None
+                current_schedule_hash = None
+                if schedule_config:
+                    layout = _layout(schedule_config)
+                    try:
+                        index = await schedule_source.get_index(
+                            schedule_config.spreadsheet_url, schedule_config.gid,
+                            schedule_config.classes_per_day, layout
+                        )
+                        current_schedule_hash = schedule_hash(schedule_config, layout, index)
+                    except Exception as e:
+                        # Keep serving the previous schedule part, retry on the next request
+                        print(f"Error exporting {grade_level.value} schedule: {e}")
+                        current_schedule_hash = stored[0]
+
+                hashes = (current_schedule_hash, grade_config.content_hash if grade_config else None)
+                cached = self._cache.get(grade_level)
+                if cached and cached[0] == hashes:
+                    return cached[1]
+
+                # Calendar file still matches both sources (e.g. after a restart)
+                if export and stored == hashes:
+                    data = _read(self.calendar_path(grade_level))
+                    if data is not None:
+                        self._cache[grade_level] = (hashes, data)
+                        return data
+
+                os.makedirs(self.directory, exist_ok=True)
+                schedule_path = self._part_path(grade_level, 'schedule')
+                tasks_path = self._part_path(grade_level, 'tasks')
+
+                schedule_part = _read(schedule_path) if export and stored[0] == hashes[0] else None
+                if schedule_part is None:
+                    if index is not None:
+                        schedule_part = self._render_schedule(schedule_config, layout, index).encode('utf-8')
+                        _write_atomic(schedule_path, schedule_part)
+                    else:
+                        schedule_part = b""  # No schedule configured, or not fetched yet
+
+                tasks_part = _read(tasks_path) if export and stored[1] == hashes[1] else None
+                if tasks_part is None:
+                    tasks_part = (await self._render_tasks(session, grade_config)).encode('utf-8')
+                    _write_atomic(tasks_path, tasks_part)
+
+                data = build_calendar(
+                    f"Deadbeef {grade_level.value}",
+                    [schedule_part.decode('utf-8'), tasks_part.decode('utf-8')]
+                )
+                _write_atomic(self.calendar_path(grade_level), data)
+
+                if export:
+                    export.schedule_hash, export.tasks_hash = hashes
+                else:
+                    session.add(CalendarExport(grade_level=grade_level, schedule_hash=hashes[0], tasks_hash=hashes[1]))
+                await session.commit()
+
+                self._cache[grade_level] = (hashes, data)
+                return data
+
+
+calendar_exporter = CalendarExporter()
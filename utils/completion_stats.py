@@ -0,0 +1,177 @@
+"""
+Completion rates of the active assignments, per assignment and per course.
+Counts come from one GROUP BY over user_assignment_progress and are then kept up to date
+incrementally from the My Tasks toggles actually written by the progress writer.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, Set, Tuple
+
+from sqlalchemy import select, func, and_
+
+from db import AsyncSessionLocal
+from db.constants import AssignmentStatus, UserType
+from db.models import Assignment, AuthenticatedUser, Course, UserAssignmentProgress
+from utils.assignment_snapshot import GradeSnapshot
+
+logger = logging.getLogger(__name__)
+
+STATS_TTL_SECONDS = 900  # Picks up newly authenticated students
+
+ProgressKey = Tuple[int, int]  # (user_id, assignment_id)
+
+
+@dataclass
+class GradeCompletion:
+    """Completion counts of the active assignments of a grade."""
+    grade_level: str
+    version: int  # Snapshot version the counts were built for
+    students: int  # Authenticated students of the grade
+    assignment_ids: FrozenSet[int]
+    completed: Dict[int, int]  # Completions by students of the grade, keyed by assignment ID
+    built_at: float = field(default_factory=time.monotonic)
+
+    def count(self, assignment_id: int) -> int:
+        return self.completed.get(assignment_id, 0)
+
+    def rate(self, assignment_id: int) -> float:
+        """Completion percentage of an assignment."""
+        if not self.students:
+            return 0.0
+        return min(100.0, self.count(assignment_id) / self.students * 100)
+
+    def course_rate(self, assignment_ids: Iterable[int]) -> float:
+        """Completion percentage over several assignments (e.g. the active ones of a course)."""
+        ids = list(assignment_ids)
+        if not self.students or not ids:
+            return 0.0
+        done = sum(self.count(assignment_id) for assignment_id in ids)
+        return min(100.0, done / (self.students * len(ids)) * 100)
+
+
+class CompletionStats:
+    """Per-grade completion counts cache."""
+
+    def __init__(self, ttl: float = STATS_TTL_SECONDS):
+        self.ttl = ttl
+        self._grades: Dict[str, GradeCompletion] = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, snapshot: GradeSnapshot) -> GradeCompletion:
+        """Get the completion counts matching a grade snapshot, rebuilding them when stale."""
+        stats = self._grades.get(snapshot.grade_level)
+        if self._is_fresh(stats, snapshot):
+            return stats
+
+        async with self._lock:
+            stats = self._grades.get(snapshot.grade_level)
+            if self._is_fresh(stats, snapshot):
+                return stats
+            stats = await self._build(snapshot)
+            self._grades[snapshot.grade_level] = stats
+            return stats
+
+    def _is_fresh(self, stats, snapshot: GradeSnapshot) -> bool:
+        return (
+            stats is not None
+            and stats.version == snapshot.version
+            and time.monotonic() - stats.built_at < self.ttl
+        )
+
+    async def _build(self, snapshot: GradeSnapshot) -> GradeCompletion:
+        students = (
+            select(func.count(AuthenticatedUser.user_id))
+            .where(
+                AuthenticatedUser.user_type == UserType.STUDENT,
+                AuthenticatedUser.grade_level == snapshot.grade_level
+            )
+            .scalar_subquery()
+        )
+        # Only completions by students of the grade are counted
+        query = (
+            select(Assignment.id, func.count(AuthenticatedUser.user_id), students)
+            .join(Course, Course.id == Assignment.course_id)
+            .outerjoin(UserAssignmentProgress, UserAssignmentProgress.assignment_id == Assignment.id)
+            .outerjoin(
+                AuthenticatedUser,
+                and_(
+                    AuthenticatedUser.user_id == UserAssignmentProgress.user_id,
+                    AuthenticatedUser.user_type == UserType.STUDENT,
+                    AuthenticatedUser.grade_level == snapshot.grade_level
+                )
+            )
+            .where(
+                Course.channel_id == snapshot.channel_id,
+                Assignment.status == AssignmentStatus.ACTIVE
+            )
+            .group_by(Assignment.id)
+        )
+
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(query)).all()
+            if rows:
+                student_count = rows[0][2]
+            else:
+                student_count = (await session.execute(select(students))).scalar() or 0
+
+        return GradeCompletion(
+            grade_level=snapshot.grade_level,
+            version=snapshot.version,
+            students=student_count,
+            assignment_ids=frozenset(a.id for a in snapshot.assignments),
+            completed={assignment_id: count for assignment_id, count, _ in rows if count},
+        )
+
+    async def apply(self, added: Iterable[ProgressKey], removed: Iterable[ProgressKey]) -> None:
+        """
+        Apply progress rows that were actually inserted or deleted to the cached counts.
+
+        Args:
+            added: (user_id, assignment_id) rows inserted
+            removed: (user_id, assignment_id) rows deleted
+        """
+        changes = [(key, 1) for key in added] + [(key, -1) for key in removed]
+        # Only assignments of cached grades matter
+        changes = [
+            (key, delta) for key, delta in changes
+            if any(key[1] in stats.assignment_ids for stats in self._grades.values())
+        ]
+        if not changes:
+            return
+
+        # One lookup of the grade of the students involved
+        user_ids: Set[int] = {user_id for (user_id, _), _ in changes}
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(AuthenticatedUser.user_id, AuthenticatedUser.grade_level).where(
+                        AuthenticatedUser.user_id.in_(user_ids),
+                        AuthenticatedUser.user_type == UserType.STUDENT
+                    )
+                )
+                grades = {
+                    user_id: grade.value if hasattr(grade, 'value') else str(grade)
+                    for user_id, grade in result.all()
+                }
+        except Exception as e:
+            logger.warning(f"Dropping cached completion stats: {e}")
+            self._grades.clear()
+            return
+
+        for (user_id, assignment_id), delta in changes:
+            stats = self._grades.get(grades.get(user_id))
+            if stats is None or assignment_id not in stats.assignment_ids:
+                continue
+            count = stats.completed.get(assignment_id, 0) + delta
+            if count > 0:
+                stats.completed[assignment_id] = count
+            else:
+                stats.completed.pop(assignment_id, None)
+
+    def invalidate(self) -> None:
+        self._grades.clear()
+
+
+completion_stats = CompletionStats()
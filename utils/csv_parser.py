@@ -1,10 +1,13 @@
 """
 CSV Parser for student data.
 Reads M1/M2 FI/FA student lists from CSV files.
+Lookups go through the students roster table (utils.roster_store).
 """
 import csv
 from typing import List, Dict, Optional, Tuple
 
+from .roster_store import find_student, list_students
+
 
 def read_student_csv(file_path: str) -> Tuple[List[str], List[List[str]]]:
     """
@@ -26,10 +29,10 @@ def read_student_csv(file_path: str) -> Tuple[List[str], List[List[str]]]:
     return headers, data
 
 
-def find_student_by_id(student_id: str, grade_level: str = 'M1') -> Optional[Dict[str, str]]:
+async def find_student_by_id(student_id: str, grade_level: str = 'M1') -> Optional[Dict[str, str]]:
     """
     Find a student by their student ID.
-    Searches in both FI and FA lists for the given grade level.
+    Searches in both FI and FA lists for the given grade level (indexed roster table).
     
     Args:
         student_id: Student number (e.g., "22107880")
@@ -39,53 +42,10 @@ def find_student_by_id(student_id: str, grade_level: str = 'M1') -> Optional[Dic
         Dict with student info or None if not found.
         Contains: student_id, first_name, last_name, email, formation_type, grade_level
     """
-    grade_lower = grade_level.lower()
-    
-    # Define file paths for each grade/formation combination
-    files = {
-        ('M1', 'FI'): 'assets/m1_fi.csv',
-        ('M1', 'FA'): 'assets/m1_fa.csv',
-        ('M2', 'FI'): 'assets/m2_fi.csv',
-        ('M2', 'FA'): 'assets/m2_fa.csv',
-    }
-    
-    # Search in both FI and FA for the given grade level
-    for formation_type in ['FI', 'FA']:
-        key = (grade_level.upper(), formation_type)
-        if key not in files:
-            continue
-        
-        try:
-            headers, rows = read_student_csv(files[key])
-            
-            # Find the column indices
-            id_idx = headers.index('N° étudiant')
-            nom_idx = headers.index('Nom')
-            prenom_idx = headers.index('Prénom')
-            email_idx = headers.index('Email')
-            
-            # Search for the student
-            for row in rows:
-                if len(row) > id_idx and row[id_idx].strip() == student_id.strip():
-                    return {
-                        'student_id': row[id_idx],
-                        'first_name': row[prenom_idx],
-                        'last_name': row[nom_idx],
-                        'email': f"{row[email_idx]}@etu.u-paris.fr",
-                        'formation_type': formation_type,
-                        'grade_level': grade_level.upper()
-                    }
-        except FileNotFoundError:
-            # File doesn't exist, continue to next
-            continue
-        except (ValueError, IndexError):
-            # CSV structure issue, continue to next
-            continue
-    
-    return None
+    return await find_student(student_id, grade_level)
 
 
-def get_all_students(grade_level: Optional[str] = None) -> List[Dict[str, str]]:
+async def get_all_students(grade_level: Optional[str] = None) -> List[Dict[str, str]]:
     """
     Get all students, optionally filtered by grade level.
     
@@ -95,39 +55,4 @@ def get_all_students(grade_level: Optional[str] = None) -> List[Dict[str, str]]:
     Returns:
         List of student dicts
     """
-    students = []
-    
-    files = {
-        ('M1', 'FI'): 'assets/m1_fi.csv',
-        ('M1', 'FA'): 'assets/m1_fa.csv',
-        ('M2', 'FI'): 'assets/m2_fi.csv',
-        ('M2', 'FA'): 'assets/m2_fa.csv',
-    }
-    
-    for (grade, formation), file_path in files.items():
-        if grade_level and grade != grade_level.upper():
-            continue
-        
-        try:
-            headers, rows = read_student_csv(file_path)
-            
-            id_idx = headers.index('N° étudiant')
-            nom_idx = headers.index('Nom')
-            prenom_idx = headers.index('Prénom')
-            email_idx = headers.index('Email')
-            
-            for row in rows:
-                if len(row) > id_idx:
-                    students.append({
-                        'student_id': row[id_idx],
-                        'first_name': row[prenom_idx],
-                        'last_name': row[nom_idx],
-                        'email': f"{row[email_idx]}@etu.u-paris.fr",
-                        'formation_type': formation,
-                        'grade_level': grade
-                    })
-        except (FileNotFoundError, ValueError, IndexError):
-            continue
-    
-    return students
-
+    return await list_students(grade_level)
@@ -0,0 +1,82 @@
+"""
+Rate-limit-aware queue for direct messages.
+A few workers send DMs with a pause between sends, so bursts of reminders stay well below
+Discord's DM limits; transient failures are retried with exponential backoff.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+DM_CONCURRENCY = 3
+DM_INTERVAL_SECONDS = 1.0  # Pause of each worker between two sends
+DM_MAX_ATTEMPTS = 3
+
+
+@dataclass
+class DMJob:
+    user_id: int
+    content: str
+    attempts: int = 0
+
+
+class DMQueue:
+    """Bounded-concurrency DM sender with retry."""
+
+    def __init__(self, concurrency: int = DM_CONCURRENCY, interval: float = DM_INTERVAL_SECONDS,
+                 max_attempts: int = DM_MAX_ATTEMPTS):
+        self.concurrency = concurrency
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.bot: Optional[discord.Client] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+
+    def start(self, bot: discord.Client) -> None:
+        """Start the workers (no-op if already running)."""
+        self.bot = bot
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """Stop the workers; queued messages are dropped."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def enqueue(self, user_id: int, content: str) -> None:
+        self._queue.put_nowait(DMJob(user_id=user_id, content=content))
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._deliver(job)
+            except Exception as e:
+                logger.error(f"Unexpected error sending DM to {job.user_id}: {e}")
+            finally:
+                self._queue.task_done()
+            await asyncio.sleep(self.interval)
+
+    async def _deliver(self, job: DMJob) -> None:
+        try:
+            user = self.bot.get_user(job.user_id) or await self.bot.fetch_user(job.user_id)
+            await user.send(job.content)
+        except (discord.Forbidden, discord.NotFound):
+            return  # DMs closed or unknown user: nothing to retry
+        except discord.HTTPException as e:
+            job.attempts += 1
+            if job.attempts >= self.max_attempts:
+                logger.warning(f"Giving up DM to {job.user_id} after {job.attempts} attempts: {e}")
+                return
+            delay = getattr(e, 'retry_after', None) or 5 * 2 ** job.attempts
+            asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, job)
+
+
+dm_queue = DMQueue()
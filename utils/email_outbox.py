@@ -0,0 +1,274 @@
+"""
+Persistent email outbox drained by a pool of SMTP workers.
+Emails are stored before being sent, so a slow or unreachable SMTP server never blocks the
+bot and nothing is lost on restart. Each worker keeps its authenticated SMTP connection open
+between emails; the blocking smtplib calls run in threads.
+
+Settings (environment): SMTP_HOST, SMTP_PORT, SMTP_STARTTLS, EMAIL_ADDRESS, EMAIL_PASSWORD.
+For local testing, point SMTP_HOST/SMTP_PORT to a stand-in such as
+`python -m aiosmtpd -n -l localhost:1025` with SMTP_STARTTLS=0.
+"""
+import asyncio
+import logging
+import os
+import smtplib
+import time
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, select, update
+
+from db import AsyncSessionLocal
+from db.constants import EmailStatus
+from db.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+SMTP_WORKERS = 2
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30  # 30s, 1min, 2min, 4min between attempts
+POLL_SECONDS = 30  # Wake-up interval to pick up retries
+IDLE_CHECK_SECONDS = 60  # Check idle connections with NOOP before reusing them
+RETENTION_DAYS = 7  # Sent/failed rows are kept this long for diagnosis (without their body)
+
+StatusCallback = Callable[[EmailOutbox], Awaitable[None]]
+
+
+def build_message(subject: str, body: str, to_email: str, from_email: Optional[str]) -> MIMEMultipart:
+    """Build an HTML email."""
+    msg = MIMEMultipart()
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'html'))
+    return msg
+
+
+class SMTPConnection:
+    """Authenticated SMTP connection reused across sends (blocking, used from a thread)."""
+
+    def __init__(self):
+        self.host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+        self.port = int(os.getenv('SMTP_PORT', '587'))
+        self.starttls = os.getenv('SMTP_STARTTLS', '1') != '0'
+        self.from_email = os.getenv('EMAIL_ADDRESS')
+        self.password = os.getenv('EMAIL_PASSWORD')
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        try:
+            server.ehlo()
+            if self.starttls:
+                server.starttls()
+                server.ehlo()
+            if self.password:
+                server.login(self.from_email, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _ensure(self) -> smtplib.SMTP:
+        if self._server and time.monotonic() - self._last_used > IDLE_CHECK_SECONDS:
+            try:
+                if self._server.noop()[0] != 250:
+                    self.close()
+            except smtplib.SMTPException:
+                self.close()
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def send(self, subject: str, body: str, to_email: str) -> None:
+        msg = build_message(subject, body, to_email, self.from_email)
+        try:
+            self._ensure().sendmail(self.from_email, to_email, msg.as_string())
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Connection dropped by the server while idle: reconnect once
+            self.close()
+            self._ensure().sendmail(self.from_email, to_email, msg.as_string())
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+
+def is_permanent(error: Exception) -> bool:
+    """Whether retrying cannot help (rejected recipient or 5xx reply)."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    code = getattr(error, 'smtp_code', None)
+    return isinstance(code, int) and 500 <= code < 600 and not isinstance(error, smtplib.SMTPAuthenticationError)
+
+
+class EmailOutboxWorker:
+    """Outbox storage and worker pool."""
+
+    def __init__(self, workers: int = SMTP_WORKERS):
+        self.workers = workers
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._callbacks: Dict[int, StatusCallback] = {}
+
+    async def enqueue(self, subject: str, body: str, to_email: str, user_id: Optional[int] = None,
+                      on_status: Optional[StatusCallback] = None) -> int:
+        """
+        Store an email in the outbox and wake up a worker.
+
+        Args:
+            subject: Email subject
+            body: HTML body
+            to_email: Recipient
+            user_id: Discord user who requested the email
+            on_status: Called with the outbox row once the email is sent or has failed for good
+
+        Returns:
+            Outbox ID of the email
+        """
+        async with AsyncSessionLocal() as session:
+            email = EmailOutbox(
+                to_email=to_email,
+                subject=subject,
+                body=body,
+                user_id=user_id,
+                status=EmailStatus.PENDING,
+                next_attempt_at=datetime.now()
+            )
+            session.add(email)
+            await session.commit()
+
+        if on_status:
+            self._callbacks[email.id] = on_status
+        self._wakeup.set()
+        return email.id
+
+    async def start(self) -> None:
+        """Requeue emails interrupted by a restart and start the workers (no-op if running)."""
+        if self._tasks:
+            return
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.status == EmailStatus.SENDING)
+                .values(status=EmailStatus.PENDING)
+            )
+            await session.commit()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def purge(self, now: Optional[datetime] = None) -> int:
+        """
+        Delete sent and failed emails older than the retention period.
+
+        Returns:
+            Number of deleted rows
+        """
+        cutoff = (now or datetime.now()) - timedelta(days=RETENTION_DAYS)
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                delete(EmailOutbox).where(
+                    EmailOutbox.status.in_([EmailStatus.SENT, EmailStatus.FAILED]),
+                    EmailOutbox.created_at < cutoff
+                )
+            )
+            await session.commit()
+        return result.rowcount or 0
+
+    async def _claim(self) -> Optional[EmailOutbox]:
+        """Atomically mark the next due email as being sent."""
+        async with AsyncSessionLocal() as session:
+            next_id = (
+                select(EmailOutbox.id)
+                .where(
+                    EmailOutbox.status == EmailStatus.PENDING,
+                    EmailOutbox.next_attempt_at <= datetime.now()
+                )
+                .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+                .limit(1)
+                .scalar_subquery()
+            )
+            result = await session.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id == next_id, EmailOutbox.status == EmailStatus.PENDING)
+                .values(status=EmailStatus.SENDING, attempts=EmailOutbox.attempts + 1)
+                .returning(EmailOutbox)
+                .execution_options(synchronize_session=False)
+            )
+            email = result.scalar_one_or_none()
+            await session.commit()
+            return email
+
+    async def _worker(self) -> None:
+        connection = SMTPConnection()
+        try:
+            while True:
+                try:
+                    email = await self._claim()
+                except Exception as e:
+                    logger.error(f"Failed to read the email outbox: {e}")
+                    email = None
+
+                if email is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                await self._deliver(connection, email)
+        finally:
+            connection.close()
+
+    async def _deliver(self, connection: SMTPConnection, email: EmailOutbox) -> None:
+        values = {}
+        try:
+            await asyncio.to_thread(connection.send, email.subject, email.body, email.to_email)
+            # The body holds the authentication link: never keep it once the email is done with
+            values = {'status': EmailStatus.SENT, 'sent_at': datetime.now(), 'last_error': None, 'body': ''}
+        except Exception as e:
+            connection.close()
+            if is_permanent(e) or email.attempts >= MAX_ATTEMPTS:
+                logger.warning(f"Email {email.id} to {email.to_email} failed: {e}")
+                values = {'status': EmailStatus.FAILED, 'last_error': str(e)[:1000], 'body': ''}
+            else:
+                delay = RETRY_BASE_SECONDS * 2 ** (email.attempts - 1)
+                logger.info(f"Email {email.id} will be retried in {delay}s: {e}")
+                values = {
+                    'status': EmailStatus.PENDING,
+                    'last_error': str(e)[:1000],
+                    'next_attempt_at': datetime.now() + timedelta(seconds=delay)
+                }
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(EmailOutbox).where(EmailOutbox.id == email.id).values(**values))
+            await session.commit()
+
+        if values['status'] == EmailStatus.PENDING:
+            return
+        for key, value in values.items():
+            setattr(email, key, value)
+        callback = self._callbacks.pop(email.id, None)
+        if callback:
+            try:
+                await callback(email)
+            except Exception as e:
+                logger.warning(f"Failed to report the status of email {email.id}: {e}")
+
+
+email_outbox = EmailOutboxWorker()
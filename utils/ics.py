@@ -0,0 +1,165 @@
+"""
+Minimal iCalendar (RFC 5545) writer for schedule and assignment exports.
+Events are rendered as independent blocks so exports can be rebuilt part by part.
+"""
+from datetime import datetime, time
+from typing import Iterable, List, Optional, Sequence
+
+from .schedule_model import ScheduleIndex, SheetLayout
+
+
+TIMEZONE = "Europe/Paris"
+PRODID = "-//deadbeef//Deadbeef Bot//FR"
+UID_DOMAIN = "deadbeef"
+
+# Static definition of Europe/Paris (EU daylight saving rules)
+VTIMEZONE = (
+    "BEGIN:VTIMEZONE",
+    f"TZID:{TIMEZONE}",
+    "BEGIN:DAYLIGHT",
+    "TZOFFSETFROM:+0100",
+    "TZOFFSETTO:+0200",
+    "TZNAME:CEST",
+    "DTSTART:19700329T020000",
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU",
+    "END:DAYLIGHT",
+    "BEGIN:STANDARD",
+    "TZOFFSETFROM:+0200",
+    "TZOFFSETTO:+0100",
+    "TZNAME:CET",
+    "DTSTART:19701025T030000",
+    "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+)
+
+
+def escape_text(value: str) -> str:
+    """Escape a TEXT property value."""
+    return (
+        value.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def fold_line(line: str) -> str:
+    """Fold a content line to 75 octets, continuation lines starting with a space."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte UTF-8 sequence
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74  # Leading space of continuation lines counts
+    return '\r\n '.join(parts)
+
+
+def format_local(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def build_event(uid: str, start: datetime, end: datetime, summary: str,
+                description: Optional[str] = None, location: Optional[str] = None,
+                stamp: Optional[datetime] = None) -> str:
+    """
+    Render a VEVENT block with local Europe/Paris times (DTSTAMP is UTC).
+
+    Returns:
+        The folded event lines joined with CRLF (no trailing newline)
+    """
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{(stamp or datetime.utcnow()).strftime('%Y%m%dT%H%M%SZ')}",
+        f"DTSTART;TZID={TIMEZONE}:{format_local(start)}",
+        f"DTEND;TZID={TIMEZONE}:{format_local(end)}",
+        f"SUMMARY:{escape_text(summary)}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{escape_text(description)}")
+    if location:
+        lines.append(f"LOCATION:{escape_text(location)}")
+    lines.append("END:VEVENT")
+    return '\r\n'.join(fold_line(line) for line in lines)
+
+
+def _parse_time(value: str) -> time:
+    return datetime.strptime(value, "%H:%M").time()
+
+
+def schedule_events(index: ScheduleIndex, grade_level: str, layout: SheetLayout,
+                    start_day_index: int = 0, end_day_index: int = 6,
+                    stamp: Optional[datetime] = None) -> List[str]:
+    """
+    Render one event per non-empty class slot of every parsed week.
+
+    Only the days within the inclusive weekday range (0=Monday) are exported, and slots
+    without a configured time range in the layout are skipped.
+    """
+    slot_times = [(_parse_time(start), _parse_time(end)) for start, end in layout.slot_times]
+    events = []
+    for week_start in sorted(index.weeks):
+        for day in index.weeks[week_start].days_between(start_day_index, end_day_index):
+            for slot_idx, slot in enumerate(day.slots):
+                if slot.is_empty or slot_idx >= len(slot_times):
+                    continue
+                start, end = slot_times[slot_idx]
+                description = f"Intervenant : {slot.teacher}" if slot.teacher else None
+                events.append(build_event(
+                    uid=f"{grade_level}-{day.date.strftime('%Y%m%d')}-{slot_idx}@{UID_DOMAIN}",
+                    start=datetime.combine(day.date, start),
+                    end=datetime.combine(day.date, end),
+                    summary=slot.course,
+                    description=description,
+                    location=f"Salle {slot.room}" if slot.room else None,
+                    stamp=stamp,
+                ))
+    return events
+
+
+def assignment_events(assignments: Iterable, stamp: Optional[datetime] = None) -> List[str]:
+    """Render one event per assignment, ending at its due date."""
+    events = []
+    for assignment in sorted(assignments, key=lambda a: (a.due_date, a.id)):
+        due = assignment.due_date.replace(tzinfo=None)
+        details = [assignment.description or "", f"Modalité : {assignment.modality}" if assignment.modality else ""]
+        events.append(build_event(
+            uid=f"assignment-{assignment.id}@{UID_DOMAIN}",
+            start=due,
+            end=due,
+            summary=f"[{assignment.course.name}] {assignment.title}",
+            description="\n".join(part for part in details if part) or None,
+            stamp=stamp,
+        ))
+    return events
+
+
+def build_calendar(name: str, parts: Sequence[str]) -> bytes:
+    """
+    Assemble a VCALENDAR from pre-rendered event blocks.
+
+    Args:
+        name: Calendar display name
+        parts: Rendered event blocks (or concatenations of blocks)
+    """
+    header = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        fold_line(f"X-WR-CALNAME:{escape_text(name)}"),
+        f"X-WR-TIMEZONE:{TIMEZONE}",
+        *VTIMEZONE,
+    ]
+    body = [part for part in parts if part]
+    return ('\r\n'.join(header + body + ["END:VCALENDAR"]) + '\r\n').encode('utf-8')
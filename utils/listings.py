@@ -0,0 +1,114 @@
+"""
+Keyset pagination for the admin listings.
+A page is fetched with a WHERE on the sort key of the previous/next page's edge row instead of
+loading the whole table, so every page costs the same whatever the number of cohorts.
+"""
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import String, select, func, exists, tuple_, type_coerce
+
+from db import AsyncSessionLocal
+from db.constants import UserType
+from db.models import AuthenticatedUser, Professional, ProfessionalCourseChannel
+
+PAGE_SIZE = 10
+
+Cursor = Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class KeysetPage:
+    rows: List[Any]
+    first: Optional[Cursor]  # Sort key of the first row
+    last: Optional[Cursor]  # Sort key of the last row
+    has_previous: bool
+    has_next: bool
+
+
+async def keyset_page(query, keys: Sequence, descending: bool = False, cursor: Optional[Cursor] = None,
+                      backward: bool = False, limit: int = PAGE_SIZE) -> KeysetPage:
+    """
+    Fetch the page after (or before, if backward) a cursor.
+
+    Args:
+        query: Select whose first columns are the sort keys
+        keys: Sort key columns; the last one must be unique
+        descending: Listing order
+        cursor: Sort key of the edge row of the current page (None for the first page)
+        backward: Fetch the page before the cursor instead of after it
+    """
+    reverse = descending != backward  # Scan order of this fetch
+    if cursor is not None:
+        key, bound = tuple_(*keys), tuple_(*cursor)
+        query = query.where(key < bound if reverse else key > bound)
+    query = query.order_by(*(k.desc() if reverse else k.asc() for k in keys)).limit(limit + 1)
+
+    async with AsyncSessionLocal() as session:
+        rows = list((await session.execute(query)).all())
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+        has_previous, has_next = more, True
+    else:
+        has_previous, has_next = cursor is not None, more
+
+    width = len(keys)
+    return KeysetPage(
+        rows=rows,
+        first=tuple(rows[0][:width]) if rows else None,
+        last=tuple(rows[-1][:width]) if rows else None,
+        has_previous=has_previous,
+        has_next=has_next,
+    )
+
+
+async def student_page(cursor: Optional[Cursor] = None, backward: bool = False) -> KeysetPage:
+    """Authenticated students, most recent first."""
+    # Sort on the stored text: SQLite keeps 'YYYY-MM-DD HH:MM:SS' (server default) and
+    # '...SS.ffffff' values side by side, and a cursor re-bound as a datetime always has the
+    # fraction, so it would not compare equal to the row it was read from
+    authenticated_at = type_coerce(AuthenticatedUser.authenticated_at, String)
+    query = (
+        select(
+            authenticated_at.label('sort_key'),
+            AuthenticatedUser.user_id,
+            AuthenticatedUser.authenticated_at,
+            AuthenticatedUser.email,
+            AuthenticatedUser.student_id,
+            AuthenticatedUser.grade_level,
+            AuthenticatedUser.formation_type
+        )
+        .where(AuthenticatedUser.user_type == UserType.STUDENT)
+    )
+    return await keyset_page(
+        query,
+        (authenticated_at, AuthenticatedUser.user_id),
+        descending=True,
+        cursor=cursor,
+        backward=backward
+    )
+
+
+async def professional_page(cursor: Optional[Cursor] = None, backward: bool = False) -> KeysetPage:
+    """Registered professionals in registration order, with their course count and authentication status."""
+    course_count = (
+        select(func.count(ProfessionalCourseChannel.id))
+        .where(ProfessionalCourseChannel.professional_id == Professional.id)
+        .scalar_subquery()
+    )
+    authenticated = exists().where(
+        AuthenticatedUser.email == Professional.email,
+        AuthenticatedUser.user_type == UserType.PROFESSIONAL
+    )
+    query = select(
+        Professional.id,
+        Professional.email,
+        Professional.first_name,
+        Professional.last_name,
+        course_count.label('course_count'),
+        authenticated.label('authenticated')
+    )
+    return await keyset_page(query, (Professional.id,), cursor=cursor, backward=backward)
@@ -0,0 +1,123 @@
+"""
+Registry of bot-owned managed messages.
+Messages are edited through PartialMessage (no fetch), recreated when they were deleted,
+and left untouched when the rendered payload did not change since the last publish.
+"""
+import asyncio
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+import discord
+
+from db import AsyncSessionLocal
+from db.models import ManagedMessage
+
+
+def payload_hash(content: Optional[str] = None, embeds: Optional[List[discord.Embed]] = None,
+                 view: Optional[discord.ui.View] = None) -> str:
+    """Stable hash of a message payload (content, embeds and components)."""
+    data = {
+        'content': content,
+        'embeds': [embed.to_dict() for embed in embeds or []],
+        'components': view.to_components() if view else [],
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class MessageRegistry:
+    """Publishes managed messages with at most one REST call per update."""
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def publish(self, channel: discord.abc.Messageable, purpose: str, *,
+                      content: Optional[str] = None, embeds: Optional[List[discord.Embed]] = None,
+                      view: Optional[discord.ui.View] = None, content_hash: Optional[str] = None,
+                      message_id: Optional[int] = None, force: bool = False) -> int:
+        """
+        Create or update the managed message of a purpose.
+
+        Args:
+            channel: Channel the message lives in
+            purpose: Unique key of the managed message (e.g. "schedule:<channel_id>")
+            content, embeds, view: Message payload (None values are left unchanged on edit)
+            content_hash: Hash identifying the payload (computed from the payload if omitted)
+            message_id: Existing message to adopt when the purpose is not registered yet
+            force: Edit the message even if the payload hash is unchanged
+
+        Returns:
+            ID of the published message
+
+        Raises:
+            discord.HTTPException: If Discord rejects the edit or send (other than a 404)
+        """
+        payload = {}
+        if content is not None:
+            payload['content'] = content
+        if embeds is not None:
+            payload['embeds'] = embeds
+        if view is not None:
+            payload['view'] = view
+        digest = content_hash or payload_hash(content, embeds, view)
+
+        lock = self._locks.setdefault(purpose, asyncio.Lock())
+        async with lock:
+            async with AsyncSessionLocal() as session:
+                handle = await session.get(ManagedMessage, purpose)
+                if handle is None:
+                    handle = ManagedMessage(purpose=purpose, channel_id=channel.id, message_id=message_id)
+                    session.add(handle)
+                elif handle.channel_id != channel.id:
+                    # The purpose moved to another channel: drop the old message
+                    await self._delete_message(channel.guild.get_channel(handle.channel_id), handle.message_id)
+                    handle.channel_id = channel.id
+                    handle.message_id = None
+                    handle.content_hash = None
+
+                if handle.message_id and handle.content_hash == digest and not force:
+                    return handle.message_id
+
+                if handle.message_id:
+                    try:
+                        await channel.get_partial_message(handle.message_id).edit(**payload)
+                    except discord.NotFound:
+                        handle.message_id = None  # Deleted: recreate it below
+
+                if not handle.message_id:
+                    message = await channel.send(**payload)
+                    handle.message_id = message.id
+
+                handle.content_hash = digest
+                await session.commit()
+                return handle.message_id
+
+    async def delete(self, channel: Optional[discord.abc.Messageable], purpose: str,
+                     message_id: Optional[int] = None) -> None:
+        """
+        Delete the managed message of a purpose and forget it.
+
+        Args:
+            channel: Channel the message lives in
+            purpose: Unique key of the managed message
+            message_id: Message to delete when the purpose is not registered
+        """
+        async with AsyncSessionLocal() as session:
+            handle = await session.get(ManagedMessage, purpose)
+            if handle:
+                message_id = handle.message_id or message_id
+                await session.delete(handle)
+                await session.commit()
+        await self._delete_message(channel, message_id)
+
+    @staticmethod
+    async def _delete_message(channel, message_id: Optional[int]) -> None:
+        if not channel or not message_id:
+            return
+        try:
+            await channel.get_partial_message(message_id).delete()
+        except discord.HTTPException:
+            pass  # Message might already be deleted
+
+
+message_registry = MessageRegistry()
@@ -0,0 +1,38 @@
+"""
+In-process metrics: monotonic counters and last-value gauges.
+Values are logged when they change and can be shown in admin panels.
+"""
+import logging
+from typing import Dict, Union
+
+logger = logging.getLogger(__name__)
+
+Number = Union[int, float]
+
+
+class Metrics:
+    """Named counters and gauges (reset on restart)."""
+
+    def __init__(self):
+        self.counters: Dict[str, Number] = {}
+        self.gauges: Dict[str, Number] = {}
+
+    def increment(self, name: str, value: Number = 1) -> None:
+        if not value:
+            return
+        self.counters[name] = self.counters.get(name, 0) + value
+        logger.info(f"metric {name} +{value} (total {self.counters[name]})")
+
+    def set_gauge(self, name: str, value: Number) -> None:
+        if self.gauges.get(name) != value:
+            logger.debug(f"metric {name} = {value}")
+        self.gauges[name] = value
+
+    def get(self, name: str, default: Number = 0) -> Number:
+        return self.counters.get(name, self.gauges.get(name, default))
+
+    def snapshot(self) -> Dict[str, Number]:
+        return {**self.gauges, **self.counters}
+
+
+metrics = Metrics()
@@ -0,0 +1,166 @@
+"""
+Near-duplicate detection for news entries across feeds.
+Uses MinHash signatures over word shingles and LSH banding for sub-linear lookup.
+"""
+import hashlib
+import re
+import struct
+import unicodedata
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+
+NUM_PERM = 64           # Signature length (number of hash permutations)
+BANDS = 16              # LSH bands (NUM_PERM / BANDS rows per band)
+SHINGLE_SIZE = 3        # Words per shingle
+SIMILARITY_THRESHOLD = 0.5
+WINDOW_SIZE = 500       # Max signatures kept per channel
+WINDOW_AGE = timedelta(days=3)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_ROWS = NUM_PERM // BANDS
+
+
+def _permutations() -> List[Tuple[int, int]]:
+    """Deterministic (a, b) coefficients so signatures stay comparable across restarts."""
+    perms = []
+    for i in range(NUM_PERM):
+        digest = hashlib.blake2b(f"deadbeef-minhash-{i}".encode(), digest_size=16).digest()
+        a, b = struct.unpack('<QQ', digest)
+        perms.append(((a % (_MERSENNE_PRIME - 1)) + 1, b % _MERSENNE_PRIME))
+    return perms
+
+
+_PERMS = _permutations()
+
+
+def normalize_text(text: str) -> List[str]:
+    """Lowercase, strip accents and split text into word tokens."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r'\w+', text)
+
+
+def shingles(text: str) -> Set[str]:
+    """Build the set of word shingles for a text."""
+    tokens = normalize_text(text)
+    if len(tokens) < SHINGLE_SIZE:
+        return set(tokens)
+    return {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def compute_signature(text: str) -> Optional[Tuple[int, ...]]:
+    """
+    Compute the MinHash signature of a text.
+
+    Returns:
+        Tuple of NUM_PERM 32-bit values, or None if the text has no tokens
+    """
+    items = shingles(text)
+    if not items:
+        return None
+
+    hashes = [
+        struct.unpack('<Q', hashlib.blake2b(s.encode(), digest_size=8).digest())[0]
+        for s in items
+    ]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMS
+    )
+
+
+def pack_signature(signature: Tuple[int, ...]) -> bytes:
+    """Pack a signature into a compact binary blob for storage."""
+    return struct.pack(f'<{NUM_PERM}I', *signature)
+
+
+def unpack_signature(blob: bytes) -> Tuple[int, ...]:
+    """Unpack a signature stored with pack_signature."""
+    return struct.unpack(f'<{NUM_PERM}I', blob)
+
+
+def estimate_similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimate the Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def _band_keys(signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+    return [(band, signature[band * _ROWS:(band + 1) * _ROWS]) for band in range(BANDS)]
+
+
+@dataclass
+class StoryRecord:
+    """A story already posted in a channel."""
+    record_id: int
+    channel_id: int
+    message_id: int
+    signature: Tuple[int, ...]
+    sent_at: datetime
+    sources: List[str] = field(default_factory=list)
+
+
+class NewsDeduplicator:
+    """Sliding window of story signatures with LSH buckets, scoped per channel."""
+
+    def __init__(self, window_size: int = WINDOW_SIZE, window_age: timedelta = WINDOW_AGE):
+        self.window_size = window_size
+        self.window_age = window_age
+        self._windows: Dict[int, Deque[StoryRecord]] = {}
+        self._buckets: Dict[Tuple[int, int, Tuple[int, ...]], List[StoryRecord]] = {}
+
+    def add(self, record: StoryRecord) -> None:
+        """Index a posted story, evicting the oldest entries past the window."""
+        window = self._windows.setdefault(record.channel_id, deque())
+        window.append(record)
+        for band, key in _band_keys(record.signature):
+            self._buckets.setdefault((record.channel_id, band, key), []).append(record)
+        self._evict(record.channel_id)
+
+    def find_duplicate(self, channel_id: int, signature: Tuple[int, ...],
+                       source: Optional[str] = None) -> Optional[StoryRecord]:
+        """
+        Find the first posted story that is a near-duplicate of the signature.
+
+        Only records sharing at least one LSH bucket are compared. Stories already reported by
+        `source` are ignored: near-identical entries of one feed (templated advisories that only
+        differ by CVE or product) are distinct stories.
+        """
+        self._evict(channel_id)
+
+        candidates: Dict[int, StoryRecord] = {}
+        for band, key in _band_keys(signature):
+            for record in self._buckets.get((channel_id, band, key), ()):
+                candidates[record.record_id] = record
+
+        matches = [
+            record for record in candidates.values()
+            if source not in record.sources
+            and estimate_similarity(signature, record.signature) >= SIMILARITY_THRESHOLD
+        ]
+        # Fold into the first message that reported the story
+        return min(matches, key=lambda r: r.sent_at) if matches else None
+
+    def cutoff(self) -> datetime:
+        """Oldest sent_at still kept in the window."""
+        return datetime.now() - self.window_age
+
+    def _evict(self, channel_id: int) -> None:
+        window = self._windows.get(channel_id)
+        if not window:
+            return
+
+        cutoff = self.cutoff()
+        while window and (len(window) > self.window_size or window[0].sent_at < cutoff):
+            old = window.popleft()
+            for band, key in _band_keys(old.signature):
+                bucket_key = (channel_id, band, key)
+                bucket = self._buckets.get(bucket_key)
+                if not bucket:
+                    continue
+                bucket[:] = [r for r in bucket if r.record_id != old.record_id]
+                if not bucket:
+                    del self._buckets[bucket_key]
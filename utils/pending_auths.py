@@ -0,0 +1,32 @@
+"""
+Expiry of pending authentication requests.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, select, func
+
+from db import AsyncSessionLocal
+from db.models import PendingAuth
+from utils.metrics import metrics
+
+
+async def purge_expired_pending_auths(now: Optional[datetime] = None) -> int:
+    """
+    Delete expired pending authentications with a single statement (ix_pending_auth_expires).
+
+    Returns:
+        Number of deleted rows
+    """
+    now = now or datetime.now()
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            delete(PendingAuth).where(PendingAuth.expires_at < now)
+        )
+        remaining = await session.execute(select(func.count(PendingAuth.id)))
+        await session.commit()
+
+    deleted = result.rowcount or 0
+    metrics.increment('pending_auths.expired_deleted', deleted)
+    metrics.set_gauge('pending_auths.pending', remaining.scalar() or 0)
+    return deleted
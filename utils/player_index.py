@@ -0,0 +1,118 @@
+"""
+In-memory prefix index of the players that can be invited to a CTF team.
+Eligible players (authenticated, without a team, status "Looking for Team") are loaded with one
+query; their display names and Root-Me pseudos are kept sorted so a keystroke is a binary search.
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import discord
+from sqlalchemy import select
+
+from db import AsyncSessionLocal
+from db.models import PlayerProfile, RootMeCache
+from db.events import on_tables_committed
+from utils.user_search import normalize
+
+LOOKING_FOR_TEAM = "Looking for Team"
+INDEX_TTL_SECONDS = 300  # Display names change without database writes
+INDEXED_TABLES = {'ctf_player_profiles', 'rootme_cache', 'authenticated_users'}
+
+
+@dataclass(frozen=True)
+class Player:
+    user_id: int
+    display_name: str
+    pseudo: Optional[str]  # Root-Me pseudo
+
+    @property
+    def label(self) -> str:
+        return f"{self.display_name} ({self.pseudo})" if self.pseudo else self.display_name
+
+
+class PlayerIndex:
+    """Sorted (key, user ID) entries of every word of the names and pseudos of eligible players."""
+
+    def __init__(self, ttl: float = INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        self._players: Dict[int, Player] = {}
+        self._keys: List[str] = []
+        self._entries: List[Tuple[str, int]] = []
+        self._expires_at = 0.0
+        self._generation = 0  # Bumped by invalidate(): a load started before is already stale
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._expires_at = 0.0
+
+    async def _load(self, guild: discord.Guild) -> List[Player]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(PlayerProfile.user_id, RootMeCache.pseudo)
+                .outerjoin(RootMeCache, RootMeCache.user_id == PlayerProfile.user_id)
+                .where(PlayerProfile.status == LOOKING_FOR_TEAM, PlayerProfile.team_id.is_(None))
+            )
+            rows = result.all()
+
+        players = []
+        for user_id, pseudo in rows:
+            member = guild.get_member(user_id)
+            if member:  # Left the server: cannot be invited
+                players.append(Player(user_id=user_id, display_name=member.display_name, pseudo=pseudo))
+        return players
+
+    async def _ensure(self, guild: discord.Guild) -> None:
+        if time.monotonic() < self._expires_at:
+            return
+        async with self._lock:
+            if time.monotonic() < self._expires_at:
+                return
+            generation = self._generation
+            players = await self._load(guild)
+            entries = set()
+            for player in players:
+                for text in (player.display_name, player.pseudo):
+                    key = normalize(text)
+                    if not key:
+                        continue
+                    entries.add((key, player.user_id))  # Whole name...
+                    for word in key.split()[1:]:
+                        entries.add((word, player.user_id))  # ...and each following word
+            entries = sorted(entries)
+            # Swapped at once: concurrent lookups see the old or the new index, never a mix
+            self._players = {player.user_id: player for player in players}
+            self._entries = entries
+            self._keys = [key for key, _ in entries]
+            # Invalidated during the load: serve this index but reload on the next lookup
+            if generation == self._generation:
+                self._expires_at = time.monotonic() + self.ttl
+
+    async def complete(self, guild: discord.Guild, prefix: str, limit: int = 25) -> List[Player]:
+        """Eligible players whose display name or pseudo (or one of their words) starts with the prefix."""
+        await self._ensure(guild)
+        prefix = normalize(prefix)
+        if not prefix:
+            return sorted(self._players.values(), key=lambda p: normalize(p.display_name))[:limit]
+
+        found: Dict[int, Player] = {}
+        for i in range(bisect_left(self._keys, prefix), len(self._keys)):
+            key, user_id = self._entries[i]
+            if not key.startswith(prefix):
+                break
+            found.setdefault(user_id, self._players[user_id])
+            if len(found) >= limit:
+                break
+        return list(found.values())
+
+
+player_index = PlayerIndex()
+
+
+@on_tables_committed
+def _invalidate_player_index(tables: set) -> None:
+    if INDEXED_TABLES & tables:
+        player_index.invalidate()
@@ -0,0 +1,110 @@
+"""
+Write-behind batcher for My Tasks progress toggles.
+Toggles are applied to the view immediately and written to the database in one batch per
+interval; repeated check/uncheck clicks on the same (user, assignment) collapse to the last state.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from db import AsyncSessionLocal, engine
+from db.models import Assignment, UserAssignmentProgress
+from utils.completion_stats import completion_stats
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 2.0
+
+ProgressKey = Tuple[int, int]  # (user_id, assignment_id)
+
+
+def _insert(table):
+    """Dialect-specific INSERT supporting ON CONFLICT."""
+    if engine.dialect.name == 'postgresql':
+        return postgresql_insert(table)
+    return sqlite_insert(table)
+
+
+class ProgressWriter:
+    """Buffers completion states and flushes them as idempotent batch writes."""
+
+    def __init__(self, interval: float = FLUSH_INTERVAL_SECONDS):
+        self.interval = interval
+        self._pending: Dict[ProgressKey, bool] = {}  # Desired state (True = completed)
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def set_completed(self, user_id: int, assignment_id: int, completed: bool) -> None:
+        """Record the desired state of a toggle; the last state within an interval wins."""
+        self._pending[(user_id, assignment_id)] = completed
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    def has_pending(self, user_id: int) -> bool:
+        return any(key[0] == user_id for key in self._pending)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        self._flush_task = None  # Toggles arriving during the flush schedule the next one
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write all buffered states in a single transaction."""
+        async with self._lock:
+            batch, self._pending = self._pending, {}
+            if not batch:
+                return
+
+            checked = [{'user_id': u, 'assignment_id': a} for (u, a), done in batch.items() if done]
+            unchecked = [key for key, done in batch.items() if not done]
+
+            table = UserAssignmentProgress.__table__
+            added, removed = [], []
+            try:
+                async with AsyncSessionLocal() as session:
+                    if checked:
+                        # Assignments deleted in the meantime: their progress is gone anyway,
+                        # skip them instead of failing the whole batch on the foreign key
+                        existing = set((await session.execute(
+                            select(Assignment.id).where(Assignment.id.in_([row['assignment_id'] for row in checked]))
+                        )).scalars().all())
+                        dropped = len(checked)
+                        checked = [row for row in checked if row['assignment_id'] in existing]
+                        dropped -= len(checked)
+                        if dropped:
+                            logger.info(f"Skipped {dropped} progress updates of deleted assignments")
+                    # RETURNING gives the rows actually changed (not the no-op toggles)
+                    if checked:
+                        result = await session.execute(
+                            _insert(table)
+                            .values(checked)
+                            .on_conflict_do_nothing(index_elements=['user_id', 'assignment_id'])
+                            .returning(table.c.user_id, table.c.assignment_id)
+                        )
+                        added = [tuple(row) for row in result.all()]
+                    if unchecked:
+                        result = await session.execute(
+                            delete(table)
+                            .where(tuple_(table.c.user_id, table.c.assignment_id).in_(unchecked))
+                            .returning(table.c.user_id, table.c.assignment_id)
+                        )
+                        removed = [tuple(row) for row in result.all()]
+                    await session.commit()
+            except Exception as e:
+                # Keep states that were not superseded meanwhile and retry on the next interval
+                # (an assignment deleted during the flush is filtered out by the retry)
+                logger.error(f"Failed to flush {len(batch)} progress updates: {e}")
+                for key, done in batch.items():
+                    self._pending.setdefault(key, done)
+                if self._flush_task is None or self._flush_task.done():
+                    self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+                return
+
+        await completion_stats.apply(added, removed)
+
+
+progress_writer = ProgressWriter()
@@ -0,0 +1,158 @@
+"""
+Token-bucket rate limiting kept in memory and mirrored in the database.
+Used to cap authentication emails per Discord user, per target address and globally.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from db import AsyncSessionLocal, engine
+from db.models import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BucketPolicy:
+    capacity: float  # Burst size
+    period: float  # Seconds to regain one token
+
+    def refill(self, tokens: float, elapsed: float) -> float:
+        return min(self.capacity, tokens + max(elapsed, 0) / self.period)
+
+
+@dataclass
+class Bucket:
+    tokens: float
+    updated_at: float  # Unix timestamp
+
+
+def _insert(table):
+    """Dialect-specific INSERT supporting ON CONFLICT."""
+    if engine.dialect.name == 'postgresql':
+        return postgresql_insert(table)
+    return sqlite_insert(table)
+
+
+class RateLimiter:
+    """Named token buckets; a request takes one token from each of its buckets or none at all."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._buckets: Dict[str, Bucket] = {}
+        self._lock = asyncio.Lock()
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def load(self) -> None:
+        """Restore the persisted buckets of this limiter."""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(RateLimitBucket).where(RateLimitBucket.key.like(f"{self.name}:%"))
+            )
+            for row in result.scalars().all():
+                self._buckets[row.key] = Bucket(tokens=row.tokens, updated_at=row.updated_at)
+        logger.info(f"Rate limiter {self.name}: {len(self._buckets)} buckets restored")
+
+    async def acquire(self, requests: Iterable[Tuple[str, BucketPolicy]]) -> float:
+        """
+        Take one token from every bucket, or none if one of them is empty.
+
+        Args:
+            requests: (bucket key, policy) pairs
+
+        Returns:
+            0 if allowed, otherwise the number of seconds to wait before retrying
+        """
+        async with self._lock:
+            now = time.time()
+            states: List[Tuple[str, BucketPolicy, float]] = []
+            retry_after = 0.0
+            for key, policy in requests:
+                key = self._key(key)
+                bucket = self._buckets.get(key)
+                tokens = policy.capacity if bucket is None else policy.refill(bucket.tokens, now - bucket.updated_at)
+                if tokens < 1:
+                    retry_after = max(retry_after, (1 - tokens) * policy.period)
+                states.append((key, policy, tokens))
+
+            if retry_after:
+                return retry_after
+
+            rows = []
+            for key, policy, tokens in states:
+                bucket = Bucket(tokens=tokens - 1, updated_at=now)
+                self._buckets[key] = bucket
+                rows.append({'key': key, 'tokens': bucket.tokens, 'updated_at': bucket.updated_at})
+            await self._persist(rows)
+            return 0.0
+
+    async def _persist(self, rows: List[dict]) -> None:
+        table = RateLimitBucket.__table__
+        statement = _insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=['key'],
+            set_={'tokens': statement.excluded.tokens, 'updated_at': statement.excluded.updated_at}
+        )
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(statement)
+                await session.commit()
+        except Exception as e:
+            # The in-memory state still applies; only restart survival is lost
+            logger.warning(f"Failed to persist rate limit buckets: {e}")
+
+    async def prune(self, policies: Dict[str, BucketPolicy]) -> int:
+        """
+        Forget buckets that are full again (same as never used).
+
+        Args:
+            policies: Policy of each key prefix (e.g. {"user": ...})
+        """
+        now = time.time()
+        full = []
+        for key, bucket in self._buckets.items():
+            prefix = key[len(self.name) + 1:].split(':', 1)[0]
+            policy = policies.get(prefix)
+            if policy and policy.refill(bucket.tokens, now - bucket.updated_at) >= policy.capacity:
+                full.append(key)
+        if not full:
+            return 0
+
+        for key in full:
+            del self._buckets[key]
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(RateLimitBucket).where(RateLimitBucket.key.in_(full)))
+            await session.commit()
+        return len(full)
+
+
+# Authentication emails: 3 per user and per address, then one every 10 minutes,
+# within a global hourly ceiling that keeps the SMTP account under its sending quota
+AUTH_EMAIL_POLICIES = {
+    'user': BucketPolicy(capacity=3, period=600),
+    'email': BucketPolicy(capacity=3, period=600),
+    'global': BucketPolicy(
+        capacity=20,
+        period=3600 / int(os.getenv('AUTH_EMAILS_PER_HOUR', '60'))
+    ),
+}
+
+auth_email_limiter = RateLimiter('auth_email')
+
+
+async def acquire_auth_email(user_id: int, email: str) -> float:
+    """Reserve an authentication email send; returns 0 or the seconds to wait."""
+    return await auth_email_limiter.acquire([
+        (f"user:{user_id}", AUTH_EMAIL_POLICIES['user']),
+        (f"email:{email.strip().lower()}", AUTH_EMAIL_POLICIES['email']),
+        ("global", AUTH_EMAIL_POLICIES['global']),
+    ])
@@ -0,0 +1,329 @@
+"""
+Bulk role changes run as resumable background jobs.
+A job stores the roles to add/remove for each member; a few workers apply them with a shared
+pace, back off on rate limits and record each member's outcome in batches, so a job interrupted
+by a restart resumes with the members left to process.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import discord
+from discord import Embed, Color
+from sqlalchemy import select, func, update, insert
+
+from db import AsyncSessionLocal
+from db.constants import RoleJobStatus, RoleTargetStatus
+from db.models import RoleJob, RoleJobTarget
+
+logger = logging.getLogger(__name__)
+
+ROLE_JOB_CONCURRENCY = 4
+ROLE_JOB_INTERVAL_SECONDS = 0.25  # Minimum delay between two role requests, all workers included
+ROLE_JOB_MAX_ATTEMPTS = 3
+FLUSH_EVERY = 25  # Outcomes written to the database in batches of this size...
+FLUSH_SECONDS = 2.0  # ...or at least this often
+PROGRESS_SECONDS = 3.0  # Minimum delay between two progress updates
+
+# (role IDs to add, role IDs to remove) of a member
+RoleChange = Tuple[Iterable[int], Iterable[int]]
+
+
+@dataclass
+class RoleJobProgress:
+    job_id: int
+    description: str
+    total: int
+    done: int = 0
+    skipped: int = 0  # Member left or already had the right roles
+    failed: int = 0
+    finished: bool = False
+
+    @property
+    def processed(self) -> int:
+        return self.done + self.skipped + self.failed
+
+
+ProgressCallback = Callable[[RoleJobProgress], Awaitable[None]]
+
+
+def build_progress_embed(progress: RoleJobProgress) -> Embed:
+    """Live progress embed of a role job."""
+    percent = progress.processed * 100 // progress.total if progress.total else 100
+    filled = percent // 10
+    if progress.finished:
+        title = "✅ Role Job Complete" if not progress.failed else "⚠️ Role Job Complete"
+        color = Color.green() if not progress.failed else Color.orange()
+    else:
+        title = "⏳ Role Job Running"
+        color = Color.blue()
+
+    embed = Embed(
+        title=title,
+        description=f"{progress.description}\n\n"
+                    f"`{'█' * filled}{'░' * (10 - filled)}` {progress.processed}/{progress.total} ({percent}%)",
+        color=color
+    )
+    embed.add_field(name="Updated", value=str(progress.done), inline=True)
+    embed.add_field(name="Skipped", value=str(progress.skipped), inline=True)
+    embed.add_field(name="Failed", value=str(progress.failed), inline=True)
+    embed.set_footer(text=f"Job #{progress.job_id}")
+    return embed
+
+
+def _join_ids(ids: Iterable[int]) -> str:
+    return ",".join(str(i) for i in sorted(set(ids)))
+
+
+def _split_ids(value: Optional[str]) -> List[int]:
+    return [int(i) for i in value.split(",") if i] if value else []
+
+
+class RoleJobEngine:
+    """Bounded-concurrency, rate-limit-aware executor of persisted role jobs."""
+
+    def __init__(self, concurrency: int = ROLE_JOB_CONCURRENCY, interval: float = ROLE_JOB_INTERVAL_SECONDS,
+                 max_attempts: int = ROLE_JOB_MAX_ATTEMPTS):
+        self.concurrency = concurrency
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._pace_lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def create(self, guild_id: int, description: str, changes: Dict[int, RoleChange],
+                     created_by: Optional[int] = None) -> int:
+        """
+        Persist a role job.
+
+        Args:
+            guild_id: Guild of the members
+            description: Shown in the progress embed
+            changes: Member ID -> (role IDs to add, role IDs to remove)
+            created_by: User who started the job
+
+        Returns:
+            The job ID
+        """
+        async with AsyncSessionLocal() as session:
+            job = RoleJob(guild_id=guild_id, description=description, created_by=created_by)
+            session.add(job)
+            await session.flush()
+            rows = [
+                {
+                    'job_id': job.id,
+                    'member_id': member_id,
+                    'add_role_ids': _join_ids(add),
+                    'remove_role_ids': _join_ids(remove),
+                    'status': RoleTargetStatus.PENDING,
+                }
+                for member_id, (add, remove) in changes.items()
+            ]
+            if rows:
+                await session.execute(insert(RoleJobTarget), rows)
+            await session.commit()
+            logger.info(f"Role job #{job.id} created: {description} ({len(rows)} members)")
+            return job.id
+
+    def start(self, bot: discord.Client, job_id: int, on_progress: Optional[ProgressCallback] = None) -> asyncio.Task:
+        """Run a job in the background (returns the running task if already started)."""
+        task = self._tasks.get(job_id)
+        if task and not task.done():
+            return task
+        task = asyncio.create_task(self._run(bot, job_id, on_progress))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda t: self._tasks.pop(job_id) if self._tasks.get(job_id) is t else None)
+        return task
+
+    async def run(self, bot: discord.Client, guild_id: int, description: str, changes: Dict[int, RoleChange],
+                  created_by: Optional[int] = None, on_progress: Optional[ProgressCallback] = None) -> int:
+        """Create a job and start it; returns the job ID."""
+        job_id = await self.create(guild_id, description, changes, created_by)
+        self.start(bot, job_id, on_progress)
+        return job_id
+
+    async def resume(self, bot: discord.Client,
+                     on_progress: Optional[Callable[[RoleJob], Optional[ProgressCallback]]] = None) -> List[int]:
+        """
+        Restart the jobs left running by a previous process.
+
+        Args:
+            on_progress: Builds the progress callback of a resumed job
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(RoleJob).where(RoleJob.status == RoleJobStatus.RUNNING))
+            jobs = result.scalars().all()
+
+        resumed = []
+        for job in jobs:
+            if job.id in self._tasks:
+                continue
+            logger.info(f"Resuming role job #{job.id}: {job.description}")
+            self.start(bot, job.id, on_progress(job) if on_progress else None)
+            resumed.append(job.id)
+        return resumed
+
+    async def stop(self) -> None:
+        """Cancel the running jobs; they resume on the next start."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _pace(self) -> None:
+        """Wait for the next request slot shared by all workers."""
+        async with self._pace_lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _back_off(self, delay: float) -> None:
+        self._next_slot = max(self._next_slot, time.monotonic() + delay)
+
+    async def _run(self, bot: discord.Client, job_id: int, on_progress: Optional[ProgressCallback]) -> None:
+        async with AsyncSessionLocal() as session:
+            job = await session.get(RoleJob, job_id)
+            if not job or job.status != RoleJobStatus.RUNNING:
+                return
+            counts = dict((await session.execute(
+                select(RoleJobTarget.status, func.count(RoleJobTarget.id))
+                .where(RoleJobTarget.job_id == job_id)
+                .group_by(RoleJobTarget.status)
+            )).all())
+            result = await session.execute(
+                select(RoleJobTarget.id, RoleJobTarget.member_id,
+                       RoleJobTarget.add_role_ids, RoleJobTarget.remove_role_ids)
+                .where(RoleJobTarget.job_id == job_id, RoleJobTarget.status == RoleTargetStatus.PENDING)
+            )
+            targets = result.all()
+
+        progress = RoleJobProgress(
+            job_id=job_id,
+            description=job.description,
+            total=sum(counts.values()),
+            done=counts.get(RoleTargetStatus.DONE, 0),
+            skipped=counts.get(RoleTargetStatus.SKIPPED, 0),
+            failed=counts.get(RoleTargetStatus.FAILED, 0),
+        )
+
+        guild = bot.get_guild(job.guild_id)
+        if not guild:
+            logger.error(f"Role job #{job_id}: guild {job.guild_id} not found, job left pending")
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for target in targets:
+            queue.put_nowait((target, 0))
+        outcomes: List[dict] = []
+        last_flush = last_progress = time.monotonic()
+        reason = f"Role job #{job_id}: {job.description}"
+
+        async def report(force: bool = False) -> None:
+            nonlocal last_progress
+            if on_progress and (force or time.monotonic() - last_progress >= PROGRESS_SECONDS):
+                last_progress = time.monotonic()
+                try:
+                    await on_progress(progress)
+                except Exception as e:
+                    # The interaction may have expired: the job itself goes on
+                    logger.debug(f"Role job #{job_id}: progress update failed: {e}")
+
+        async def flush() -> None:
+            nonlocal last_flush
+            last_flush = time.monotonic()
+            if not outcomes:
+                return
+            batch = outcomes[:]
+            outcomes.clear()
+            async with AsyncSessionLocal() as session:
+                await session.execute(update(RoleJobTarget), batch)  # Bulk UPDATE by primary key
+                await session.commit()
+
+        async def record(target_id: int, status: RoleTargetStatus, error: Optional[str] = None) -> None:
+            if status == RoleTargetStatus.DONE:
+                progress.done += 1
+            elif status == RoleTargetStatus.SKIPPED:
+                progress.skipped += 1
+            else:
+                progress.failed += 1
+            outcomes.append({'id': target_id, 'status': status, 'error': error[:300] if error else None})
+            if len(outcomes) >= FLUSH_EVERY or time.monotonic() - last_flush >= FLUSH_SECONDS:
+                await flush()
+            await report()
+
+        async def worker() -> None:
+            while True:
+                target, attempts = await queue.get()
+                try:
+                    status, error = await self._apply(guild, target, reason)
+                    await record(target.id, status, error)
+                except discord.HTTPException as e:
+                    retry_after = getattr(e, 'retry_after', None)
+                    if e.status == 429 or retry_after:
+                        self._back_off(retry_after or 5)
+                    if attempts + 1 < self.max_attempts and (e.status == 429 or e.status >= 500):
+                        queue.put_nowait((target, attempts + 1))
+                    else:
+                        await record(target.id, RoleTargetStatus.FAILED, str(e))
+                except Exception as e:
+                    logger.error(f"Role job #{job_id}: unexpected error for member {target.member_id}: {e}")
+                    await record(target.id, RoleTargetStatus.FAILED, str(e))
+                finally:
+                    queue.task_done()
+
+        await report(force=True)
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Outcomes already applied on Discord are kept even when the job is cancelled
+            await flush()
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(RoleJob).where(RoleJob.id == job_id).values(status=RoleJobStatus.COMPLETED)
+            )
+            await session.commit()
+
+        progress.finished = True
+        await report(force=True)
+        logger.info(
+            f"Role job #{job_id} complete: {progress.done} updated, "
+            f"{progress.skipped} skipped, {progress.failed} failed"
+        )
+
+    async def _apply(self, guild: discord.Guild, target, reason: str) -> Tuple[RoleTargetStatus, Optional[str]]:
+        """Apply the missing part of a member's change with a single request."""
+        member = guild.get_member(target.member_id)
+        if not member:
+            return RoleTargetStatus.SKIPPED, "Member not in the guild"
+
+        current = {role.id for role in member.roles}
+        add = [guild.get_role(i) for i in _split_ids(target.add_role_ids) if i not in current]
+        remove = [guild.get_role(i) for i in _split_ids(target.remove_role_ids) if i in current]
+        add = [role for role in add if role]
+        remove = [role for role in remove if role]
+        if not add and not remove:
+            return RoleTargetStatus.SKIPPED, None
+
+        await self._pace()
+        if add and remove:
+            removed = {role.id for role in remove}
+            roles = [role for role in member.roles[1:] if role.id not in removed] + add
+            await member.edit(roles=roles, reason=reason)
+        elif add:
+            await member.add_roles(*add, reason=reason)
+        else:
+            await member.remove_roles(*remove, reason=reason)
+        return RoleTargetStatus.DONE, None
+
+
+role_jobs = RoleJobEngine()
@@ -0,0 +1,127 @@
+"""
+Reconciliation of the grade/formation roles with the authenticated users.
+The expected roles of every member are derived from the authenticated_users table and compared
+with the member cache; only the differences are applied, through a role job. A role reset is
+recorded in role_resets so that users authenticated before it do not get the role back.
+"""
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+import discord
+from sqlalchemy import select
+
+from db import AsyncSessionLocal
+from db.constants import UserType
+from db.models import AuthenticatedUser, RoleReset
+from utils import ROLE_M1, ROLE_M2, ROLE_FI, ROLE_FA
+from utils.role_jobs import role_jobs, RoleChange, ProgressCallback
+
+logger = logging.getLogger(__name__)
+
+GRADE_ROLES = {'M1': ROLE_M1.id, 'M2': ROLE_M2.id}
+FORMATION_ROLES = {'FI': ROLE_FI.id, 'FA': ROLE_FA.id}
+# Roles owned by authentication: anyone holding one without the matching record loses it
+MANAGED_ROLE_IDS = frozenset(GRADE_ROLES.values()) | frozenset(FORMATION_ROLES.values())
+# Unattended (startup) reconciliation is not applied when more members would lose a role:
+# an empty or unmigrated database must not strip the whole server
+STARTUP_MAX_REMOVALS = int(os.getenv('ROLE_RECONCILE_MAX_REMOVALS', '20'))
+
+
+def _value(value) -> Optional[str]:
+    return value.value if hasattr(value, 'value') else value
+
+
+def expected_roles(user_type, grade_level, formation_type) -> Set[int]:
+    """Managed roles an authenticated user should have."""
+    if _value(user_type) != UserType.STUDENT.value:
+        return set()
+    roles = set()
+    if _value(grade_level) in GRADE_ROLES:
+        roles.add(GRADE_ROLES[_value(grade_level)])
+    if _value(formation_type) in FORMATION_ROLES:
+        roles.add(FORMATION_ROLES[_value(formation_type)])
+    return roles
+
+
+async def load_expected_roles() -> Dict[int, Set[int]]:
+    """Expected managed roles of every authenticated user, minus the roles reset since they authenticated."""
+    async with AsyncSessionLocal() as session:
+        resets = dict((await session.execute(select(RoleReset.role_id, RoleReset.reset_at))).all())
+        result = await session.execute(
+            select(
+                AuthenticatedUser.user_id,
+                AuthenticatedUser.authenticated_at,
+                AuthenticatedUser.user_type,
+                AuthenticatedUser.grade_level,
+                AuthenticatedUser.formation_type
+            )
+        )
+        rows = result.all()
+
+    expected = {}
+    for user_id, authenticated_at, *fields in rows:
+        expected[user_id] = {
+            role_id for role_id in expected_roles(*fields)
+            if role_id not in resets or authenticated_at > resets[role_id]
+        }
+    return expected
+
+
+def diff_roles(members: Iterable[discord.Member], expected: Dict[int, Set[int]]) -> Dict[int, RoleChange]:
+    """Minimal managed-role changes bringing the members in line with the expected roles."""
+    changes: Dict[int, RoleChange] = {}
+    for member in members:
+        if member.bot:
+            continue
+        current = {role.id for role in member.roles} & MANAGED_ROLE_IDS
+        wanted = expected.get(member.id, set())
+        if current != wanted:
+            changes[member.id] = (wanted - current, current - wanted)
+    return changes
+
+
+def count_removals(changes: Dict[int, RoleChange]) -> int:
+    """Number of members losing at least one role."""
+    return sum(1 for _, remove_ids in changes.values() if remove_ids)
+
+
+async def plan_reconciliation(guild: discord.Guild) -> Dict[int, RoleChange]:
+    """Role changes reconciliation would apply to the guild."""
+    return diff_roles(guild.members, await load_expected_roles())
+
+
+async def reconcile_roles(bot: discord.Client, guild: discord.Guild, created_by: Optional[int] = None,
+                          on_progress: Optional[ProgressCallback] = None,
+                          changes: Optional[Dict[int, RoleChange]] = None) -> Optional[int]:
+    """
+    Start a role job fixing the drift between the database and the guild roles.
+
+    Args:
+        changes: Changes from plan_reconciliation (planned now if omitted)
+
+    Returns:
+        The job ID, or None if the roles are already in sync
+    """
+    if changes is None:
+        changes = await plan_reconciliation(guild)
+    if not changes:
+        logger.info("Role reconciliation: roles already in sync")
+        return None
+    logger.info(f"Role reconciliation: {len(changes)} member(s) to update")
+    return await role_jobs.run(
+        bot, guild.id, f"Role reconciliation ({len(changes)} member(s))", changes,
+        created_by=created_by, on_progress=on_progress
+    )
+
+
+async def record_role_reset(role_id: int, reset_by: Optional[int] = None) -> None:
+    """Record a role reset, so reconciliation does not give the role back to the users it was removed from."""
+    async with AsyncSessionLocal() as session:
+        reset = await session.get(RoleReset, role_id)
+        if reset:
+            reset.reset_at, reset.reset_by = datetime.now(), reset_by
+        else:
+            session.add(RoleReset(role_id=role_id, reset_at=datetime.now(), reset_by=reset_by))
+        await session.commit()
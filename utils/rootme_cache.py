@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from db import AsyncSessionLocal
 from db.models import AuthenticatedUser, RootMeCache
 from api import RootMe
+from utils.team_scores import refresh_user_team
 
 
 class RootMeCacheManager:
@@ -99,6 +100,7 @@ class RootMeCacheManager:
                     )
                     session.add(cache)
                 
+                await refresh_user_team(session, user_id)
                 await session.commit()
                 
                 return {
@@ -0,0 +1,148 @@
+"""
+Database-backed student roster.
+The students table is the source of truth for student authentication; it is seeded from the
+CSV lists of assets/ when empty and updated by uploading a list from the admin panel.
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, func, insert, update, delete
+
+from db import AsyncSessionLocal
+from db.models import Student
+from utils.student_roster import normalize_student_id, load_roster_files
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('email', 'first_name', 'last_name', 'grade_level', 'formation_type')
+DELETE_CHUNK = 500  # Stay below SQLite's bound parameter limit
+
+
+@dataclass
+class RosterDiff:
+    """Changes needed to turn the current roster list into an uploaded one."""
+    inserts: List[Dict[str, str]] = field(default_factory=list)
+    updates: List[Dict[str, str]] = field(default_factory=list)  # Include the row 'id'
+    deletes: List[int] = field(default_factory=list)  # Row IDs
+    unchanged: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.inserts or self.updates or self.deletes)
+
+
+def _value(value) -> str:
+    return value.value if hasattr(value, 'value') else value
+
+
+def diff_roster(current: List[Dict[str, str]], uploaded: List[Dict[str, str]],
+                grade_level: str, formation_type: str) -> RosterDiff:
+    """
+    Compare an uploaded list (one grade/formation) with the current roster.
+
+    Args:
+        current: Every student of the roster, with their row 'id'
+        uploaded: Students of the uploaded list
+        grade_level: Grade of the uploaded list
+        formation_type: Formation of the uploaded list
+    """
+    diff = RosterDiff()
+    by_id = {row['student_id']: row for row in current}
+    uploaded_ids = set()
+
+    for student in uploaded:
+        uploaded_ids.add(student['student_id'])
+        row = by_id.get(student['student_id'])
+        if row is None:
+            diff.inserts.append(student)
+        elif any(_value(row[name]) != student[name] for name in FIELDS):
+            # Includes students moving to another grade or formation
+            diff.updates.append({'id': row['id'], **student})
+        else:
+            diff.unchanged += 1
+
+    # Students of this list missing from the upload
+    diff.deletes = [
+        row['id'] for row in current
+        if _value(row['grade_level']) == grade_level and _value(row['formation_type']) == formation_type
+        and row['student_id'] not in uploaded_ids
+    ]
+    return diff
+
+
+async def _load_current(session) -> List[Dict[str, str]]:
+    result = await session.execute(
+        select(Student.id, Student.student_id, *(getattr(Student, name) for name in FIELDS))
+    )
+    return [dict(row._mapping) for row in result.all()]
+
+
+async def preview_roster(uploaded: List[Dict[str, str]], grade_level: str, formation_type: str) -> RosterDiff:
+    """Compute the changes of an upload without applying them."""
+    async with AsyncSessionLocal() as session:
+        current = await _load_current(session)
+    return diff_roster(current, uploaded, grade_level, formation_type)
+
+
+async def apply_roster(uploaded: List[Dict[str, str]], grade_level: str, formation_type: str) -> RosterDiff:
+    """Replace a grade/formation list with an upload: bulk inserts, updates and deletes in one transaction."""
+    async with AsyncSessionLocal() as session:
+        diff = diff_roster(await _load_current(session), uploaded, grade_level, formation_type)
+
+        if diff.inserts:
+            await session.execute(insert(Student), diff.inserts)
+        if diff.updates:
+            await session.execute(update(Student), diff.updates)  # Bulk UPDATE by primary key
+        for start in range(0, len(diff.deletes), DELETE_CHUNK):
+            await session.execute(
+                delete(Student).where(Student.id.in_(diff.deletes[start:start + DELETE_CHUNK]))
+            )
+        await session.commit()
+
+    logger.info(
+        f"Roster {grade_level} {formation_type} updated: {len(diff.inserts)} added, "
+        f"{len(diff.updates)} updated, {len(diff.deletes)} removed"
+    )
+    return diff
+
+
+async def seed_from_files() -> int:
+    """Import the CSV lists of assets/ when the students table is empty (first start)."""
+    async with AsyncSessionLocal() as session:
+        count = (await session.execute(select(func.count(Student.id)))).scalar() or 0
+        if count:
+            return 0
+
+        students = load_roster_files()
+        if students:
+            await session.execute(insert(Student), students)
+            await session.commit()
+            logger.info(f"Seeded the student roster with {len(students)} students from assets/")
+        return len(students)
+
+
+async def find_student(student_id: str, grade_level: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """Find a student by student number (unique index), optionally restricted to a grade level."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Student).where(Student.student_id == normalize_student_id(student_id))
+        )
+        student = result.scalar_one_or_none()
+
+    if not student:
+        return None
+    info = student.to_dict()
+    if grade_level and info['grade_level'] != grade_level.upper():
+        return None
+    return info
+
+
+async def list_students(grade_level: Optional[str] = None) -> List[Dict[str, str]]:
+    """All students of the roster, optionally filtered by grade level."""
+    query = select(Student).order_by(Student.last_name, Student.first_name)
+    if grade_level:
+        query = query.where(Student.grade_level == grade_level.upper())
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(query)
+        return [student.to_dict() for student in result.scalars().all()]
@@ -0,0 +1,195 @@
+"""
+Typed schedule model parsed from the Google Sheets CSV export.
+The sheet is parsed once into immutable Week/Day/Slot objects indexed by week-start date.
+"""
+import json
+from dataclasses import dataclass, asdict
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class SheetLayout:
+    """Describes where the schedule lives in the spreadsheet."""
+    # Row ranges kept from the export ([start, end) with end=None meaning until the end)
+    row_ranges: Tuple[Tuple[int, Optional[int]], ...] = ((8, 92), (102, None))
+    label_column: int = 0       # Column holding slot labels ("Matin", "Après-midi", ...)
+    first_day_column: int = 1   # Column of Monday
+    date_format: str = "%d/%m"  # Format of the date cells in the week header row
+    # Start/end time of each class slot, used for calendar exports
+    slot_times: Tuple[Tuple[str, str], ...] = (("09:00", "12:30"), ("13:30", "17:00"), ("17:30", "20:30"))
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> "SheetLayout":
+        """Build a layout from its JSON form, falling back to defaults for missing keys."""
+        if not raw:
+            return cls()
+
+        data = json.loads(raw)
+        default = cls()
+        ranges = data.get('row_ranges', default.row_ranges)
+        return cls(
+            row_ranges=tuple((int(start), int(end) if end is not None else None) for start, end in ranges),
+            label_column=int(data.get('label_column', default.label_column)),
+            first_day_column=int(data.get('first_day_column', default.first_day_column)),
+            date_format=str(data.get('date_format', default.date_format)),
+            slot_times=tuple((str(start), str(end)) for start, end in data.get('slot_times', default.slot_times)),
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    def select_rows(self, rows: List[List[str]]) -> List[List[str]]:
+        """
+        Keep only the rows covered by the layout ranges.
+        Sheets that do not reach the start of the last range are used whole (small exports
+        have no header/footer blocks to skip).
+        """
+        if not self.row_ranges or len(rows) <= max(start for start, _ in self.row_ranges):
+            return rows
+        selected = []
+        for start, end in self.row_ranges:
+            selected.extend(rows[start:end])
+        return selected
+
+
+DEFAULT_LAYOUT = SheetLayout()
+
+
+@dataclass(frozen=True)
+class Slot:
+    """A class time slot (course, teacher and room cells)."""
+    label: str
+    course: str = ""
+    teacher: str = ""
+    room: str = ""
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.course
+
+
+@dataclass(frozen=True)
+class Day:
+    """A day of the schedule with its slots."""
+    date: date
+    slots: Tuple[Slot, ...]
+
+    @property
+    def title(self) -> str:
+        """Full French day name (e.g., "Lundi 06 octobre 2025")."""
+        return self.date.strftime("%A %d %B %Y").capitalize()
+
+
+@dataclass(frozen=True)
+class Week:
+    """A schedule week starting on Monday."""
+    start: date
+    days: Tuple[Day, ...]
+
+    def days_between(self, start_day_index: int, end_day_index: int) -> Tuple[Day, ...]:
+        """Days whose weekday is within the inclusive range (0=Monday)."""
+        return tuple(d for d in self.days if start_day_index <= d.date.weekday() <= end_day_index)
+
+
+@dataclass(frozen=True)
+class ScheduleIndex:
+    """Weeks of a schedule indexed by their Monday."""
+    weeks: Mapping[date, Week]
+
+    def week_of(self, day: date) -> Optional[Week]:
+        """Week containing the given date."""
+        return self.weeks.get(day - timedelta(days=day.weekday()))
+
+    def displayed_week(self, today: Optional[date] = None) -> Tuple[Optional[Week], bool]:
+        """
+        Week to display: the current one, or the next one once past Friday.
+
+        Returns:
+            Tuple of (week or None, whether the next week was selected)
+        """
+        today = today or date.today()
+        if today.weekday() > 4:
+            return self.week_of(today + timedelta(days=7 - today.weekday())), True
+        return self.week_of(today), False
+
+
+def _resolve_date(value: str, date_format: str, reference: date) -> Optional[date]:
+    """Parse a day/month cell and pick the year closest to the reference date."""
+    try:
+        parsed = datetime.strptime(value.strip(), date_format)
+    except ValueError:
+        return None
+
+    if '%Y' in date_format or '%y' in date_format:
+        return parsed.date()
+
+    candidates = []
+    for year in (reference.year - 1, reference.year, reference.year + 1):
+        try:
+            candidates.append(parsed.replace(year=year).date())
+        except ValueError:
+            continue  # 29/02 on a non-leap year
+    if not candidates:
+        return None
+    return min(candidates, key=lambda d: abs((d - reference).days))
+
+
+def parse_schedule(rows: List[List[str]], classes_per_day: int = 2,
+                   layout: SheetLayout = DEFAULT_LAYOUT, reference: Optional[date] = None) -> ScheduleIndex:
+    """
+    Parse raw spreadsheet rows into an immutable week index.
+
+    Each week block is one header row with the dates, followed by three rows
+    (course, teacher, room) per class slot.
+
+    Args:
+        rows: Raw rows of the CSV export
+        classes_per_day: Number of time slots per day (2 for M1, 3 for M2)
+        layout: Sheet layout descriptor
+        reference: Date used to infer the year of DD/MM cells (defaults to today)
+
+    Returns:
+        ScheduleIndex keyed by week-start (Monday) date
+    """
+    reference = reference or date.today()
+    rows = layout.select_rows(rows)
+    rows_per_week = 1 + (classes_per_day * 3)
+
+    def cell(row: List[str], col: int) -> str:
+        return row[col].strip() if len(row) > col else ""
+
+    weeks = {}
+    for i in range(0, len(rows), rows_per_week):
+        header = rows[i]
+        block = rows[i + 1:i + rows_per_week]
+
+        days = []
+        for col in range(layout.first_day_column, layout.first_day_column + 7):
+            day_date = _resolve_date(cell(header, col), layout.date_format, reference) if cell(header, col) else None
+            if not day_date:
+                continue
+
+            slots = []
+            for class_idx in range(classes_per_day):
+                course_row = class_idx * 3
+                if course_row >= len(block):
+                    break
+                teacher_row = block[course_row + 1] if course_row + 1 < len(block) else []
+                room_row = block[course_row + 2] if course_row + 2 < len(block) else []
+                slots.append(Slot(
+                    label=cell(block[course_row], layout.label_column) or f"Cours {class_idx + 1}",
+                    course=cell(block[course_row], col),
+                    teacher=cell(teacher_row, col),
+                    room=cell(room_row, col),
+                ))
+            days.append(Day(date=day_date, slots=tuple(slots)))
+
+        if not days:
+            continue
+
+        start = days[0].date - timedelta(days=days[0].date.weekday())
+        weeks[start] = Week(start=start, days=tuple(days))
+
+    return ScheduleIndex(weeks=MappingProxyType(weeks))
@@ -0,0 +1,126 @@
+"""
+Shared Google Sheets source for schedule channels.
+Keeps one HTTP session, de-duplicates concurrent fetches of the same sheet and caches
+exports (and their parsed week indexes) for a short TTL.
+"""
+import asyncio
+import csv
+import io
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .schedule_model import SheetLayout, ScheduleIndex, parse_schedule
+
+
+CACHE_TTL_SECONDS = 300  # Shorter than the 15-minute update loop: one download per sheet per cycle
+
+SheetKey = Tuple[str, str]  # (spreadsheet ID, gid)
+
+
+def extract_spreadsheet_id(spreadsheet_url: str) -> str:
+    """
+    Extract the spreadsheet ID from a Google Sheets URL.
+
+    Raises:
+        ValueError: If the URL does not contain a spreadsheet ID
+    """
+    spreadsheet_id = None
+    if '/d/' in spreadsheet_url:
+        try:
+            spreadsheet_id = spreadsheet_url.split('/d/')[1].split('/')[0]
+        except (IndexError, AttributeError):
+            raise ValueError("Could not extract spreadsheet ID from URL")
+
+    if not spreadsheet_id:
+        raise ValueError("Invalid spreadsheet URL format")
+    return spreadsheet_id
+
+
+@dataclass
+class _CachedSheet:
+    rows: List[List[str]]
+    fetched_at: float
+    indexes: Dict[Tuple[int, SheetLayout], ScheduleIndex] = field(default_factory=dict)
+
+
+class ScheduleSource:
+    """Fetches sheet exports through a persistent session with a TTL cache."""
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cache: Dict[SheetKey, _CachedSheet] = {}
+        self._inflight: Dict[SheetKey, asyncio.Future] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        return self._session
+
+    async def _download(self, key: SheetKey) -> _CachedSheet:
+        spreadsheet_id, gid = key
+        export_url = f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}/export?format=csv&gid={gid}"
+        try:
+            async with self._get_session().get(export_url) as response:
+                response.raise_for_status()
+                data = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"Failed to fetch schedule: {str(e)}")
+
+        sheet = _CachedSheet(rows=list(csv.reader(io.StringIO(data))), fetched_at=time.monotonic())
+        self._cache[key] = sheet
+        return sheet
+
+    async def _get_sheet(self, spreadsheet_url: str, gid: str, bypass_cache: bool = False) -> _CachedSheet:
+        key = (extract_spreadsheet_id(spreadsheet_url), str(gid).strip())
+
+        cached = self._cache.get(key)
+        if cached and not bypass_cache and time.monotonic() - cached.fetched_at < self.ttl:
+            return cached
+
+        # Channels pointing at the same sheet share a single in-flight download
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._download(key))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(inflight)
+
+    async def get_rows(self, spreadsheet_url: str, gid: str, bypass_cache: bool = False) -> List[List[str]]:
+        """
+        Get all rows of a sheet export.
+
+        Args:
+            spreadsheet_url: The full Google Sheets URL
+            gid: The sheet ID (gid parameter)
+            bypass_cache: Download the sheet even if a fresh copy is cached
+        """
+        return (await self._get_sheet(spreadsheet_url, gid, bypass_cache)).rows
+
+    async def get_index(self, spreadsheet_url: str, gid: str, classes_per_day: int,
+                        layout: SheetLayout, bypass_cache: bool = False) -> ScheduleIndex:
+        """Get the parsed week index of a sheet, parsing each export once per layout."""
+        sheet = await self._get_sheet(spreadsheet_url, gid, bypass_cache)
+        index_key = (classes_per_day, layout)
+        if index_key not in sheet.indexes:
+            sheet.indexes[index_key] = parse_schedule(sheet.rows, classes_per_day, layout)
+        return sheet.indexes[index_key]
+
+    def invalidate(self, spreadsheet_url: str, gid: str) -> None:
+        """Drop the cached export of a sheet."""
+        try:
+            self._cache.pop((extract_spreadsheet_id(spreadsheet_url), str(gid).strip()), None)
+        except ValueError:
+            pass
+
+    async def close(self) -> None:
+        """Close the persistent HTTP session."""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+schedule_source = ScheduleSource()
@@ -0,0 +1,186 @@
+"""
+Dashboard statistics computed with one grouped aggregate query each.
+Results are cached for a short TTL and dropped as soon as a committed write touches one of
+the tables they are built from.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from sqlalchemy import select, func
+
+from db import AsyncSessionLocal
+from db.constants import SuggestionStatus, UserType
+from db.events import on_tables_committed
+from db.models import (
+    AuthenticatedUser, Category, PendingAuth, Professional, Student, Tool, ToolSuggestion
+)
+
+STATS_TTL_SECONDS = 60
+
+# Tables each dashboard is built from
+DASHBOARD_TABLES = {
+    'auth': {'authenticated_users', 'professionals', 'pending_auths', 'students'},
+    'tools': {'categories', 'tools', 'tool_suggestions'},
+}
+
+
+def _value(value) -> Any:
+    return value.value if hasattr(value, 'value') else value
+
+
+@dataclass(frozen=True)
+class AuthStats:
+    students: int
+    professionals: int  # Authenticated professionals
+    registered_professionals: int
+    by_grade: Dict[str, int]  # Authenticated students
+    by_formation: Dict[str, int]  # Authenticated students
+    with_rootme: int
+    with_linkedin: int
+    pending: int
+    roster: int  # Students in the roster
+
+    @property
+    def total(self) -> int:
+        return self.students + self.professionals
+
+
+@dataclass(frozen=True)
+class ToolStats:
+    categories: List[Tuple[str, int]]  # (name, tool count)
+    suggestions: Dict[str, int] = field(default_factory=dict)  # By status
+
+    @property
+    def tools(self) -> int:
+        return sum(count for _, count in self.categories)
+
+    @property
+    def total_suggestions(self) -> int:
+        return sum(self.suggestions.values())
+
+
+async def _auth_stats() -> AuthStats:
+    # Table-wide counts ride along as scalar subqueries
+    extras = [
+        select(func.count(Professional.id)).scalar_subquery(),
+        select(func.count(PendingAuth.id)).scalar_subquery(),
+        select(func.count(Student.id)).scalar_subquery(),
+    ]
+    query = (
+        select(
+            AuthenticatedUser.user_type,
+            AuthenticatedUser.grade_level,
+            AuthenticatedUser.formation_type,
+            func.count(AuthenticatedUser.user_id),
+            func.count(AuthenticatedUser.rootme_id),
+            func.count(AuthenticatedUser.linkedin_url),
+            *extras
+        )
+        .group_by(
+            AuthenticatedUser.user_type,
+            AuthenticatedUser.grade_level,
+            AuthenticatedUser.formation_type
+        )
+    )
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(query)).all()
+        if rows:
+            registered, pending, roster = rows[0][6:]
+        else:
+            registered, pending, roster = (await session.execute(select(*extras))).one()
+
+    students = professionals = with_rootme = with_linkedin = 0
+    by_grade: Dict[str, int] = {}
+    by_formation: Dict[str, int] = {}
+    for user_type, grade, formation, count, rootme, linkedin, *_ in rows:
+        with_rootme += rootme
+        with_linkedin += linkedin
+        if _value(user_type) != UserType.STUDENT.value:
+            professionals += count
+            continue
+        students += count
+        if grade:
+            by_grade[_value(grade)] = by_grade.get(_value(grade), 0) + count
+        if formation:
+            by_formation[_value(formation)] = by_formation.get(_value(formation), 0) + count
+
+    return AuthStats(
+        students=students,
+        professionals=professionals,
+        registered_professionals=registered or 0,
+        by_grade=by_grade,
+        by_formation=by_formation,
+        with_rootme=with_rootme,
+        with_linkedin=with_linkedin,
+        pending=pending or 0,
+        roster=roster or 0,
+    )
+
+
+async def _tool_stats() -> ToolStats:
+    extras = [
+        select(func.count(ToolSuggestion.id)).where(ToolSuggestion.status == status).scalar_subquery()
+        for status in SuggestionStatus
+    ]
+    query = (
+        select(Category.name, func.count(Tool.id), *extras)
+        .outerjoin(Tool, Tool.category_id == Category.id)
+        .group_by(Category.id, Category.name)
+        .order_by(Category.name)
+    )
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(query)).all()
+        if rows:
+            counts = rows[0][2:]
+        else:
+            counts = (await session.execute(select(*extras))).one()
+
+    return ToolStats(
+        categories=[(name, count) for name, count, *_ in rows],
+        suggestions={status.value: count or 0 for status, count in zip(SuggestionStatus, counts)},
+    )
+
+
+class StatsService:
+    """TTL cache of dashboard statistics with write invalidation."""
+
+    def __init__(self, ttl: float = STATS_TTL_SECONDS):
+        self.ttl = ttl
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def _get(self, name: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        cached = self._cache.get(name)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            cached = self._cache.get(name)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+            value = await compute()
+            self._cache[name] = (time.monotonic() + self.ttl, value)
+            return value
+
+    async def auth(self) -> AuthStats:
+        return await self._get('auth', _auth_stats)
+
+    async def tools(self) -> ToolStats:
+        return await self._get('tools', _tool_stats)
+
+    def invalidate_tables(self, tables) -> None:
+        """Drop the dashboards built from any of the given tables."""
+        for name, dashboard_tables in DASHBOARD_TABLES.items():
+            if dashboard_tables & tables:
+                self._cache.pop(name, None)
+
+
+stats_service = StatsService()
+
+
+@on_tables_committed
+def _invalidate_dashboards(tables: set) -> None:
+    stats_service.invalidate_tables(tables)
@@ -0,0 +1,96 @@
+"""
+Parsing of the M1/M2 FI/FA student CSV lists.
+The lists of assets/ seed the students table on first start; uploaded lists go through the same parser.
+"""
+import csv
+import io
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EMAIL_DOMAIN = "etu.u-paris.fr"
+
+# (grade level, formation type) -> CSV file, in priority order for duplicate student numbers
+ROSTER_FILES = {
+    ('M1', 'FI'): 'assets/m1_fi.csv',
+    ('M1', 'FA'): 'assets/m1_fa.csv',
+    ('M2', 'FI'): 'assets/m2_fi.csv',
+    ('M2', 'FA'): 'assets/m2_fa.csv',
+}
+
+
+def normalize_student_id(student_id: str) -> str:
+    """Normalize a student number for lookups (surrounding and inner whitespace removed)."""
+    return "".join(str(student_id).split())
+
+
+def parse_roster_csv(data: str, grade_level: str, formation_type: str) -> Tuple[List[Dict[str, str]], List[str]]:
+    """
+    Parse a student list with the 'N° étudiant', 'Nom', 'Prénom' and 'Email' columns
+    (the email column holds the local part of the university address).
+
+    Returns:
+        Tuple of (students, errors)
+    """
+    try:
+        dialect = csv.Sniffer().sniff(data[:2048], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(io.StringIO(data), dialect=dialect)
+
+    headers = [h.strip() for h in next(reader, [])]
+    try:
+        id_idx = headers.index('N° étudiant')
+        nom_idx = headers.index('Nom')
+        prenom_idx = headers.index('Prénom')
+        email_idx = headers.index('Email')
+    except ValueError:
+        return [], ["Missing column(s): expected 'N° étudiant', 'Nom', 'Prénom', 'Email'"]
+    width = max(id_idx, nom_idx, prenom_idx, email_idx)
+
+    students, errors, seen = [], [], set()
+    for line, row in enumerate(reader, start=2):
+        if not row or not "".join(row).strip():
+            continue
+        if len(row) <= width or not row[id_idx].strip():
+            errors.append(f"Line {line}: incomplete row")
+            continue
+        student_id = normalize_student_id(row[id_idx])
+        if student_id in seen:
+            errors.append(f"Line {line}: duplicate student number {student_id}")
+            continue
+        seen.add(student_id)
+        local_part = row[email_idx].strip()
+        students.append({
+            'student_id': student_id,
+            'first_name': row[prenom_idx].strip(),
+            'last_name': row[nom_idx].strip(),
+            'email': local_part if '@' in local_part else f"{local_part}@{EMAIL_DOMAIN}",
+            'formation_type': formation_type.upper(),
+            'grade_level': grade_level.upper()
+        })
+    return students, errors
+
+
+def load_roster_files(files: Optional[Dict[Tuple[str, str], str]] = None) -> List[Dict[str, str]]:
+    """
+    Parse the CSV lists (used to seed the students table).
+    Missing files are skipped; a student listed in several files is kept from the first one.
+
+    Returns:
+        List of student dicts
+    """
+    students: Dict[str, Dict[str, str]] = {}
+    for (grade, formation), path in (files or ROSTER_FILES).items():
+        try:
+            with open(path, newline='', encoding='utf-8') as csvfile:
+                parsed, errors = parse_roster_csv(csvfile.read(), grade, formation)
+        except OSError as e:
+            logger.warning(f"Skipping student list {path}: {e}")
+            continue
+        for error in errors:
+            logger.warning(f"{path}: {error}")
+        for student in parsed:
+            students.setdefault(student['student_id'], student)
+    return list(students.values())
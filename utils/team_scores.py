@@ -0,0 +1,209 @@
+"""
+Materialized CTF team scores and the server-wide leaderboard.
+team_scores holds the Root-Me totals of every team. A team's row is recomputed (one grouped query)
+in the transaction that changes its membership or one of its members' RootMeCache row. The
+leaderboard is one ordered query on that table, and the pinned leaderboard message is edited only
+when the top of the ranking changes.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Iterable, List, Optional
+
+import discord
+from discord import Embed, Color
+from sqlalchemy import select, func, delete
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import AsyncSessionLocal, engine
+from db.models import PlayerProfile, RootMeCache, Team, TeamScore
+from db.events import on_tables_committed
+from utils.message_registry import message_registry
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_SIZE = 10
+LEADERBOARD_DEBOUNCE_SECONDS = 10.0  # Score changes within this delay are published together
+LEADERBOARD_CHANNEL_ID = int(os.getenv('CTF_LEADERBOARD_CHANNEL_ID', '0'))
+LEADERBOARD_TABLES = {'team_scores', 'ctf_teams'}
+
+
+def _insert(table):
+    """Dialect-specific INSERT supporting ON CONFLICT."""
+    if engine.dialect.name == 'postgresql':
+        return postgresql_insert(table)
+    return sqlite_insert(table)
+
+
+def _totals_query():
+    """Per-team member count and Root-Me totals."""
+    return (
+        select(
+            PlayerProfile.team_id,
+            func.count(PlayerProfile.user_id).label('member_count'),
+            func.count(RootMeCache.id).label('linked_count'),
+            func.coalesce(func.sum(RootMeCache.score), 0).label('total_score'),
+            func.coalesce(func.sum(RootMeCache.challenge_count), 0).label('total_challenges')
+        )
+        .outerjoin(RootMeCache, RootMeCache.user_id == PlayerProfile.user_id)
+        .where(PlayerProfile.team_id.is_not(None))
+        .group_by(PlayerProfile.team_id)
+    )
+
+
+async def _store(session: AsyncSession, rows) -> None:
+    values = [dict(row._mapping) for row in rows]
+    if not values:
+        return
+    statement = _insert(TeamScore.__table__).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=['team_id'],
+        set_={
+            'member_count': statement.excluded.member_count,
+            'linked_count': statement.excluded.linked_count,
+            'total_score': statement.excluded.total_score,
+            'total_challenges': statement.excluded.total_challenges,
+            'updated_at': func.now(),
+        }
+    )
+    await session.execute(statement)
+
+
+async def refresh_teams(session: AsyncSession, team_ids: Iterable[Optional[int]]) -> None:
+    """
+    Recompute the scores of some teams in the caller's transaction (committed by the caller).
+    Teams left without members lose their row, as in rebuild_team_scores.
+
+    Args:
+        team_ids: Teams whose membership or members' scores changed (None values are ignored)
+    """
+    team_ids = {team_id for team_id in team_ids if team_id}
+    if not team_ids:
+        return
+    await session.flush()  # The session does not autoflush
+    rows = (await session.execute(_totals_query().where(PlayerProfile.team_id.in_(team_ids)))).all()
+    empty = team_ids - {row.team_id for row in rows}
+    if empty:
+        await session.execute(delete(TeamScore).where(TeamScore.team_id.in_(empty)))
+    await _store(session, rows)
+
+
+async def refresh_user_team(session: AsyncSession, user_id: int) -> None:
+    """Recompute the score of a user's team, if any (after a change of their RootMeCache row)."""
+    team_id = (await session.execute(
+        select(PlayerProfile.team_id).where(PlayerProfile.user_id == user_id)
+    )).scalar_one_or_none()
+    await refresh_teams(session, [team_id])
+
+
+async def rebuild_team_scores() -> None:
+    """Recompute every team (startup), dropping the rows of teams without members."""
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(_totals_query())).all()
+        await session.execute(
+            delete(TeamScore).where(TeamScore.team_id.not_in([row.team_id for row in rows]))
+        )
+        await _store(session, rows)
+        await session.commit()
+
+
+async def top_teams(limit: int = LEADERBOARD_SIZE) -> List:
+    """The best teams, with their name, in ranking order."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(
+                Team.id,
+                Team.name,
+                TeamScore.total_score,
+                TeamScore.total_challenges,
+                TeamScore.linked_count,
+                TeamScore.member_count
+            )
+            .join(Team, Team.id == TeamScore.team_id)
+            .order_by(TeamScore.total_score.desc(), TeamScore.team_id.desc())
+            .limit(limit)
+        )
+        return result.all()
+
+
+def build_leaderboard_embed(rows: List) -> Embed:
+    """Leaderboard embed of top_teams() rows."""
+    embed = Embed(
+        title="🏆 CTF Team Leaderboard",
+        description="Root-Me score of the members of each team.",
+        color=Color.gold()
+    )
+    if not rows:
+        embed.add_field(name="No teams yet", value="Create a team with `/ctf create_team`.", inline=False)
+        return embed
+
+    medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+    lines = []
+    for position, row in enumerate(rows, start=1):
+        rank = medals.get(position, f"**{position}.**")
+        lines.append(
+            f"{rank} **{row.name}** • **{row.total_score:,}** pts • "
+            f"{row.total_challenges:,} challenges • {row.linked_count}/{row.member_count} linked"
+        )
+    embed.add_field(name=f"Top {len(rows)}", value="\n".join(lines), inline=False)
+    return embed
+
+
+class LeaderboardPublisher:
+    """Keeps the pinned leaderboard message in sync with the top of team_scores."""
+
+    def __init__(self, channel_id: int = LEADERBOARD_CHANNEL_ID):
+        self.channel_id = channel_id
+        self.bot: Optional[discord.Client] = None
+        self._pending: Optional[asyncio.Task] = None
+        self._pinned_id: Optional[int] = None
+
+    def start(self, bot: discord.Client) -> None:
+        self.bot = bot
+
+    def schedule(self) -> None:
+        """Publish after the debounce delay (no-op if a publish is already scheduled)."""
+        if not self.bot or not self.channel_id or (self._pending and not self._pending.done()):
+            return
+        try:
+            self._pending = asyncio.get_running_loop().create_task(self._publish_later())
+        except RuntimeError:
+            pass  # Commit outside the event loop (scripts)
+
+    async def _publish_later(self) -> None:
+        await asyncio.sleep(LEADERBOARD_DEBOUNCE_SECONDS)
+        try:
+            await self.publish()
+        except Exception as e:
+            logger.error(f"Failed to publish the CTF leaderboard: {e}")
+
+    async def publish(self) -> None:
+        """Edit (or create and pin) the leaderboard message if the top teams changed."""
+        channel = self.bot.get_channel(self.channel_id) if self.bot else None
+        if not channel:
+            return
+        rows = await top_teams()
+        # Hash of what the message shows: unchanged top-N means no REST call at all
+        digest = hashlib.sha256(json.dumps([list(row) for row in rows]).encode()).hexdigest()
+        message_id = await message_registry.publish(
+            channel, "ctf_leaderboard", embeds=[build_leaderboard_embed(rows)], content_hash=digest
+        )
+        if message_id != self._pinned_id:
+            try:
+                await channel.get_partial_message(message_id).pin(reason="CTF leaderboard")
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to pin the CTF leaderboard: {e}")
+            self._pinned_id = message_id
+
+
+leaderboard_publisher = LeaderboardPublisher()
+
+
+@on_tables_committed
+def _leaderboard_changed(tables: set) -> None:
+    if LEADERBOARD_TABLES & tables:
+        leaderboard_publisher.schedule()
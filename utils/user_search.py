@@ -0,0 +1,202 @@
+"""
+In-memory trigram index over the authenticated users for the admin search.
+Email, student ID, name and Discord display name are indexed; queries are matched through
+trigram postings instead of leading-wildcard LIKE scans, tolerate typos and are ranked.
+The index is rebuilt after writes to the user tables and every few minutes for display names.
+"""
+import asyncio
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+import discord
+from sqlalchemy import select
+
+from db import AsyncSessionLocal
+from db.models import AuthenticatedUser, Professional, Student
+from db.events import on_tables_committed
+
+INDEX_TTL_SECONDS = 300  # Display names change without database writes
+MIN_GRAM_RATIO = 0.5  # Share of the query trigrams a result must contain
+INDEXED_TABLES = {'authenticated_users', 'students', 'professionals'}
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase text without accents."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def local_part(email: Optional[str]) -> str:
+    """Part of an email address (or query) before the @."""
+    return (email or "").split('@', 1)[0]
+
+
+def _value(value) -> Optional[str]:
+    return value.value if hasattr(value, 'value') else value
+
+
+@dataclass(frozen=True)
+class UserDocument:
+    user_id: int
+    email: str
+    user_type: str
+    student_id: Optional[str]
+    grade_level: Optional[str]
+    formation_type: Optional[str]
+    name: Optional[str]  # From the student roster or the professional registration
+    display_name: Optional[str]
+
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(
+            normalize(field)
+            for field in (self.email, self.student_id, self.name, self.display_name)
+            if field
+        )
+
+    def gram_fields(self) -> Tuple[str, ...]:
+        """Fields indexed by trigrams: the email without its domain, shared by almost every user."""
+        return tuple(
+            normalize(field)
+            for field in (local_part(self.email), self.student_id, self.name, self.display_name)
+            if field
+        )
+
+
+class UserSearchIndex:
+    """Trigram postings of the authenticated users, rebuilt when stale."""
+
+    def __init__(self, ttl: float = INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        self._documents: Dict[int, UserDocument] = {}
+        self._fields: Dict[int, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._expires_at = 0.0
+        self._generation = 0  # Bumped by invalidate(): a load started before is already stale
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._expires_at = 0.0
+
+    async def _load(self, guild: Optional[discord.Guild]) -> List[UserDocument]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(
+                    AuthenticatedUser.user_id,
+                    AuthenticatedUser.email,
+                    AuthenticatedUser.user_type,
+                    AuthenticatedUser.student_id,
+                    AuthenticatedUser.grade_level,
+                    AuthenticatedUser.formation_type,
+                    Student.first_name,
+                    Student.last_name,
+                    Professional.first_name,
+                    Professional.last_name
+                )
+                .outerjoin(Student, Student.student_id == AuthenticatedUser.student_id)
+                .outerjoin(Professional, Professional.email == AuthenticatedUser.email)
+            )
+            rows = result.all()
+
+        documents = []
+        for user_id, email, user_type, student_id, grade, formation, *names in rows:
+            name = " ".join(part for part in names if part) or None
+            member = guild.get_member(user_id) if guild else None
+            documents.append(UserDocument(
+                user_id=user_id,
+                email=email,
+                user_type=_value(user_type),
+                student_id=student_id,
+                grade_level=_value(grade),
+                formation_type=_value(formation),
+                name=name,
+                display_name=member.display_name if member else None,
+            ))
+        return documents
+
+    async def _ensure(self, guild: Optional[discord.Guild]) -> None:
+        if time.monotonic() < self._expires_at:
+            return
+        async with self._lock:
+            if time.monotonic() < self._expires_at:
+                return
+            generation = self._generation
+            documents = await self._load(guild)
+            fields: Dict[int, Tuple[str, ...]] = {}
+            postings: Dict[str, Set[int]] = {}
+            for document in documents:
+                fields[document.user_id] = document.fields()
+                for field in document.gram_fields():
+                    for gram in trigrams(field):
+                        postings.setdefault(gram, set()).add(document.user_id)
+            # Swapped at once: concurrent searches see the old or the new index, never a mix
+            self._documents = {document.user_id: document for document in documents}
+            self._fields = fields
+            self._postings = postings
+            # Invalidated during the load: serve this index but reload on the next search
+            if generation == self._generation:
+                self._expires_at = time.monotonic() + self.ttl
+
+    def _score(self, user_id: int, query: str, gram_ratio: float) -> float:
+        score = gram_ratio
+        for field in self._fields[user_id]:
+            if field == query:
+                score += 3
+            elif field.startswith(query):
+                score += 1.5
+            elif query in field:
+                score += 1
+        return score
+
+    async def search(self, guild: Optional[discord.Guild], term: str) -> List[UserDocument]:
+        """
+        Find users by email, student ID, name or display name.
+
+        Returns:
+            Matching users, best first
+        """
+        await self._ensure(guild)
+        query = normalize(term)
+        if not query:
+            return []
+
+        grams = trigrams(local_part(query))  # The domain part would match (almost) everyone
+        if grams:
+            hits = Counter()
+            for gram in grams:
+                hits.update(self._postings.get(gram, ()))
+            candidates = {
+                user_id: count / len(grams)
+                for user_id, count in hits.items()
+                if count / len(grams) >= MIN_GRAM_RATIO
+            }
+        else:
+            # Too short for trigrams (or only a domain): substring match on the (small) set of fields
+            candidates = {
+                user_id: 0.0 for user_id, fields in self._fields.items()
+                if any(query in field for field in fields)
+            }
+
+        ranked = sorted(
+            ((self._score(user_id, query, ratio), user_id) for user_id, ratio in candidates.items()),
+            key=lambda item: (-item[0], normalize(self._documents[item[1]].name or self._documents[item[1]].email))
+        )
+        return [self._documents[user_id] for _, user_id in ranked]
+
+
+user_search = UserSearchIndex()
+
+
+@on_tables_committed
+def _invalidate_user_search(tables: set) -> None:
+    if INDEXED_TABLES & tables:
+        user_search.invalidate()